@@ -0,0 +1,58 @@
+"""Memory of the artist profile frame: previous wide layout vs. compact layout.
+
+The previous loader returned ``SELECT artist_profiles.*`` plus artist columns
+as float64 and object-dtype strings. The compact loader selects only the
+columns the app reads, downcasts them to float32 and keeps strings in Arrow.
+
+    python benchmarks/artist_profile_memory.py --db src/assets/music_data.db
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import Database  # noqa: E402
+
+PREVIOUS_QUERY = """
+SELECT artist_profiles.*, artists.artist_name, artists.artist_popularity, artists.artist_image_url
+FROM artist_profiles
+JOIN artists ON artists.artist_id = artist_profiles.artist_id
+"""
+
+
+def column_report(frame: pd.DataFrame) -> pd.DataFrame:
+    usage = frame.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        "dtype": frame.dtypes.astype(str),
+        "MiB": usage / 2**20,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    with database.get_connection() as conn:
+        previous = pd.read_sql_query(PREVIOUS_QUERY, conn)
+    compact = database.get_artist_profiles()
+
+    pd.set_option("display.width", 120)
+    print(f"catalog: {len(compact)} artists\n")
+    print("previous layout:")
+    print(column_report(previous).round(3).to_string())
+    print("\ncompact layout:")
+    print(column_report(compact).round(3).to_string())
+
+    before = previous.memory_usage(deep=True).sum() / 2**20
+    after = compact.memory_usage(deep=True).sum() / 2**20
+    print(f"\ntotal: {before:.2f} MiB -> {after:.2f} MiB ({1 - after / before:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
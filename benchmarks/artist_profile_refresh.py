@@ -0,0 +1,140 @@
+"""Appending tracks: trigger-maintained artist sums vs. rebuilding the profiles.
+
+Builds catalogs of each ``--catalogs`` size with ``etl.run_etl``, then
+appends the same ``--batch`` new tracks (features and artist links, most to
+existing artists) three ways: through the triggers of ``schema.py``, which
+update the sums of the batch's artists; with the triggers dropped, followed
+by a rebuild of the sums in SQL; and the notebooks' way, a pandas
+``groupby().mean()`` over every track. The trigger path should cost the same
+at every catalog size. Afterwards the view must match a full recompute.
+
+    python benchmarks/artist_profile_refresh.py --catalogs 100000 1000000
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from etl import run_etl  # noqa: E402
+from etl_load import write_csvs  # noqa: E402
+from schema import (  # noqa: E402
+    ARTIST_PROFILE_FEATURES,
+    BINARY_FEATURE_THRESHOLDS,
+    DROP_ARTIST_PROFILES,
+    TABLE_COLUMNS,
+    create_artist_profiles,
+)
+
+FULL_RECOMPUTE = """
+SELECT ta.artist_id, {features}
+FROM track_artists ta JOIN track_features tf ON tf.track_id = ta.track_id
+GROUP BY ta.artist_id ORDER BY ta.artist_id
+""".format(features=", ".join(
+    f"CAST(2 * SUM(tf.{f}) > COUNT(*) AS INTEGER)" if f in BINARY_FEATURE_THRESHOLDS
+    else f"AVG(tf.{f})" for f in ARTIST_PROFILE_FEATURES
+))
+
+
+def new_batch(conn: sqlite3.Connection, size: int, seed: int = 1):
+    """Feature rows and artist links of ``size`` new tracks, 10% by new artists."""
+    rng = np.random.default_rng(seed)
+    artist_ids = [a for a, in conn.execute("SELECT artist_id FROM artists")]
+    track_ids = [f"new{i:019d}" for i in range(size)]
+    features = [
+        (track_id, *rng.random(2).tolist(), int(rng.integers(12)), -30 * rng.random(),
+         int(rng.integers(2)), rng.random(), *rng.integers(0, 2, 3).tolist(),
+         rng.random(), 60 + 140 * rng.random(), 3.5)
+        for track_id in track_ids
+    ]
+    links = [
+        (track_id, artist_ids[rng.integers(len(artist_ids))] if rng.random() > 0.1
+         else f"newartist{i % 500}")
+        for i, track_id in enumerate(track_ids)
+    ]
+    return features, links
+
+
+def append(conn: sqlite3.Connection, features, links) -> None:
+    columns = TABLE_COLUMNS["track_features"]
+    with conn:
+        conn.executemany(
+            f"INSERT INTO track_features VALUES ({', '.join('?' * len(columns))})", features
+        )
+        conn.executemany("INSERT INTO track_artists VALUES (?, ?)", links)
+
+
+def pandas_rebuild(conn: sqlite3.Connection) -> None:
+    members = pd.read_sql_query("SELECT * FROM track_artists", conn).merge(
+        pd.read_sql_query("SELECT * FROM track_features", conn), on="track_id"
+    )
+    members.groupby("artist_id")[ARTIST_PROFILE_FEATURES].mean()
+
+
+def run(tmp: Path, num_tracks: int, batch: int) -> None:
+    csv_dir = tmp / f"csv{num_tracks}"
+    csv_dir.mkdir()
+    write_csvs(csv_dir, num_tracks)
+    base = tmp / f"catalog{num_tracks}.db"
+    run_etl(csv_dir, base, gzip_asset=False)
+    shutil.rmtree(csv_dir)
+
+    timings = {}
+    triggers, rebuilt = tmp / "triggers.db", tmp / "rebuilt.db"
+    shutil.copy(base, triggers)
+    shutil.copy(base, rebuilt)
+    with sqlite3.connect(triggers) as conn:
+        features, links = new_batch(conn, batch)
+        start = time.perf_counter()
+        append(conn, features, links)
+        timings["triggers"] = time.perf_counter() - start
+        view = conn.execute("SELECT * FROM artist_profiles ORDER BY artist_id").fetchall()
+        full = conn.execute(FULL_RECOMPUTE).fetchall()
+
+    with sqlite3.connect(rebuilt) as conn:
+        conn.executescript(DROP_ARTIST_PROFILES)
+        start = time.perf_counter()
+        append(conn, features, links)
+        timings["append"] = time.perf_counter() - start
+        start = time.perf_counter()
+        create_artist_profiles(conn)
+        timings["sql rebuild"] = time.perf_counter() - start
+        start = time.perf_counter()
+        pandas_rebuild(conn)
+        timings["pandas rebuild"] = time.perf_counter() - start
+
+    same_artists = [row[0] for row in view] == [row[0] for row in full]
+    error = max(
+        abs(a - b) for v, f in zip(view, full) for a, b in zip(v[1:], f[1:])
+    ) if same_artists else float("nan")
+    print(f"{num_tracks:>9} {timings['triggers']:>11.3f} {timings['append']:>11.3f} "
+          f"{timings['sql rebuild']:>12.3f} {timings['pandas rebuild']:>15.3f} "
+          f"{str(same_artists):>13} {error:>10.1e}")
+    for path in (base, triggers, rebuilt):
+        path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalogs", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+    print(f"appending {args.batch} tracks (seconds)")
+    print(f"{'catalog':>9} {'triggers':>11} {'plain insert':>11} {'+ SQL rebuild':>12} "
+          f"{'+ pandas groupby':>15} {'same artists':>13} {'max error':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_tracks in args.catalogs:
+            run(Path(tmp), num_tracks, args.batch)
+
+
+if __name__ == "__main__":
+    main()
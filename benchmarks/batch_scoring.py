@@ -0,0 +1,94 @@
+"""Offline scoring of many preference vectors: per-user loop vs. blocked batch.
+
+Random preference vectors on the 0.01 slider grid are scored against the whole
+catalog for their top 15 artists. ``loop`` calls ``find_top_k_artists`` once
+per user (timed on the first ``--loop-users`` and extrapolated); ``batch`` is
+``find_top_k_artists_batch``, in-process and over a process pool. Peak memory
+of the batch is traced for a few distance block budgets.
+
+    python benchmarks/batch_scoring.py --users 1000 10000 --workers 2
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import PROFILE_FEATURES, Database, artist_feature_matrix  # noqa: E402
+from models import UserPreferences  # noqa: E402
+from similarity import batch_top_k  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--loop-users", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("-k", type=int, default=15)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = (
+        snapshot.artist_profiles if snapshot is not None
+        else database.get_artist_profiles()
+    )
+    rng = np.random.default_rng(0)
+    print(f"catalog: {len(profiles)} artists, {os.cpu_count()} CPUs")
+
+    print(f"{'users':>7} {'loop s':>8} {'batch s':>8} "
+          f"{f'{args.workers} workers s':>12} {'same':>5}")
+    for users in args.users:
+        queries = np.round(rng.random((users, len(PROFILE_FEATURES))), 2)
+        loop_users = min(users, args.loop_users)
+
+        start = time.perf_counter()
+        looped = [
+            database.find_top_k_artists(
+                profiles,
+                UserPreferences(**dict(zip(PROFILE_FEATURES, map(float, query)))),
+                k=args.k
+            )["artist_id"].tolist()
+            for query in queries[:loop_users]
+        ]
+        loop_seconds = (time.perf_counter() - start) * users / loop_users
+
+        start = time.perf_counter()
+        artist_ids, _ = database.find_top_k_artists_batch(profiles, queries, k=args.k)
+        batch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pooled_ids, _ = database.find_top_k_artists_batch(
+            profiles, queries, k=args.k, workers=args.workers
+        )
+        pool_seconds = time.perf_counter() - start
+
+        same = (
+            artist_ids[:loop_users].tolist() == looped
+            and np.array_equal(artist_ids, pooled_ids)
+        )
+        print(f"{users:>7} {loop_seconds:>8.2f} {batch_seconds:>8.2f} "
+              f"{pool_seconds:>12.2f} {str(same):>5}")
+
+    features = artist_feature_matrix(profiles)
+    queries = np.round(rng.random((max(args.users), len(PROFILE_FEATURES))), 2)
+    print(f"\npeak memory for {len(queries)} users by distance block budget:")
+    for block_mb in (4, 32, 256):
+        tracemalloc.start()
+        start = time.perf_counter()
+        batch_top_k(queries, features, args.k, block_bytes=block_mb << 20)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{block_mb:>5} MB blocks: peak {peak / 2**20:>7.1f} MB, {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
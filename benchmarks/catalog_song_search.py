@@ -0,0 +1,145 @@
+"""Catalog-wide song search: brute force vs. two-stage (artist centroids, then tracks).
+
+For random preference vectors, the 10 nearest tracks in the normalized song
+feature space. ``brute`` scores every row of the track feature store;
+``exact`` is the two-stage search run to its exactness bound; ``top N`` caps
+stage one at the N most promising artist song groups, and its recall@10 is
+measured against brute force.
+
+The snapshot of ``--db`` is searched first. The bundled synthetic catalogs
+draw every track independently of its artist, the worst case for artist
+pruning, so ``--synthetic`` also builds in-memory catalogs of that many
+tracks whose artists have a sound of their own (features drawn around an
+artist centre), as real catalogs do.
+
+    python benchmarks/catalog_song_search.py --synthetic 1000000 3000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import BINARY_FEATURES, SONG_FEATURES, Database  # noqa: E402
+from similarity import two_stage_top_k  # noqa: E402
+from snapshot import build_song_groups  # noqa: E402
+
+K = 10
+BINARY_COLUMNS = [SONG_FEATURES.index(feature) for feature in BINARY_FEATURES]
+
+
+def random_queries(rng, n: int) -> np.ndarray:
+    queries = rng.random((n, len(SONG_FEATURES))).astype(np.float32)
+    queries[:, BINARY_COLUMNS] = np.round(queries[:, BINARY_COLUMNS])
+    return queries
+
+
+def coherent_catalog(rng, tracks: int, tracks_per_artist: int = 10):
+    """Tracks around per-artist centres, with CSR artist -> track rows."""
+    artists = tracks // tracks_per_artist
+    centres = rng.random((artists, len(SONG_FEATURES))).astype(np.float32)
+    artist_of_track = np.sort(rng.integers(0, artists, tracks))
+    features = centres[artist_of_track] + rng.normal(
+        0, 0.08, (tracks, len(SONG_FEATURES))
+    ).astype(np.float32)
+    # Binary features follow the artist's, flipped on one track in ten
+    binary = np.round(centres[artist_of_track][:, BINARY_COLUMNS])
+    flip = rng.random(binary.shape) < 0.1
+    features[:, BINARY_COLUMNS] = np.where(flip, 1 - binary, binary)
+    features = np.clip(features, 0, 1)
+    counts = np.bincount(artist_of_track, minlength=artists)
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    return features, offsets, np.arange(tracks, dtype=np.int32)
+
+
+def brute_force(features: np.ndarray, query: np.ndarray) -> np.ndarray:
+    distances = np.linalg.norm(features - query, axis=1)
+    candidates = np.argpartition(distances, K - 1)[:K]
+    return candidates[np.lexsort((candidates, distances[candidates]))]
+
+
+def run(label, features, groups, queries, budgets):
+    def search(query, max_groups=None):
+        return two_stage_top_k(
+            query,
+            groups["song_group_centroids"],
+            groups["song_group_radii"],
+            groups["song_group_offsets"],
+            groups["song_group_rows"],
+            features,
+            K,
+            max_groups=max_groups,
+        )[0]
+
+    print(
+        f"\n{label}: {len(features)} tracks, "
+        f"{len(np.unique(groups['song_group_artists']))} artists, "
+        f"{len(groups['song_group_radii'])} song groups"
+    )
+    print(f"{'method':>10} {'recall@10':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    truth = []
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(brute_force(features, query))
+        times.append(time.perf_counter() - start)
+    report("brute", 1.0, times)
+
+    for name, max_groups in [("exact", None)] + [
+        (f"top {budget}", budget) for budget in budgets
+    ]:
+        recalls, times = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = search(query, max_groups)
+            times.append(time.perf_counter() - start)
+            recalls.append(len(np.intersect1d(found, expected)) / K)
+        report(name, np.mean(recalls), times)
+
+
+def report(name, recall, times):
+    times_ms = np.array(times) * 1000
+    print(f"{name:>10} {recall:>10.3f} {np.percentile(times_ms, 50):>8.2f} "
+          f"{np.percentile(times_ms, 95):>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[1000000])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    queries = random_queries(rng, args.queries)
+
+    snapshot = Database(args.db).get_snapshot()
+    run(
+        f"snapshot of {Path(args.db).name}",
+        snapshot.track_features,
+        {
+            name: getattr(snapshot, name) for name in (
+                "song_group_offsets", "song_group_rows", "song_group_artists",
+                "song_group_centroids", "song_group_radii",
+            )
+        },
+        queries,
+        args.budgets,
+    )
+    for tracks in args.synthetic:
+        features, offsets, member_rows = coherent_catalog(rng, tracks)
+        run(
+            "artist-coherent synthetic catalog",
+            features,
+            build_song_groups(features, offsets, member_rows),
+            queries,
+            args.budgets,
+        )
+
+
+if __name__ == "__main__":
+    main()
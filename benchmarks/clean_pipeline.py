@@ -0,0 +1,283 @@
+"""Cleaning the tracks CSV: the notebooks' ``clean_project_data`` vs. ``clean_data``.
+
+For each layout, writes a synthetic input with the quirks the notebooks
+handle: blank and multi-artist credits, quoted names with commas and
+newlines, repeated rows, missing features, and integer columns that are
+missing only in places. The notebook functions below are copied from
+``Clean_project_data.ipynb`` and ``KD_Clean_project_data.ipynb`` unchanged.
+First a ``--sample`` of rows is cleaned both ways, the module with tiny
+blocks so every cross-block path runs, and the outputs must match byte for
+byte. Then ``--rows`` rows are cleaned each way in a fresh process, reporting
+time and peak RSS (the pool's workers included).
+
+    python benchmarks/clean_pipeline.py --rows 1000000
+"""
+import argparse
+import filecmp
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from clean_data import FORMATS, clean_file  # noqa: E402
+
+CHUNK = 100_000
+
+
+# Clean_project_data.ipynb, cells 3-5
+
+def kaggle_move_column(df, col_name, col_index):
+    cols = df.columns.tolist()
+    cols.insert(col_index, cols.pop(cols.index(col_name)))
+    df = df[cols]
+    return df
+
+
+def kaggle_make_categorical_column(df, col_name, col_index):
+    bins = [0, .25, .50, .75, 1]
+    labels = ['Low', 'Moderate', 'High', 'Very High']
+    df[col_name + '_categorical'] = pd.cut(df[col_name], bins=bins, labels=labels)
+    df.loc[df[col_name] == 0, col_name + '_categorical'] = 'Low'
+    df.loc[df[col_name] == 1, col_name + '_categorical'] = 'Very High'
+    df = kaggle_move_column(df, col_name + '_categorical', col_index)
+    df = df.rename(columns={col_name: col_name + '_numeric'})
+    return df
+
+
+def kaggle_clean_project_data(df):
+    df = df.drop(df.columns[0], axis=1)
+    df = df[~pd.isna(df['artists']) & (df['artists'].str.strip() != "") & (df['artists'].str.strip() != "nan")]
+    artist_cols = df['artists'].str.split(';', expand=True)
+    artist_cols = artist_cols.iloc[:, :3].astype(str)
+    artist_cols.columns = ["artist_1", "artist_2", "artist_3"]
+    df = pd.concat([artist_cols, df], axis=1).drop(columns=['artists'])
+    df['album_name'] = df['album_name'].astype(str)
+    df['track_name'] = df['track_name'].astype(str)
+    df['popularity'] = df['popularity'].astype(int)
+    df['popularity'] = df['popularity'] / 100
+    df = kaggle_make_categorical_column(df, 'popularity', 6)
+    df['duration_minutes'] = df['duration_ms'] / 60000
+    df['duration_minutes'] = df['duration_minutes'].round(2)
+    df = kaggle_move_column(df, 'duration_minutes', 8)
+    df = df.drop(columns=['duration_ms'])
+    df = kaggle_make_categorical_column(df, 'danceability', 10)
+    df = kaggle_make_categorical_column(df, 'energy', 12)
+    df = df.drop(columns=['key'])
+    df = df.drop(columns=['loudness'])
+    df = kaggle_make_categorical_column(df, 'speechiness', 15)
+    return df
+
+
+# KD_Clean_project_data.ipynb, cell 0
+
+def make_categorical_column(df, column_name):
+    labels = ['Low', 'Moderate', 'High', 'Very High']
+    df[f"{column_name}_categorical"] = pd.cut(df[column_name], bins=4, labels=labels)
+    return df
+
+
+def move_column(df, column_name, new_position):
+    column = df.pop(column_name)
+    df.insert(new_position, column_name, column)
+    return df
+
+
+def split_column_to_n_columns(df, column_name, n, new_column_prefix):
+    col_idx = df.columns.get_loc(column_name)
+    split_cols = df[column_name].str.split(', ', expand=True).iloc[:, :n]
+    if n >= 3 and f"{new_column_prefix}_3" in split_cols.columns:
+        split_cols[f"{new_column_prefix}_3"] = split_cols[f"{new_column_prefix}_3"].str.split(',').str[0]
+    split_cols.columns = [f"{new_column_prefix}_{i+1}" for i in range(n)]
+    df = df.drop(columns=[column_name])
+    for i, new_col in enumerate(split_cols.columns):
+        df.insert(col_idx + i, new_col, split_cols[new_col])
+    return df
+
+
+def collected_clean_project_data(df):
+    df = df.drop_duplicates()
+    df = split_column_to_n_columns(df, 'artists', 3, 'artist')
+    df = split_column_to_n_columns(df, 'track_genre', 3, 'track_genre')
+    columns_to_categorize = [
+        'danceability', 'energy', 'acousticness',
+        'instrumentalness', 'liveness', 'speechiness', 'valence'
+    ]
+    df = df.dropna(subset=columns_to_categorize).reset_index(drop=True)
+    for col in columns_to_categorize:
+        df = make_categorical_column(df, col)
+    df['popularity'] = df['popularity'] / 100
+    df = make_categorical_column(df, 'popularity')
+    df['artist_popularity'] = df['artist_popularity'] / 100
+    df = make_categorical_column(df, 'artist_popularity')
+    df['duration_minutes'] = (df['duration_ms'] / 60000).round(2)
+    df = move_column(df, 'duration_minutes', 8)
+    df = df.drop(columns=['duration_ms'])
+    return df
+
+
+NOTEBOOKS = {"kaggle": kaggle_clean_project_data, "collected": collected_clean_project_data}
+
+
+def names(rng, prefix: str, n: int, pool: int) -> np.ndarray:
+    return np.array([f"{prefix} {i}" for i in range(pool)], dtype=object)[rng.integers(0, pool, n)]
+
+
+def credits(rng, n: int, separator: str, pool: int = 5000) -> list:
+    counts = rng.choice([1, 1, 1, 2, 2, 3, 5], n)
+    artists = names(rng, "Artist", counts.sum(), pool)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    return [separator.join(artists[bounds[i]:bounds[i + 1]]) for i in range(n)]
+
+
+def write_input(path: Path, layout: str, num_rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_rows, CHUNK):
+        n = min(CHUNK, num_rows - start)
+        features = {
+            name: rng.random(n).round(3)
+            for name in ("danceability", "energy", "speechiness", "acousticness",
+                         "instrumentalness", "liveness", "valence")
+        }
+        features["energy"][rng.random(n) < 0.01] = 1.0
+        features["danceability"][rng.random(n) < 0.01] = 0.0
+        titles = names(rng, "Song", n, 50000)
+        titles[rng.random(n) < 0.01] = 'Live, "Unplugged"\nPart 2'
+        if layout == "kaggle":
+            artists = credits(rng, n, ";")
+            for row in np.flatnonzero(rng.random(n) < 0.001):
+                artists[row] = rng.choice([" ", "nan", None])
+            df = pd.DataFrame({
+                "": np.arange(start, start + n),
+                "track_id": [f"k{i:021d}" for i in range(start, start + n)],
+                "artists": artists,
+                "album_name": names(rng, "Album", n, 20000),
+                "track_name": titles,
+                "popularity": rng.integers(0, 101, n),
+                "duration_ms": rng.integers(30000, 600000, n),
+                "explicit": rng.random(n) < 0.1,
+                "danceability": features["danceability"],
+                "energy": features["energy"],
+                "key": rng.integers(0, 12, n),
+                "loudness": (-30 * rng.random(n)).round(3),
+                "mode": rng.integers(0, 2, n),
+                "speechiness": features["speechiness"],
+                "acousticness": features["acousticness"],
+                "instrumentalness": features["instrumentalness"],
+                "liveness": features["liveness"],
+                "valence": features["valence"],
+                "tempo": (60 + 140 * rng.random(n)).round(3),
+                "time_signature": rng.integers(3, 6, n),
+                "track_genre": names(rng, "genre", n, 100),
+            })
+        else:
+            genres = credits(rng, n, ", ", pool=300)
+            for row in np.flatnonzero(rng.random(n) < 0.2):
+                genres[row] = None
+            followers = rng.integers(0, 10**6, n).astype(float)
+            # Missing in the first block only: integers elsewhere
+            if start == 0:
+                followers[rng.random(n) < 0.01] = np.nan
+            artist_popularity = rng.integers(0, 101, n).astype(float)
+            artist_popularity[rng.random(n) < 0.01] = np.nan
+            for name in ("valence", "liveness"):
+                features[name][rng.random(n) < 0.005] = np.nan
+            df = pd.DataFrame({
+                "track_id": [f"c{i:021d}" for i in range(start, start + n)],
+                "artists": credits(rng, n, ", "),
+                "album_name": names(rng, "Album", n, 20000),
+                "release_date": [f"{1960 + i % 64}-01-01" for i in range(n)],
+                "album_image_url": "http://img",
+                "track_name": titles,
+                "popularity": rng.integers(0, 101, n),
+                "duration_ms": rng.integers(30000, 600000, n),
+                "explicit": rng.random(n) < 0.1,
+                "available_markets": "US, GB",
+                "track_external_url": "http://t",
+                "track_genre": genres,
+                "artist_popularity": artist_popularity,
+                "artist_followers": pd.array(followers, dtype="Int64"),
+                "artist_image_url": "http://a",
+                "artist_external_url": "http://ae",
+                **{name: features[name] for name in ("danceability", "energy")},
+                "key": rng.integers(0, 12, n),
+                "loudness": (-30 * rng.random(n)).round(3),
+                "mode": rng.integers(0, 2, n),
+                **{name: features[name] for name in (
+                    "speechiness", "acousticness", "instrumentalness", "liveness", "valence")},
+                "tempo": (60 + 140 * rng.random(n)).round(3),
+            })
+            # Rows collected twice, far apart
+            repeats = n // 100
+            df.iloc[-repeats:] = df.iloc[:repeats].to_numpy()
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def notebook_clean(layout: str, input_path: Path, output_path: Path) -> None:
+    NOTEBOOKS[layout](pd.read_csv(input_path)).to_csv(output_path, index=False)
+
+
+def child(mode: str, layout: str, input_path: Path, output_path: Path) -> None:
+    start = time.perf_counter()
+    if mode == "notebook":
+        notebook_clean(layout, input_path, output_path)
+    else:
+        clean_file(str(input_path), str(output_path), layout, workers=int(mode))
+    print(json.dumps({"seconds": time.perf_counter() - start, "rss": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, layout, input_path, output_path = args.child
+        child(mode, layout, Path(input_path), Path(output_path))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for layout in FORMATS:
+            sample = tmp / f"{layout}_sample.csv"
+            write_input(sample, layout, args.sample)
+            notebook_clean(layout, sample, tmp / "notebook.csv")
+            clean_file(str(sample), str(tmp / "chunked.csv"), layout,
+                       workers=2, chunk_bytes=64 << 10)
+            identical = filecmp.cmp(tmp / "notebook.csv", tmp / "chunked.csv", shallow=False)
+            print(f"{layout}: {args.sample}-row sample identical to the notebook: {identical}")
+
+            full = tmp / f"{layout}.csv"
+            write_input(full, layout, args.rows)
+            print(f"{'path':>14} {'seconds':>8} {'peak RSS MiB':>13}   "
+                  f"({args.rows} rows, {full.stat().st_size / 2**20:.0f} MiB)")
+            for mode in ["notebook"] + [str(w) for w in args.workers]:
+                result = json.loads(subprocess.run(
+                    [sys.executable, __file__, "--child", mode, layout,
+                     str(full), str(tmp / "out.csv")],
+                    check=True, capture_output=True, text=True,
+                ).stdout)
+                label = mode if mode == "notebook" else f"{mode} workers"
+                print(f"{label:>14} {result['seconds']:>8.1f} {result['rss']:>13.0f}")
+            full.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Collector restarts with and without the on-disk seen-set and artist cache.
+
+Two consecutive runs against the mock API, as after a restart, each
+collecting ``--tracks`` tracks from a catalog of ``--catalog`` tracks so that
+random queries overlap. Without the cache the second run re-downloads tracks
+the first already has; with it they are skipped before any features request
+and artists come from disk.
+
+    python benchmarks/collector_restart.py --tracks 10000 --catalog 40000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from collector_cache import CollectorCache  # noqa: E402
+from mock_spotify import MockSpotify  # noqa: E402
+from spotify_collector import SpotifyClient, TrackCollector  # noqa: E402
+
+
+async def run(mock: MockSpotify, credentials, num_tracks: int, cache, collected: set):
+    served_before = mock.requests["total"] - mock.requests["429"]
+    async with SpotifyClient(
+        credentials, mock.api_url, mock.token_url, rate=mock.rate, burst=mock.burst
+    ) as client:
+        ids = [
+            row["track_id"]
+            async for row in TrackCollector(client, cache=cache).collect(num_tracks)
+        ]
+    if cache is not None:
+        cache.mark_seen(ids)
+    served = mock.requests["total"] - mock.requests["429"] - served_before
+    repeats = sum(track_id in collected for track_id in ids)
+    collected.update(ids)
+    return served, repeats, client.stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--catalog", type=int, default=40000)
+    parser.add_argument("--keys", type=int, default=2)
+    args = parser.parse_args()
+    credentials = [(f"client{i}", f"secret{i}") for i in range(args.keys)]
+
+    print(f"{args.tracks} tracks per run from a {args.catalog}-track catalog")
+    print(f"{'setup':>8} {'run':>4} {'requests':>9} {'re-downloaded':>14} "
+          f"{'skipped':>8} {'cached artists':>15} {'saved':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cache in (
+            ("no cache", None),
+            ("cache", CollectorCache(str(Path(tmp) / "cache.db"))),
+        ):
+            random.seed(0)
+            collected = set()
+            async with MockSpotify(rate=50, burst=50, latency=0.02,
+                                   tracks=args.catalog) as mock:
+                for run_number in (1, 2):
+                    served, repeats, stats = await run(
+                        mock, credentials, args.tracks, cache, collected
+                    )
+                    print(f"{name:>8} {run_number:>4} {served:>9} {repeats:>14} "
+                          f"{stats.duplicate_tracks:>8} {stats.cached_artists:>15} "
+                          f"{stats.saved_requests:>6}")
+            if cache is not None:
+                cache.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""Killing and resuming the SQLite collector, and its memory over run length.
+
+A collector process writing through ``collector_sink`` is SIGKILLed partway
+through a run against the mock API, then the run is resumed from the
+database's checkpoint. Every search page before the final checkpoint must
+have all its tracks stored, and ``tracks`` must hold exactly as many rows as
+the checkpoint counts. Then fresh runs of growing length report their peak
+RSS, which should stay flat.
+
+    python benchmarks/collector_resume.py --tracks 20000
+"""
+import argparse
+import asyncio
+import itertools
+import resource
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from collector_sink import CollectorSink, collect_to_sqlite  # noqa: E402
+from mock_spotify import MockSpotify  # noqa: E402
+from spotify_collector import SEARCH_LIMIT, SpotifyClient, search_pages  # noqa: E402
+
+CREDENTIALS = [("client0", "secret0"), ("client1", "secret1")]
+
+
+async def collect(api_url: str, token_url: str, db: str, tracks: int, rate: float):
+    sink = CollectorSink(db)
+    try:
+        async with SpotifyClient(
+            CREDENTIALS, api_url, token_url, rate=rate, burst=rate
+        ) as client:
+            await collect_to_sqlite(client, sink, tracks)
+    finally:
+        sink.close()
+
+
+def child(args) -> None:
+    asyncio.run(collect(args.api_url, args.token_url, args.db, args.tracks, args.rate))
+    # ru_maxrss is in KiB on Linux
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)
+
+
+async def spawn(mock: MockSpotify, db: str, tracks: int, rate: float):
+    return await asyncio.create_subprocess_exec(
+        sys.executable, __file__, "--child", "--db", db, "--tracks", str(tracks),
+        "--rate", str(rate), "--api-url", mock.api_url, "--token-url", mock.token_url,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+
+def stored(db: str) -> int:
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+
+async def kill_and_resume(mock: MockSpotify, db: str, tracks: int, rate: float) -> None:
+    process = await spawn(mock, db, tracks, rate)
+    while not Path(db).exists() or stored(db) < tracks // 3:
+        await asyncio.sleep(0.2)
+    process.send_signal(signal.SIGKILL)
+    await process.wait()
+    sink = CollectorSink(db)
+    seed, position, counted = sink.checkpoint()
+    sink.close()
+    print(f"killed at {stored(db)} tracks; checkpoint: page {position}, "
+          f"{counted} tracks")
+
+    start = time.perf_counter()
+    await collect(mock.api_url, mock.token_url, db, tracks - counted, rate)
+    sink = CollectorSink(db)
+    seed, position, counted = sink.checkpoint()
+    sink.close()
+    print(f"resumed to {stored(db)} tracks in {time.perf_counter() - start:.1f}s; "
+          f"checkpoint: page {position}, {counted} tracks")
+
+    with sqlite3.connect(db) as conn:
+        ids = {track_id for track_id, in conn.execute("SELECT track_id FROM tracks")}
+    missing = 0
+    for query, offset in itertools.islice(search_pages(seed, 0), position):
+        page_ids, _ = mock.search_ids(query, offset, SEARCH_LIMIT)
+        missing += sum(track_id not in ids for track_id in page_ids)
+    print(f"tracks of checkpointed pages missing: {missing}; "
+          f"rows match checkpoint: {len(ids) == counted}")
+
+
+async def main(args):
+    async with MockSpotify(rate=args.rate, burst=args.rate, latency=0.02) as mock:
+        with tempfile.TemporaryDirectory() as tmp:
+            await kill_and_resume(mock, str(Path(tmp) / "resume.db"), args.tracks, args.rate)
+
+            print(f"\n{'tracks':>8} {'seconds':>8} {'peak RSS MiB':>13}")
+            for length in (args.tracks // 4, args.tracks, 2 * args.tracks):
+                start = time.perf_counter()
+                process = await spawn(mock, str(Path(tmp) / f"run{length}.db"),
+                                      length, args.rate)
+                peak, _ = await process.communicate()
+                print(f"{length:>8} {time.perf_counter() - start:>8.1f} "
+                      f"{int(peak):>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--token-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,127 @@
+"""Collector throughput against a rate-limited mock of the Spotify API.
+
+``legacy`` is the loop of ``SongcollectionUpdated``: credentials in turn,
+one 5-track search each, every track's audio features and artist fetched
+concurrently with ``asyncio.sleep(1)`` after each, sleeping out 429s.
+``collector`` is ``spotify_collector.TrackCollector``, which fetches
+features and artists through the bulk endpoints, once at the server's
+per-key rate and once with buckets set 25% above it, so Retry-After has to
+slow it down. The mock allows ``--rate`` requests per second per key. The
+legacy loop collects fewer tracks, as it is far slower.
+
+    python benchmarks/collector_throughput.py --tracks 20000 --keys 2
+"""
+import argparse
+import asyncio
+import base64
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from mock_spotify import MockSpotify, requests_per_track  # noqa: E402
+from spotify_collector import (  # noqa: E402
+    SpotifyClient, TrackCollector, artist_metadata, track_row,
+)
+
+
+async def legacy(mock: MockSpotify, credentials, num_tracks: int) -> int:
+    async def get(session, url, token, params=None, retry=True):
+        while True:
+            async with session.get(
+                url, headers={"Authorization": f"Bearer {token}"}, params=params
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status == 429 and retry:
+                    await asyncio.sleep(int(response.headers.get("Retry-After", 30)))
+                    continue
+                return None
+
+    async def combined(session, track, token):
+        features = await get(
+            session, f"{mock.api_url}/audio-features/{track['id']}", token, retry=False
+        )
+        row = None
+        if features:
+            artist = await get(
+                session, f"{mock.api_url}/artists/{track['artists'][0]['id']}", token
+            )
+            row = track_row(track, features, artist_metadata(artist))
+        await asyncio.sleep(1)
+        return row
+
+    async with aiohttp.ClientSession() as session:
+        tokens = []
+        for client_id, secret in credentials:
+            basic = base64.b64encode(f"{client_id}:{secret}".encode()).decode()
+            async with session.post(
+                mock.token_url, headers={"Authorization": f"Basic {basic}"},
+                data={"grant_type": "client_credentials"},
+            ) as response:
+                tokens.append((await response.json())["access_token"])
+        collected = 0
+        while collected < num_tracks:
+            for token in tokens:
+                query = "".join(
+                    random.choice(string.ascii_lowercase)
+                    for _ in range(random.randint(3, 5))
+                )
+                result = await get(
+                    session, f"{mock.api_url}/search", token,
+                    {"q": query, "type": "track", "limit": 5},
+                )
+                tracks = result["tracks"]["items"] if result else []
+                rows = await asyncio.gather(*(combined(session, t, token) for t in tracks))
+                collected += sum(row is not None for row in rows)
+    return collected
+
+
+async def collector(mock: MockSpotify, credentials, num_tracks: int, rate: float) -> int:
+    async with SpotifyClient(
+        credentials, mock.api_url, mock.token_url, rate=rate, burst=mock.burst
+    ) as client:
+        return len([row async for row in TrackCollector(client).collect(num_tracks)])
+
+
+async def run(name: str, args, credentials, collect) -> None:
+    async with MockSpotify(rate=args.rate, burst=args.rate, latency=args.latency) as mock:
+        start = time.perf_counter()
+        tracks = await collect(mock)
+        seconds = time.perf_counter() - start
+        print(f"{name:>22} {tracks:>7} {seconds:>8.1f} {tracks / seconds:>9.1f} "
+              f"{requests_per_track(mock, tracks):>9.2f} {mock.requests['429']:>6}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=20000)
+    parser.add_argument("--legacy-tracks", type=int, default=300)
+    parser.add_argument("--keys", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    random.seed(0)
+    credentials = [(f"client{i}", f"secret{i}") for i in range(args.keys)]
+
+    print(f"mock: {args.keys} keys at {args.rate:g} requests/s each, "
+          f"{args.latency * 1000:.0f} ms latency")
+    print(f"{'path':>22} {'tracks':>7} {'seconds':>8} {'tracks/s':>9} "
+          f"{'req/track':>9} {'429s':>6}")
+    await run("legacy", args, credentials,
+              lambda mock: legacy(mock, credentials, args.legacy_tracks))
+    await run("collector", args, credentials,
+              lambda mock: collector(mock, credentials, args.tracks, args.rate))
+    await run("collector, rate +25%", args, credentials,
+              lambda mock: collector(mock, credentials, args.tracks, 1.25 * args.rate))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+"""Loading the normalized CSVs: notebook ``to_sql`` vs. the ``etl`` module.
+
+Writes the six CSVs ``prepare_data.ipynb`` produces for a synthetic catalog
+of ``--tracks`` tracks, then loads them in a fresh process per path:
+``notebook`` replays ``prepare_data.ipynb``: each whole CSV through
+``to_sql`` under default PRAGMAs, the pandas artist and genre profiles, then
+the gzip cell. ``etl`` is ``etl.run_etl``: chunked ``executemany`` with the
+PRAGMAs off, indexes and SQL profiles after the load, then the gzip asset.
+Reports each step's time and the peak RSS of each process.
+
+    python benchmarks/etl_load.py --tracks 1000000
+"""
+import argparse
+import gzip
+import json
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from etl import TABLE_COLUMNS, peak_rss_mb, run_etl  # noqa: E402
+
+CHUNK = 200_000
+GENRES = np.array(["pop", "rock", "hip hop", "jazz", "classical", "edm", "folk", "metal"])
+
+
+def write_csvs(csv_dir: Path, num_tracks: int) -> None:
+    rng = np.random.default_rng(0)
+    num_artists, num_albums = num_tracks // 5, num_tracks // 10
+    pd.DataFrame({
+        "album_id": np.arange(1, num_albums + 1),
+        "album_name": [f"Album {i}" for i in range(num_albums)],
+        "release_date": [f"{1960 + i % 64}-01-01" for i in range(num_albums)],
+        "album_image_url": "http://img",
+    }).to_csv(csv_dir / "albums.csv", index=False)
+    artist_ids = [f"{i:032x}" for i in range(num_artists)]
+    pd.DataFrame({
+        "artist_id": artist_ids,
+        "artist_name": [f"Artist {i}" for i in range(num_artists)],
+        "artist_popularity": rng.random(num_artists).round(2),
+        "artist_followers": rng.integers(0, 10**6, num_artists),
+        "artist_image_url": "http://a",
+        "artist_external_url": "http://ae",
+    }).to_csv(csv_dir / "artists.csv", index=False)
+
+    for start in range(0, num_tracks, CHUNK):
+        n = min(CHUNK, num_tracks - start)
+        ids = [f"t{i:021d}" for i in range(start, start + n)]
+        header = start == 0
+        write = dict(mode="w" if header else "a", header=header, index=False)
+        duration = rng.integers(120000, 360000, n)
+        pd.DataFrame({
+            "track_id": ids,
+            "track_name": [f"Song {i}" for i in range(start, start + n)],
+            "popularity": rng.random(n).round(2),
+            "duration_ms": duration,
+            "explicit": rng.integers(0, 2, n),
+            "track_external_url": "http://t",
+            "uri": [f"spotify:track:{i}" for i in ids],
+            "album_id": rng.integers(1, num_albums + 1, n),
+        }).to_csv(csv_dir / "tracks.csv", **write)
+        pd.DataFrame({
+            "track_id": ids,
+            "artist_id": np.array(artist_ids)[rng.integers(0, num_artists, n)],
+        }).to_csv(csv_dir / "track_artists.csv", **write)
+        pd.DataFrame({
+            "track_id": ids, "track_genre": GENRES[rng.integers(0, len(GENRES), n)],
+        }).to_csv(csv_dir / "track_genres.csv", **write)
+        features = {"track_id": ids}
+        for name in TABLE_COLUMNS["track_features"][1:]:
+            features[name] = rng.random(n)
+        features.update(
+            key=rng.integers(0, 12, n), mode=rng.integers(0, 2, n),
+            acousticness=rng.integers(0, 2, n), instrumentalness=rng.integers(0, 2, n),
+            liveness=rng.integers(0, 2, n), loudness=-30 * rng.random(n),
+            tempo=60 + 140 * rng.random(n), duration_minutes=(duration / 60000).round(2),
+        )
+        pd.DataFrame(features).to_csv(csv_dir / "track_features.csv", **write)
+
+
+def notebook_load(csv_dir: Path, db_path: Path) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    for table in TABLE_COLUMNS:
+        pd.read_csv(csv_dir / f"{table}.csv").to_sql(
+            table, conn, if_exists="replace", index=False
+        )
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mode = lambda x: x.mode().iloc[0]  # noqa: E731
+    aggregations = {
+        "danceability": "mean", "energy": "mean", "loudness": "mean",
+        "speechiness": "mean", "acousticness": mode, "instrumentalness": mode,
+        "liveness": mode, "valence": "mean", "tempo": "mean",
+    }
+    track_features = pd.read_csv(csv_dir / "track_features.csv")
+    for table, key in (("track_artists", "artist_id"), ("track_genres", "track_genre")):
+        members = pd.read_csv(csv_dir / f"{table}.csv").merge(track_features, on="track_id")
+        profiles = members.groupby(key).agg(aggregations).reset_index()
+        profiles.to_sql(
+            "artist_profiles" if key == "artist_id" else "genre_profiles",
+            conn, if_exists="replace", index=False,
+        )
+    conn.commit()
+    conn.close()
+    timings["profiles"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(db_path, "rb") as db_file:
+        with gzip.open(f"{db_path}.gz", "wb") as compressed_file:
+            shutil.copyfileobj(db_file, compressed_file)
+    timings["gzip"] = time.perf_counter() - start
+    return timings
+
+
+def child(mode: str, csv_dir: Path, db_path: Path) -> None:
+    if mode == "notebook":
+        timings = notebook_load(csv_dir, db_path)
+    else:
+        steps = run_etl(csv_dir, db_path)
+        timings = {
+            "load": sum(v for k, v in steps.items() if k.startswith("load ")),
+            "profiles": steps["indexes"] + steps["profiles"],
+            "gzip": steps["gzip"],
+        }
+    print(json.dumps({**timings, "rss": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, csv_dir, db_path = args.child
+        child(mode, Path(csv_dir), Path(db_path))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        start = time.perf_counter()
+        write_csvs(tmp, args.tracks)
+        size = sum(p.stat().st_size for p in tmp.glob("*.csv")) / 2**20
+        print(f"{args.tracks} tracks, {size:.0f} MiB of CSV "
+              f"(written in {time.perf_counter() - start:.0f}s)")
+        print(f"{'path':>9} {'load s':>7} {'indexes+profiles s':>19} {'gzip s':>7} "
+              f"{'total s':>8} {'peak RSS MiB':>13} {'db MiB':>7}")
+        for mode in ("notebook", "etl"):
+            db_path = tmp / f"{mode}.db"
+            result = json.loads(subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(tmp), str(db_path)],
+                check=True, capture_output=True, text=True,
+            ).stdout)
+            total = result["load"] + result["profiles"] + result["gzip"]
+            print(f"{mode:>9} {result['load']:>7.1f} {result['profiles']:>19.1f} "
+                  f"{result['gzip']:>7.1f} {total:>8.1f} {result['rss']:>13.0f} "
+                  f"{db_path.stat().st_size / 2**20:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
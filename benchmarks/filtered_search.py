@@ -0,0 +1,122 @@
+"""Range-filtered recommendations: post-filtering a full scan vs. index pruning.
+
+Top 15 artists near one preference vector among those passing a popularity
+band, a track length window and optionally a genre, from selective to barely
+selective filters. ``scan`` scores every artist, then evaluates each filter
+over the whole catalog and drops the misses; ``index`` resolves the filters
+from the snapshot's sorted range indexes first and scores only the
+survivors; ``sql`` is the no-snapshot fallback (``Database.filter_artist_rows``).
+
+    python benchmarks/filtered_search.py --db src/assets/music_data.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import (  # noqa: E402
+    PROFILE_FEATURES,
+    Database,
+    artist_feature_matrix,
+    top_k_positions,
+)
+from models import RecommendationFilters, UserPreferences  # noqa: E402
+
+SCENARIOS = {
+    "unselective": dict(popularity_range=(5, 100), duration_range=(1.0, np.inf)),
+    "popularity band": dict(popularity_range=(40, 60)),
+    "length window": dict(duration_range=(3.0, 3.5)),
+    "selective": dict(popularity_range=(90, 100), duration_range=(2.0, 2.5)),
+    "genre + selective": dict(popularity_range=(80, 100), duration_range=(2.0, 2.5)),
+}
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", type=int, default=15)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = snapshot.artist_profiles
+    features = artist_feature_matrix(profiles)
+    preferences = UserPreferences(danceability=0.8, energy=0.7, valence=0.6)
+    vector = np.array(
+        [getattr(preferences, f) for f in PROFILE_FEATURES], dtype=np.float32
+    )
+    popularity = snapshot.popularity_index.values
+    pair_durations = snapshot.track_durations[snapshot.artist_track_rows]
+    pair_artists = np.repeat(
+        np.arange(len(profiles)), np.diff(snapshot.artist_track_offsets)
+    )
+    genre = snapshot.genre_names.iloc[0]
+
+    def scan(filters: RecommendationFilters) -> np.ndarray:
+        similarities = 1 / (1 + np.linalg.norm(features - vector, axis=1))
+        keep = np.ones(len(profiles), dtype=bool)
+        if filters.genre is not None:
+            keep &= np.isin(
+                np.arange(len(profiles)), snapshot.genre_artist_rows(filters.genre)
+            )
+        if filters.popularity_range is not None:
+            low, high = filters.popularity_range
+            keep &= (popularity >= low) & (popularity <= high)
+        if filters.duration_range is not None:
+            low, high = filters.duration_range
+            in_window = np.zeros(len(profiles), dtype=bool)
+            in_window[pair_artists[
+                (pair_durations >= low) & (pair_durations <= high)
+            ]] = True
+            keep &= in_window
+        similarities[~keep] = -np.inf
+        top = top_k_positions(similarities, args.k)
+        top = top[np.isfinite(similarities[top])]
+        return profiles.iloc[top].index.to_numpy()
+
+    def pruned(filters: RecommendationFilters, candidate_rows) -> np.ndarray:
+        return database.find_top_k_artists(
+            profiles, preferences, k=args.k, candidate_rows=candidate_rows(filters)
+        ).index.to_numpy()
+
+    def sql_rows(filters: RecommendationFilters):
+        # The SQL lookups are memoized; time the uncached queries
+        database.get_genre_artist_ids.cache_clear()
+        database.get_duration_artist_ids.cache_clear()
+        return database.filter_artist_rows(profiles, filters)
+
+    print(f"catalog: {len(profiles)} artists, {len(snapshot.track_durations)} tracks")
+    print(f"{'filters':>18} {'artists':>8} {'scan ms':>8} {'index ms':>9} "
+          f"{'sql ms':>8} {'same':>5}")
+    for label, scenario in SCENARIOS.items():
+        filters = RecommendationFilters(
+            genre=genre if label.startswith("genre") else None, **scenario
+        )
+        candidates = len(snapshot.filtered_artist_rows(filters))
+        scan_ms, scan_top = timed(lambda: scan(filters), args.repeat)
+        index_ms, index_top = timed(
+            lambda: pruned(filters, snapshot.filtered_artist_rows), args.repeat
+        )
+        sql_ms, sql_top = timed(lambda: pruned(filters, sql_rows), args.repeat)
+        same = (
+            np.array_equal(scan_top, index_top) and np.array_equal(index_top, sql_top)
+        )
+        print(f"{label:>18} {candidates:>8} {scan_ms:>8.2f} {index_ms:>9.2f} "
+              f"{sql_ms:>8.2f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
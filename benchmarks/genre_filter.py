@@ -0,0 +1,72 @@
+"""Genre-constrained recommendations: query-time SQL joins vs. the genre index.
+
+For every genre, "top 15 artists of the genre near my preferences" and the
+best song of the first of them within the genre. ``sql`` resolves the genre
+through ``track_genres`` at query time; ``index`` probes the snapshot's
+per-genre sorted row arrays and scans only those artists.
+
+    python benchmarks/genre_filter.py --db src/assets/music_data.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import Database  # noqa: E402
+from models import RecommendationFilters, UserPreferences  # noqa: E402
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = snapshot.artist_profiles
+    preferences = UserPreferences(danceability=0.8, energy=0.7, valence=0.6)
+
+    def sql_query(genre):
+        # get_genre_artist_ids is memoized; time the uncached query
+        artist_ids = Database.get_genre_artist_ids.__wrapped__(database, genre)
+        rows = np.flatnonzero(profiles["artist_id"].isin(artist_ids))
+        top = database.find_top_k_artists(
+            profiles, preferences, k=15, candidate_rows=rows
+        )
+        database._find_best_song_sql(
+            top["artist_id"].iloc[0], preferences, RecommendationFilters(genre=genre)
+        )
+
+    def index_query(genre):
+        top = database.find_top_k_artists(
+            profiles, preferences, k=15,
+            candidate_rows=snapshot.genre_artist_rows(genre),
+        )
+        database.find_best_song(
+            top["artist_id"].iloc[0], preferences, RecommendationFilters(genre=genre)
+        )
+
+    print(f"catalog: {len(profiles)} artists, {len(snapshot.genre_names)} genres")
+    print(f"{'genre':>20} {'artists':>8} {'sql ms':>9} {'index ms':>9}")
+    for genre in snapshot.genre_names:
+        members = len(snapshot.genre_artist_rows(genre))
+        sql_ms = timed(lambda: sql_query(genre), args.repeat)
+        index_ms = timed(lambda: index_query(genre), args.repeat)
+        print(f"{genre:>20} {members:>8} {sql_ms:>9.2f} {index_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
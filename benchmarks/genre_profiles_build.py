@@ -0,0 +1,83 @@
+"""Genre centroid build time: notebook pandas group-by vs. SQL aggregation.
+
+Runs on a temporary copy of the database whose track genres are reassigned
+to ``--genres`` synthetic genres, to see how both builds scale to thousands
+of genres. ``pandas`` is the ``prepare_data.ipynb`` aggregation (means plus a
+per-group ``mode()`` lambda for binary features); ``sql`` is
+``Database.build_genre_profiles`` followed by loading the ``GenreRegistry``.
+
+    python benchmarks/genre_profiles_build.py --genres 20 500 5000
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import Database  # noqa: E402
+from genre_profiles import GenreRegistry  # noqa: E402
+
+
+def notebook_build(db_path: Path) -> pd.DataFrame:
+    with sqlite3.connect(db_path) as conn:
+        genres_df = pd.read_sql_query("SELECT * FROM track_genres", conn)
+        track_features_df = pd.read_sql_query("SELECT * FROM track_features", conn)
+    genres_features_df = genres_df.merge(track_features_df, on="track_id")
+    return genres_features_df.groupby("track_genre").agg({
+        "danceability": "mean",
+        "energy": "mean",
+        "loudness": "mean",
+        "speechiness": "mean",
+        "acousticness": lambda x: x.mode().iloc[0],
+        "instrumentalness": lambda x: x.mode().iloc[0],
+        "liveness": lambda x: x.mode().iloc[0],
+        "valence": "mean",
+        "tempo": "mean",
+    }).reset_index()
+
+
+def sql_build(db_path: Path) -> GenreRegistry:
+    database = Database(db_path)
+    database.build_genre_profiles()
+    return GenreRegistry.load(database)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--genres", type=int, nargs="+", default=[20, 500, 5000])
+    args = parser.parse_args()
+
+    print(f"{'genres':>7} {'pandas s':>9} {'sql s':>7} {'registry':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "music_data.db"
+        shutil.copyfile(args.db, db_path)
+        for genres in args.genres:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(
+                    "UPDATE track_genres SET track_genre = 'genre ' || (rowid % ?)",
+                    (genres,),
+                )
+
+            start = time.perf_counter()
+            notebook_build(db_path)
+            pandas_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            registry = sql_build(db_path)
+            sql_seconds = time.perf_counter() - start
+            print(
+                f"{genres:>7} {pandas_seconds:>9.2f} {sql_seconds:>7.2f} "
+                f"{len(registry):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""Data Insights graphs: the notebook's ``generate_all_graphs`` vs. ``insight_graphs``.
+
+``notebook`` is ``prepare_data.ipynb``'s graph cell: the top artists and
+every row of their tracks read into pandas, then each graph drawn and
+written in turn. ``insight_graphs`` builds the same files from SQL
+aggregates: a full build with ``--workers`` processes (0 draws in the
+calling process), then a rebuild with nothing changed, which the manifest
+should turn into a no-op. Every figure must match the notebook's, up to
+float rounding; the network layout is seeded the same for both. Albums
+dated ``0000`` are plotted as year 0 by the notebook but have no
+``release_year``, so the yearly series leave them out.
+
+    python benchmarks/insight_graphs_build.py --db src/assets/music_data.db --workers 0 4
+"""
+import argparse
+import base64
+import math
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from insight_graphs import (  # noqa: E402
+    LAYOUT,
+    LAYOUT_SEED,
+    TASKS,
+    build_insight_graphs,
+    read_input,
+)
+
+
+# prepare_data.ipynb, cell 2 (generate_all_graphs), returning the figures. Ties
+# in popularity are broken by artist_id, as insight_graphs does; otherwise the
+# top 25 depend on the query plan
+def extract_year(date_str):
+    """Extract year from various date formats"""
+    if pd.isna(date_str):
+        return None
+    if len(str(date_str).strip()) == 4:
+        return int(date_str)
+    try:
+        return pd.to_datetime(date_str).year
+    except:  # noqa: E722
+        try:
+            year = str(date_str)[:4]
+            return int(year) if year.isdigit() else None
+        except:  # noqa: E722
+            return None
+
+
+def get_common_features(artist1_features, artist2_features, threshold=0.1):
+    """Identify common musical features between two artists"""
+    common_features = []
+    feature_names = {
+        'avg_danceability': 'Danceability',
+        'avg_energy': 'Energy',
+        'avg_acousticness': 'Acoustic',
+        'avg_instrumentalness': 'Instrumental',
+        'avg_liveness': 'Live',
+        'avg_valence': 'Mood'
+    }
+    for feat in feature_names:
+        if abs(artist1_features[feat] - artist2_features[feat]) < threshold:
+            common_features.append(feature_names[feat])
+    return ", ".join(common_features) if common_features else "Different styles"
+
+
+def generate_all_graphs(conn, output_dir):
+    import networkx as nx
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import StandardScaler
+
+    figures = {}
+
+    def save_fig(fig, filename):
+        fig.update_layout(
+            template="plotly_dark",
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            height=700
+        )
+        fig.write_html(output_dir / f"{filename}.html")
+        figures[filename] = fig
+
+    top_artists_query = """
+    WITH TopArtists AS (
+        SELECT
+            ar.artist_id,
+            ar.artist_name,
+            ar.artist_popularity/100.0 as artist_popularity,
+            ar.artist_followers,
+            ar.artist_image_url,
+            ap.danceability as avg_danceability,
+            ap.energy as avg_energy,
+            ap.acousticness as avg_acousticness,
+            ap.instrumentalness as avg_instrumentalness,
+            ap.liveness as avg_liveness,
+            ap.valence as avg_valence,
+            COUNT(DISTINCT ta.track_id) as track_count,
+            AVG(t.popularity/100.0) as avg_track_popularity
+        FROM artists ar
+        JOIN track_artists ta ON ar.artist_id = ta.artist_id
+        JOIN tracks t ON ta.track_id = t.track_id
+        JOIN artist_profiles ap ON ar.artist_id = ap.artist_id
+        GROUP BY
+            ar.artist_id, ar.artist_name, ar.artist_popularity,
+            ar.artist_followers, ar.artist_image_url, ap.danceability, ap.energy,
+            ap.acousticness, ap.instrumentalness, ap.liveness,
+            ap.valence
+        ORDER BY ar.artist_popularity DESC, ar.artist_id
+        LIMIT 25
+    )
+    SELECT * FROM TopArtists
+    """
+    top_artists_df = pd.read_sql_query(top_artists_query, conn)
+
+    tracks_query = """
+    WITH TopArtistIds AS (
+        SELECT artist_id
+        FROM artists
+        ORDER BY artist_popularity DESC, artist_id
+        LIMIT 25
+    )
+    SELECT
+        t.track_id,
+        t.track_name,
+        t.popularity/100.0 as popularity,
+        t.duration_ms/60000.0 as duration_minutes,
+        t.explicit,
+        a.release_date,
+        ar.artist_name,
+        ar.artist_popularity/100.0 as artist_popularity,
+        tf.danceability,
+        tf.energy,
+        tf.loudness,
+        tf.acousticness,
+        tf.instrumentalness,
+        tf.liveness,
+        tf.valence,
+        tf.tempo,
+        tg.track_genre
+    FROM tracks t
+    JOIN track_artists ta ON t.track_id = ta.track_id
+    JOIN artists ar ON ta.artist_id = ar.artist_id
+    JOIN albums a ON t.album_id = a.album_id
+    JOIN track_features tf ON t.track_id = tf.track_id
+    LEFT JOIN track_genres tg ON t.track_id = tg.track_id
+    WHERE ar.artist_id IN (SELECT artist_id FROM TopArtistIds)
+    """
+    tracks_df = pd.read_sql_query(tracks_query, conn)
+    tracks_df['release_year'] = tracks_df['release_date'].apply(extract_year)
+
+    feature_cols = ['avg_danceability', 'avg_energy', 'avg_acousticness',
+                    'avg_instrumentalness', 'avg_liveness', 'avg_valence']
+    features_normalized = StandardScaler().fit_transform(top_artists_df[feature_cols])
+    similarity_matrix = cosine_similarity(features_normalized)
+
+    G = nx.Graph()
+    for idx, artist in top_artists_df.iterrows():
+        G.add_node(artist['artist_name'],
+                   popularity=artist['artist_popularity'],
+                   followers=artist['artist_followers'])
+    for i in range(len(similarity_matrix)):
+        artist_i = top_artists_df['artist_name'].iloc[i]
+        similar_indices = np.argsort(similarity_matrix[i])[-4:-1]
+        for j in similar_indices:
+            artist_j = top_artists_df['artist_name'].iloc[j]
+            similarity = similarity_matrix[i][j]
+            if similarity > 0.7:
+                G.add_edge(artist_i, artist_j, weight=similarity)
+    pos = nx.spring_layout(G, k=1/np.sqrt(len(G.nodes())), iterations=50)
+
+    fig = go.Figure()
+    edge_x = []
+    edge_y = []
+    for edge in G.edges(data=True):
+        x0, y0 = pos[edge[0]]
+        x1, y1 = pos[edge[1]]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    fig.add_trace(go.Scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=1, color='rgba(150,150,150,0.5)'),
+        hoverinfo='none',
+        mode='lines'
+    ))
+    for node in G.nodes(data=True):
+        x, y = pos[node[0]]
+        artist_data = top_artists_df[top_artists_df['artist_name'] == node[0]].iloc[0]
+        fig.add_layout_image(
+            dict(
+                source=artist_data['artist_image_url'],
+                x=x, y=y, xref="x", yref="y",
+                sizex=0.15, sizey=0.15,
+                sizing="contain", opacity=1, layer="above"
+            )
+        )
+        fig.add_trace(go.Scatter(
+            x=[x], y=[y],
+            mode='markers',
+            marker=dict(size=1, opacity=0),
+            text=artist_data['artist_name'],
+            hovertext=(
+                f"Artist: {artist_data['artist_name']}<br>"
+                f"Popularity: {artist_data['artist_popularity']:.2f}<br>"
+                f"Followers: {artist_data['artist_followers']:,}<br>"
+                f"Tracks: {artist_data['track_count']}"
+            ),
+            hoverinfo='text',
+            showlegend=False
+        ))
+        fig.add_annotation(
+            x=x, y=y-0.1,
+            text=artist_data['artist_name'],
+            showarrow=False,
+            font=dict(color='white', size=10),
+            xanchor='center', yanchor='top'
+        )
+    fig.update_layout(
+        title="Artist Similarity Network<br>(Images: Artists, Connections: Musical Similarity)",
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20, l=5, r=5, t=40),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-1.5, 1.5]),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-1.5, 1.5],
+                   scaleanchor="x", scaleratio=1)
+    )
+    save_fig(fig, "artist_similarity_network")
+
+    similar_artists_table = []
+    for i in range(len(similarity_matrix)):
+        artist = top_artists_df['artist_name'].iloc[i]
+        similar_indices = np.argsort(similarity_matrix[i])[-4:-1]
+        similar_artists = top_artists_df['artist_name'].iloc[similar_indices].tolist()
+        similarity_scores = similarity_matrix[i][similar_indices].round(3)
+        for similar_artist, score in zip(similar_artists, similarity_scores):
+            similar_artists_table.append({
+                'Artist': artist,
+                'Similar Artist': similar_artist,
+                'Similarity Score': score,
+                'Features in Common': get_common_features(
+                    top_artists_df[feature_cols].iloc[i],
+                    top_artists_df[feature_cols].iloc[
+                        similar_indices[similar_artists.index(similar_artist)]]
+                )
+            })
+    similar_artists_df = pd.DataFrame(similar_artists_table)
+    fig = go.Figure(data=[go.Table(
+        header=dict(values=list(similar_artists_df.columns), fill_color='darkblue',
+                    align='left', font=dict(color='white', size=12)),
+        cells=dict(values=[similar_artists_df[col] for col in similar_artists_df.columns],
+                   fill_color='darkblue', align='left', font=dict(color='white', size=11))
+    )])
+    fig.update_layout(title="Top Similar Artists Pairs")
+    save_fig(fig, "artist_similarity_table")
+
+    fig = px.imshow(similarity_matrix, x=top_artists_df['artist_name'],
+                    y=top_artists_df['artist_name'], title="Artist Similarity Heatmap",
+                    color_continuous_scale="Viridis")
+    fig.update_layout(xaxis_tickangle=45)
+    save_fig(fig, "similarity_heatmap")
+
+    fig = px.scatter_3d(top_artists_df, x='avg_danceability', y='avg_energy',
+                        z='avg_valence', color='artist_popularity', text='artist_name',
+                        title="Artist Feature Space")
+    save_fig(fig, "feature_space_clustering")
+
+    fig = px.bar(top_artists_df, x='artist_name',
+                 y=['artist_popularity', 'avg_track_popularity'],
+                 title="Top 25 Artists: Popularity Metrics", barmode='group',
+                 labels={'artist_popularity': 'Artist Popularity',
+                         'avg_track_popularity': 'Average Track Popularity'})
+    fig.update_layout(xaxis_tickangle=45)
+    save_fig(fig, "top_artists")
+
+    fig = px.scatter(top_artists_df, x='artist_popularity', y='artist_followers',
+                     size='track_count', text='artist_name', title="Artist Success Metrics",
+                     labels={'artist_followers': 'Follower Count',
+                             'artist_popularity': 'Popularity Score',
+                             'track_count': 'Number of Tracks'})
+    fig.update_layout(yaxis_type="log")
+    save_fig(fig, "artist_success_metrics")
+
+    fig = go.Figure()
+    for _, artist in top_artists_df.head(5).iterrows():
+        fig.add_trace(go.Scatterpolar(r=[artist[col] for col in feature_cols],
+                                      theta=feature_cols, fill='toself',
+                                      name=artist['artist_name']))
+    fig.update_layout(title="Top 5 Artists Audio Features")
+    save_fig(fig, "top_artists_radar")
+
+    fig = px.violin(
+        tracks_df.melt(id_vars=['artist_name'],
+                       value_vars=['danceability', 'energy', 'valence', 'acousticness']),
+        x='variable', y='value', title="Audio Feature Distributions", box=True
+    )
+    save_fig(fig, "feature_distributions")
+
+    fig = px.scatter(tracks_df, x='energy', y='valence', color='artist_name',
+                     hover_data=['track_name'], title="Energy-Valence Distribution")
+    fig.add_hline(y=0.5, line_dash="dash")
+    fig.add_vline(x=0.5, line_dash="dash")
+    save_fig(fig, "energy_valence_quadrants")
+
+    for feature in ['danceability', 'energy', 'valence']:
+        artist_consistency = tracks_df.groupby('artist_name').agg({
+            feature: ['mean', 'std'],
+            'artist_popularity': 'first'
+        }).reset_index()
+        artist_consistency.columns = ['artist_name', f'avg_{feature}', f'{feature}_std',
+                                      'artist_popularity']
+        fig = px.scatter(artist_consistency, x=f'avg_{feature}', y=f'{feature}_std',
+                         text='artist_name', title=f"Artist {feature.title()} Consistency",
+                         color='artist_popularity')
+        save_fig(fig, f"artist_consistency_{feature}")
+
+    yearly_releases = tracks_df.groupby(['artist_name', 'release_year']).size().reset_index(
+        name='tracks')
+    fig = px.line(yearly_releases, x='release_year', y='tracks', color='artist_name',
+                  title="Artist Release Timeline")
+    save_fig(fig, "release_timeline")
+
+    yearly_popularity = tracks_df.groupby('release_year').agg({
+        'popularity': 'mean',
+        'artist_popularity': 'mean'
+    }).reset_index()
+    fig = px.line(yearly_popularity, x='release_year', y=['popularity', 'artist_popularity'],
+                  title="Popularity Trends Over Time")
+    save_fig(fig, "popularity_trends")
+
+    fig = px.violin(tracks_df, x='artist_name', y='duration_minutes',
+                    title="Track Duration Distribution", points='all')
+    fig.update_layout(xaxis_tickangle=45)
+    save_fig(fig, "duration_analysis")
+
+    explicit_stats = tracks_df.groupby(['artist_name', 'explicit']).size().unstack(fill_value=0)
+    explicit_stats['total'] = explicit_stats[0] + explicit_stats[1]
+    explicit_stats['explicit_ratio'] = explicit_stats[1] / explicit_stats['total']
+    fig = px.bar(explicit_stats.reset_index(), x='artist_name', y='explicit_ratio',
+                 title="Explicit Content Ratio by Artist")
+    fig.update_layout(xaxis_tickangle=45)
+    save_fig(fig, "explicit_content")
+
+    high_success = tracks_df[tracks_df['popularity'] > tracks_df['popularity'].quantile(0.75)]
+    success_features = ['danceability', 'energy', 'valence', 'acousticness', 'liveness']
+    success_means = high_success[success_features].mean().round(3)
+    success_stds = high_success[success_features].std().round(3)
+    fig = go.Figure(data=[
+        go.Table(
+            header=dict(values=['Feature', 'Mean', 'Standard Deviation'],
+                        fill_color='darkblue', align='left',
+                        font=dict(color='white', size=12)),
+            cells=dict(values=[success_features, success_means.values, success_stds.values],
+                       fill_color='darkblue', align='left',
+                       font=dict(color='white', size=11))
+        )
+    ])
+    fig.update_layout(title="Success Formula: Characteristics of Top Tracks", height=400)
+    save_fig(fig, "success_formula")
+
+    fig = px.box(tracks_df, x='artist_name', y='popularity',
+                 title="Track Popularity Distribution by Artist", points='all')
+    fig.update_layout(xaxis_tickangle=45)
+    save_fig(fig, "track_popularity_dist")
+    return figures
+
+
+def plain(value):
+    """Figure JSON with arrays as lists and numbers as floats."""
+    # plotly encodes numeric arrays as base64 typed arrays
+    if isinstance(value, dict) and "bdata" in value:
+        array = np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"])
+        if "shape" in value:
+            array = array.reshape([int(size) for size in str(value["shape"]).split(",")])
+        return plain(array)
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series, pd.Index)):
+        return [plain(item) for item in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    return value
+
+
+def same(a, b, tolerance: float = 1e-9) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k], tolerance) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(same(x, y, tolerance) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return (math.isnan(a) and math.isnan(b)) or math.isclose(
+            a, b, rel_tol=tolerance, abs_tol=tolerance
+        )
+    return a == b
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / "music_data.db"
+        shutil.copy(args.db, db_path)
+        # Adds release_year and the indexes, as the first build would
+        build_insight_graphs(db_path, tmp / "warmup", force=True)
+
+        notebook_dir = tmp / "notebook"
+        notebook_dir.mkdir()
+        conn = sqlite3.connect(db_path)
+        # spring_layout draws from the global state when given no seed
+        np.random.seed(LAYOUT_SEED)
+        figures, notebook_seconds = timed(lambda: generate_all_graphs(conn, notebook_dir))
+        print(f"{'path':>22} {'seconds':>8} {'graphs':>7}")
+        print(f"{'notebook':>22} {notebook_seconds:>8.2f} {len(figures):>7}")
+
+        for workers in args.workers:
+            output_dir = tmp / f"workers{workers}"
+            built, seconds = timed(lambda: build_insight_graphs(db_path, output_dir, workers))
+            print(f"{f'full, {workers} workers':>22} {seconds:>8.2f} {len(built):>7}")
+            built, seconds = timed(lambda: build_insight_graphs(db_path, output_dir, workers))
+            print(f"{f'unchanged, {workers} workers':>22} {seconds:>8.2f} {len(built):>7}")
+
+        mismatched = []
+        for task in TASKS:
+            fig = task.draw(*(read_input(str(db_path), name) for name in task.inputs))
+            fig.update_layout(**LAYOUT)
+            if not same(plain(fig.to_plotly_json()), plain(figures[task.name].to_plotly_json())):
+                mismatched.append(task.name)
+        conn.close()
+        print(f"figures matching the notebook's: {len(TASKS) - len(mismatched)} of {len(TASKS)}"
+              + (f" (differ: {', '.join(mismatched)})" if mismatched else ""))
+
+
+if __name__ == "__main__":
+    main()
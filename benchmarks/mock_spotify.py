@@ -0,0 +1,217 @@
+"""Local stand-in for the Spotify Web API, for collector benchmarks.
+
+Serves the token, search, audio-features and artists endpoints the collector
+uses, single-id and bulk (``?ids=``), from a deterministic synthetic catalog in which tracks share a limited
+pool of artists and different searches can return the same tracks. Each
+client id gets its own token bucket on the server: requests beyond it get 429
+with ``Retry-After``, like the real API. Every response is delayed by
+``latency`` seconds to stand in for the network.
+
+    async with MockSpotify(rate=20) as mock:
+        client = SpotifyClient(credentials, mock.api_url, mock.token_url)
+"""
+import asyncio
+import base64
+import hashlib
+import math
+import time
+from collections import Counter
+
+from aiohttp import web
+
+GENRES = ["pop", "rock", "hip hop", "jazz", "classical", "electronic", "folk", "metal"]
+
+
+def _number(*parts) -> int:
+    return int.from_bytes(hashlib.md5(":".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+class MockSpotify:
+    """The mock API on an ephemeral localhost port; use as an async context manager."""
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: float = 20.0,
+        latency: float = 0.02,
+        artists: int = 5000,
+        tracks: int = 1000000,
+        retry_after: int = 1,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.latency = latency
+        self.artists = artists
+        self.tracks = tracks
+        self.retry_after = retry_after
+        self.requests = Counter()
+        self._buckets = {}
+        self._tokens = {}
+        self._runner = None
+        self.base_url = None
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/api/token"
+
+    async def __aenter__(self) -> "MockSpotify":
+        app = web.Application()
+        app.router.add_post("/api/token", self.token)
+        app.router.add_get("/v1/search", self.search)
+        app.router.add_get("/v1/audio-features", self.several_audio_features)
+        app.router.add_get("/v1/audio-features/{track_id}", self.audio_features)
+        app.router.add_get("/v1/artists", self.several_artists)
+        app.router.add_get("/v1/artists/{artist_id}", self.artist)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+    def _allow(self, client_id: str) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[client_id] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+    async def _respond(self, request: web.Request, endpoint: str, body):
+        await asyncio.sleep(self.latency)
+        self.requests["total"] += 1
+        client_id = self._tokens.get(
+            request.headers.get("Authorization", "").removeprefix("Bearer ")
+        )
+        if client_id is None:
+            return web.json_response({"error": "invalid token"}, status=401)
+        if not self._allow(client_id):
+            self.requests["429"] += 1
+            return web.json_response(
+                {"error": "rate limited"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.requests[endpoint] += 1
+        return web.json_response(body() if callable(body) else body)
+
+    async def token(self, request: web.Request):
+        credentials = request.headers["Authorization"].removeprefix("Basic ")
+        client_id = base64.b64decode(credentials).decode().split(":")[0]
+        token = f"token-{client_id}-{len(self._tokens)}"
+        self._tokens[token] = client_id
+        self.requests["token"] += 1
+        return web.json_response({"access_token": token, "expires_in": 3600})
+
+    def track(self, track_id: str) -> dict:
+        number = _number(track_id)
+        artist_ids = [f"artist{(number >> (8 * i)) % self.artists:06d}" for i in range(1 + number % 2)]
+        return {
+            "id": track_id,
+            "name": f"Song {track_id[:6]}",
+            "artists": [{"id": a, "name": f"Artist {a[6:]}"} for a in artist_ids],
+            "album": {
+                "id": f"album{number % 100000:06d}",
+                "name": f"Album {number % 100000}",
+                "release_date": f"{1960 + number % 64}-01-01",
+                "images": [{"url": f"http://img/{number % 100000}"}],
+            },
+            "popularity": number % 101,
+            "duration_ms": 120000 + number % 240000,
+            "explicit": bool(number % 7 == 0),
+            "available_markets": ["US", "GB"],
+            "external_urls": {"spotify": f"http://open.spotify/track/{track_id}"},
+        }
+
+    def features(self, track_id: str) -> dict:
+        number = _number("features", track_id)
+        unit = [((number >> (6 * i)) % 64) / 63 for i in range(8)]
+        return {
+            "id": track_id,
+            "danceability": unit[0],
+            "energy": unit[1],
+            "key": number % 12,
+            "loudness": -30 * unit[2],
+            "mode": number % 2,
+            "speechiness": unit[3],
+            "acousticness": unit[4],
+            "instrumentalness": unit[5],
+            "liveness": unit[6],
+            "valence": unit[7],
+            "tempo": 60 + number % 140,
+            "duration_ms": 120000 + _number(track_id) % 240000,
+            "time_signature": 4,
+        }
+
+    def artist_json(self, artist_id: str) -> dict:
+        number = _number(artist_id)
+        return {
+            "id": artist_id,
+            "name": f"Artist {artist_id[6:]}",
+            "genres": [GENRES[number % len(GENRES)]],
+            "popularity": number % 101,
+            "followers": {"total": number % 1000000},
+            "external_urls": {"spotify": f"http://open.spotify/artist/{artist_id}"},
+            "images": [{"url": f"http://img/{artist_id}"}],
+        }
+
+    def search_ids(self, query: str, offset: int, limit: int):
+        """The ids of a search page, and the query's total."""
+        # Short queries match more tracks, like real searches do
+        total = min(1000, 10 ** max(1, 6 - len(query)))
+        ids = [
+            f"{_number('track', _number(query, position) % self.tracks):022x}"[:22]
+            for position in range(offset, min(offset + limit, total))
+        ]
+        return ids, total
+
+    async def search(self, request: web.Request):
+        query = request.query.get("q", "")
+        limit = min(int(request.query.get("limit", 20)), 50)
+        offset = int(request.query.get("offset", 0))
+        ids, total = self.search_ids(query, offset, limit)
+        return await self._respond(
+            request,
+            "search",
+            lambda: {"tracks": {"items": [self.track(i) for i in ids], "total": total}},
+        )
+
+    async def audio_features(self, request: web.Request):
+        return await self._respond(
+            request, "audio-features", self.features(request.match_info["track_id"])
+        )
+
+    async def artist(self, request: web.Request):
+        return await self._respond(
+            request, "artists", self.artist_json(request.match_info["artist_id"])
+        )
+
+    async def several_audio_features(self, request: web.Request):
+        ids = request.query.get("ids", "").split(",")[:100]
+        return await self._respond(
+            request,
+            "several audio-features",
+            lambda: {"audio_features": [self.features(i) for i in ids]},
+        )
+
+    async def several_artists(self, request: web.Request):
+        ids = request.query.get("ids", "").split(",")[:50]
+        return await self._respond(
+            request,
+            "several artists",
+            lambda: {"artists": [self.artist_json(i) for i in ids]},
+        )
+
+
+def requests_per_track(mock: MockSpotify, tracks: int) -> float:
+    """API requests (tokens and 429s excluded) per collected track."""
+    served = mock.requests["total"] - mock.requests["429"]
+    return served / tracks if tracks else math.nan
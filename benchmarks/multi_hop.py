@@ -0,0 +1,116 @@
+"""Two-hop similar artists: recomputing from scratch vs. the SQLite edge table.
+
+For random artists and a playlist of 10 other artists, the 15 artists within
+two hops, excluding the playlist, ranked by best path weight. ``recompute``
+is the no-snapshot path of ``handle_successful_match`` applied hop by hop:
+``find_top_k_artists`` over the whole catalog for the artist, then again
+for each of its neighbours outside the playlist. ``sql`` is
+``Database.find_artists_within_hops``, one query per hop over the
+``artist_edges`` table. One hop from the snapshot's
+neighbour table, what the chat shows today, is listed for reference.
+
+    python benchmarks/multi_hop.py --db src/assets/music_data.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from artist_graph import GRAPH_K  # noqa: E402
+from database import Database  # noqa: E402
+from queries import GET_NEXT_HOP  # noqa: E402
+
+K = 15
+
+
+def recompute_two_hops(
+    database: Database, profiles: pd.DataFrame, artist_row: int, excluded: set
+) -> list:
+    """Best path weight to every artist within two hops, by full scans."""
+    def neighbours(row: int) -> pd.DataFrame:
+        return database.find_top_k_artists(
+            profiles, profiles.iloc[row].to_dict(), k=GRAPH_K
+        )
+
+    row_of = pd.Series(np.arange(len(profiles)), index=profiles["artist_id"])
+    best = {}
+    for first_id, first_weight in neighbours(artist_row)["similarity"].items():
+        first_id = profiles["artist_id"].iloc[first_id]
+        # Paths do not pass through the playlist
+        if first_id in excluded:
+            continue
+        best[first_id] = max(best.get(first_id, 0), first_weight)
+        second = neighbours(int(row_of[first_id]))
+        for second_row, weight in second["similarity"].items():
+            second_id = profiles["artist_id"].iloc[second_row]
+            best[second_id] = max(best.get(second_id, 0), first_weight * weight)
+    ranked = sorted(
+        (
+            (-weight, artist_id) for artist_id, weight in best.items()
+            if artist_id not in excluded
+            and artist_id != profiles["artist_id"].iloc[artist_row]
+        )
+    )
+    return [artist_id for _, artist_id in ranked[:K]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--artists", type=int, default=10)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = snapshot.artist_profiles
+    start = time.perf_counter()
+    database.build_artist_edges()
+    with database.get_connection() as conn:
+        edges = conn.execute("SELECT COUNT(*) FROM artist_edges").fetchone()[0]
+        plan = [
+            row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + GET_NEXT_HOP, ("{}", "[]")
+            )
+        ]
+    print(f"catalog: {len(profiles)} artists; artist_edges: {edges} edges, "
+          f"built in {time.perf_counter() - start:.1f}s")
+    print("plan: " + "; ".join(plan))
+
+    rng = np.random.default_rng(0)
+    timings = {"recompute": [], "sql": [], "1 hop, table": []}
+    same = 0
+    for artist_row in rng.choice(len(profiles), args.artists, replace=False):
+        artist_id = profiles["artist_id"].iloc[artist_row]
+        playlist = set(profiles["artist_id"].iloc[
+            rng.choice(len(profiles), 10, replace=False)
+        ]) - {artist_id}
+
+        start = time.perf_counter()
+        expected = recompute_two_hops(database, profiles, artist_row, playlist)
+        timings["recompute"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        found = database.find_artists_within_hops(artist_id, 2, sorted(playlist), K)
+        timings["sql"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        snapshot.similar_artists(int(artist_row), K)
+        timings["1 hop, table"].append(time.perf_counter() - start)
+        same += found["artist_id"].tolist() == expected
+
+    print(f"\n{'path':>14} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, times in timings.items():
+        times_ms = np.array(times) * 1000
+        print(f"{name:>14} {np.percentile(times_ms, 50):>9.2f} "
+              f"{np.percentile(times_ms, 95):>9.2f}")
+    print(f"\nsql matches recompute for {same} of {args.artists} artists")
+
+
+if __name__ == "__main__":
+    main()
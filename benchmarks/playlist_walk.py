@@ -0,0 +1,108 @@
+"""Playlist recommendations by personalized PageRank over the artist graph.
+
+Random playlists of 1, 5 and 20 artists seed a random walk with restart over
+the CSR artist graph (``ArtistGraph.recommend``). Reports the graph size,
+latency and power iterations per playlist, and whether the top 15 match a
+walk run to full convergence. The snapshot's graph of ``--db`` is measured
+first, then graphs built from random profiles of ``--synthetic`` artists.
+``--networkx`` also times ``networkx.pagerank`` on the snapshot's graph,
+the library behind the models.ipynb picture.
+
+    python benchmarks/playlist_walk.py --synthetic 100000 --networkx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from artist_graph import GRAPH_K, RESTART, ArtistGraph  # noqa: E402
+from database import PROFILE_FEATURES, Database  # noqa: E402
+from similarity import neighbour_table  # noqa: E402
+
+K = 15
+PLAYLIST_SIZES = (1, 5, 20)
+
+
+def converged_top_k(graph: ArtistGraph, seeds: np.ndarray) -> np.ndarray:
+    scores, _ = graph.personalized_pagerank(seeds, tol=1e-9, max_iterations=1000)
+    eligible = np.ones(len(graph), dtype=bool)
+    eligible[seeds] = False
+    rows = np.flatnonzero(eligible & (scores > 0))
+    return rows[np.lexsort((rows, -scores[rows]))[:K]]
+
+
+def run(label: str, graph: ArtistGraph, rng, playlists: int) -> None:
+    transition = graph.transition
+    size_mb = sum(a.nbytes for a in (graph.indptr, graph.indices, graph.weights))
+    print(f"\n{label}: {len(graph)} artists, {transition.nnz} edges, "
+          f"{size_mb / 2**20:.1f} MB")
+    print(f"{'playlist':>9} {'p50 ms':>8} {'p95 ms':>8} {'iterations':>11} "
+          f"{'same top 15':>12}")
+    for size in PLAYLIST_SIZES:
+        times, iterations, same = [], [], 0
+        for _ in range(playlists):
+            seeds = rng.choice(len(graph), size, replace=False)
+            start = time.perf_counter()
+            rows, _ = graph.recommend(seeds, K)
+            times.append(time.perf_counter() - start)
+            iterations.append(graph.personalized_pagerank(seeds)[1])
+            same += np.array_equal(rows, converged_top_k(graph, seeds))
+        times_ms = np.array(times) * 1000
+        print(f"{size:>9} {np.percentile(times_ms, 50):>8.2f} "
+              f"{np.percentile(times_ms, 95):>8.2f} {np.mean(iterations):>11.1f} "
+              f"{same / playlists:>12.2f}")
+
+
+def networkx_pagerank(graph: ArtistGraph, rng, playlists: int) -> None:
+    import networkx as nx
+
+    start = time.perf_counter()
+    # Edge (i, j) with weight P[i, j]; the stored matrix is its transpose
+    nx_graph = nx.from_scipy_sparse_array(
+        graph.transition.T.tocsr(), create_using=nx.DiGraph
+    )
+    print(f"\nnetworkx graph built in {time.perf_counter() - start:.1f}s")
+    times = []
+    for _ in range(playlists):
+        seeds = rng.choice(len(graph), 5, replace=False)
+        start = time.perf_counter()
+        nx.pagerank(
+            nx_graph,
+            alpha=1 - RESTART,
+            personalization={int(seed): 1 for seed in seeds},
+            tol=1e-6,
+        )
+        times.append(time.perf_counter() - start)
+    print(f"networkx.pagerank, 5 seeds: p50 {np.median(times) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--playlists", type=int, default=30)
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[100000])
+    parser.add_argument("--networkx", action="store_true")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    snapshot = Database(args.db).get_snapshot()
+    run(f"snapshot of {Path(args.db).name}", snapshot.artist_graph, rng, args.playlists)
+    if args.networkx:
+        networkx_pagerank(snapshot.artist_graph, rng, 3)
+
+    for artists in args.synthetic:
+        features = rng.random((artists, len(PROFILE_FEATURES))).astype(np.float32)
+        start = time.perf_counter()
+        graph = ArtistGraph.from_neighbours(*neighbour_table(features, GRAPH_K))
+        print(f"\nbuilt a {GRAPH_K}-neighbour graph of {artists} random artists "
+              f"in {time.perf_counter() - start:.1f}s")
+        run("synthetic", graph, rng, args.playlists)
+
+
+if __name__ == "__main__":
+    main()
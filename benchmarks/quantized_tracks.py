@@ -0,0 +1,136 @@
+"""Quantized (uint8) track features: memory and ranking agreement vs. float.
+
+The snapshot keeps the normalized track feature matrix both as float32 and
+as uint8 codes with a per-feature scale and offset. For random preference
+vectors, the 10 nearest tracks of the whole catalog are found by a float32
+scan, by a scan of the codes alone (``uint8``) and by a scan of the codes
+with exact re-ranking of the tracks that could still place (``uint8 +
+rerank``, ``RecommendationSnapshot.scan_tracks``). Agreement is measured
+against the float scan: overlap of the top 10, identical ranked lists, and
+the largest distance error against the bound the codes guarantee. Last,
+each search path runs the same queries in a fresh process, which reports
+how much of each mapped matrix it left resident (Linux ``smaps``):
+``scan_tracks`` reads its re-ranked rows from the file, so only the codes
+should be.
+
+    python benchmarks/quantized_tracks.py --db src/assets/music_data.db
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import BINARY_FEATURES, SONG_FEATURES, Database  # noqa: E402
+
+K = 10
+
+
+def float_top_k(features: np.ndarray, query: np.ndarray) -> np.ndarray:
+    distances = np.linalg.norm(features - query, axis=1)
+    candidates = np.argpartition(distances, K - 1)[:K]
+    return candidates[np.lexsort((candidates, distances[candidates]))]
+
+
+def mapped_mb(file_name: str) -> float:
+    """Resident MiB of this process's mappings of ``file_name``."""
+    total, mapping = 0, None
+    with open("/proc/self/smaps", encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if "-" in fields[0] and len(fields) >= 6:
+                mapping = fields[-1]
+            elif fields[0] == "Rss:" and mapping and mapping.endswith(file_name):
+                total += int(fields[1])
+    return total / 1024
+
+
+def child(db_path: str, path: str, queries: np.ndarray) -> None:
+    snapshot = Database(db_path).get_snapshot()
+    search = snapshot.scan_tracks if path == "scan_tracks" else snapshot.best_tracks
+    for query in queries:
+        search(query, K)
+    print(json.dumps({
+        "float32": mapped_mb("track_features.npy"),
+        "uint8": mapped_mb("track_codes.npy"),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.random((args.queries, len(SONG_FEATURES))).astype(np.float32)
+    binary = [SONG_FEATURES.index(feature) for feature in BINARY_FEATURES]
+    queries[:, binary] = np.round(queries[:, binary])
+    if args.child:
+        child(args.db, args.child, queries)
+        return
+
+    snapshot = Database(args.db).get_snapshot()
+    features = np.asarray(snapshot.track_features)
+    quantized = snapshot.quantized_tracks
+    n, d = features.shape
+    print(f"catalog: {n} tracks x {d} features")
+    print(f"  float64 (SQLite/pandas) {n * d * 8 / 2**20:>8.2f} MB")
+    print(f"  float32 (snapshot)      {features.nbytes / 2**20:>8.2f} MB")
+    print(f"  uint8 codes             {quantized.nbytes / 2**20:>8.2f} MB "
+          f"({features.nbytes / quantized.nbytes:.1f}x smaller than float32)")
+
+
+    timings = {"float32": [], "uint8": [], "uint8 + rerank": []}
+    overlap = {"uint8": [], "uint8 + rerank": []}
+    identical = {"uint8": 0, "uint8 + rerank": 0}
+    worst_error = 0.0
+    for query in queries:
+        start = time.perf_counter()
+        expected = float_top_k(features, query)
+        timings["float32"].append(time.perf_counter() - start)
+
+        for name, exact_features in (("uint8", None), ("uint8 + rerank", features)):
+            start = time.perf_counter()
+            found, _ = quantized.top_k(query, K, features=exact_features)
+            timings[name].append(time.perf_counter() - start)
+            overlap[name].append(len(np.intersect1d(found, expected)) / K)
+            identical[name] += np.array_equal(found, expected)
+
+        sample = rng.integers(0, n, 10000)
+        worst_error = max(worst_error, float(np.max(np.abs(
+            quantized.distances(query, sample)
+            - np.linalg.norm(features[sample] - query, axis=1)
+        ))))
+
+    print(f"\n{'scan':>15} {'p50 ms':>8} {'recall@10':>10} {'same list':>10}")
+    for name, times in timings.items():
+        times_ms = np.array(times) * 1000
+        recall = np.mean(overlap[name]) if name in overlap else 1.0
+        same = identical[name] / len(queries) if name in identical else 1.0
+        print(f"{name:>15} {np.percentile(times_ms, 50):>8.2f} "
+              f"{recall:>10.3f} {same:>10.3f}")
+    print(f"\nlargest distance error {worst_error:.5f} "
+          f"(bound {quantized.max_error:.5f})")
+
+    if not Path("/proc/self/smaps").exists():
+        return
+    print(f"\n{'search path':>15} {'float32 MB':>11} {'uint8 MB':>9}  resident after the queries")
+    for path in ("best_tracks", "scan_tracks"):
+        resident = json.loads(subprocess.run(
+            [sys.executable, __file__, "--db", args.db,
+             "--queries", str(args.queries), "--child", path],
+            check=True, capture_output=True, text=True,
+        ).stdout)
+        print(f"{path:>15} {resident['float32']:>11.2f} {resident['uint8']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Building a 50-song playlist: one chat click per song vs. radio mode.
+
+``clicks`` replays what ``Chatbot.handle_successful_match`` does per song:
+the best song of the clicked artist, its similar artists and the rendered
+similarity graph, then clicks the first suggested artist not yet used.
+``radio`` is ``radio.radio_playlist`` from the same seed artist, and from
+the preferences alone. Every run starts from an empty recommendation cache.
+
+    python benchmarks/radio.py --db src/assets/music_data.db --length 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from chatbot import Recommender  # noqa: E402
+from database import Database  # noqa: E402
+from models import UserPreferences  # noqa: E402
+from radio import radio_playlist  # noqa: E402
+from recommendation_cache import RecommendationCache  # noqa: E402
+
+
+def clicks(recommender: Recommender, seed_row: int, preferences, length: int) -> int:
+    profiles = recommender.artist_profiles
+    used, songs, row = set(), 0, seed_row
+    while songs < length and row is not None:
+        used.add(row)
+        song = recommender.best_song(profiles["artist_id"].iloc[row], preferences)
+        songs += song is not None
+        similar = recommender.similar_artists(row, k=15)
+        recommender.artist_graph_html(row, 15, set())
+        rows = profiles.index.get_indexer(similar.index)
+        row = next((int(r) for r in rows if r not in used), None)
+    return songs
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--length", type=int, default=50)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    profiles = database.get_snapshot().artist_profiles
+    preferences = UserPreferences(danceability=0.8, energy=0.7, valence=0.6)
+    rng = np.random.default_rng(0)
+
+    def recommender() -> Recommender:
+        return Recommender(database, profiles, RecommendationCache())
+
+    # The first graph render pays for importing pyvis
+    clicks(recommender(), 0, preferences, 1)
+    print(f"catalog: {len(profiles)} artists, {args.length}-song playlists")
+    print(f"{'seed':>12} {'clicks s':>9} {'radio s':>8} {'songs':>6} {'artists':>8}")
+    for seed_row in rng.choice(len(profiles), args.seeds, replace=False):
+        seed_row = int(seed_row)
+        click_seconds, _ = timed(
+            lambda: clicks(recommender(), seed_row, preferences, args.length)
+        )
+        radio_seconds, songs = timed(lambda: radio_playlist(
+            recommender(), preferences, args.length, seed_artist_row=seed_row
+        ))
+        print(f"{'artist ' + str(seed_row):>12} {click_seconds:>9.2f} "
+              f"{radio_seconds:>8.3f} {len(songs):>6} "
+              f"{len({song.artist_name for song in songs}):>8}")
+
+    radio_seconds, songs = timed(
+        lambda: radio_playlist(recommender(), preferences, args.length)
+    )
+    print(f"{'preferences':>12} {'':>9} {radio_seconds:>8.3f} {len(songs):>6} "
+          f"{len({song.artist_name for song in songs}):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Hit rate and latency of the shared recommendation cache on preset traffic.
+
+Simulated users pick a genre preset and nudge a few sliders by 0.01 steps,
+as the preferences panel allows, then ask for the top 15 artists. Every
+request goes through one ``RecommendationCache``, as it does across sessions
+in a Streamlit process.
+
+    python benchmarks/recommendation_cache.py --requests 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import PROFILE_FEATURES, Database  # noqa: E402
+from genre_profiles import GenreProfileManager  # noqa: E402
+from models import UserPreferences  # noqa: E402
+from recommendation_cache import (  # noqa: E402
+    RecommendationCache,
+    quantize_preferences,
+)
+
+
+def simulated_preferences(requests: int, max_nudges: int, seed: int):
+    rng = np.random.default_rng(seed)
+    presets = list(GenreProfileManager.get_profiles().values())
+    for _ in range(requests):
+        features = dict(presets[rng.integers(len(presets))].features)
+        for _ in range(rng.integers(max_nudges + 1)):
+            feature = PROFILE_FEATURES[rng.integers(len(PROFILE_FEATURES))]
+            nudged = features.get(feature, 0.5) + 0.01 * rng.integers(-3, 4)
+            features[feature] = float(np.clip(nudged, 0.0, 1.0))
+        yield UserPreferences(**features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-nudges", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = (
+        snapshot.artist_profiles if snapshot is not None
+        else database.get_artist_profiles()
+    )
+
+    def top_artists(preferences, k):
+        return database.find_top_k_artists(profiles, preferences, k=k)
+
+    def cached_top_artists(preferences, k):
+        grid, snapped = quantize_preferences(preferences)
+        return cache.get_or_compute(
+            "benchmark", ("top_artists", grid, k), lambda: top_artists(snapped, k)
+        )
+
+    cache = RecommendationCache(log_every=0)
+    uncached, cached = [], []
+    for preferences in simulated_preferences(
+        args.requests, args.max_nudges, args.seed
+    ):
+        start = time.perf_counter()
+        top_artists(preferences, 15)
+        uncached.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cached_top_artists(preferences, 15)
+        cached.append(time.perf_counter() - start)
+
+    stats = cache.stats()
+    print(f"catalog: {len(profiles)} artists, requests: {args.requests}")
+    print(f"hit rate: {stats['hit_rate']:.1%} ({stats['entries']} distinct keys)")
+    for label, times in (("uncached", uncached), ("cached", cached)):
+        times_ms = np.array(times) * 1000
+        print(
+            f"{label:>9}: mean {times_ms.mean():.3f} ms, "
+            f"p50 {np.percentile(times_ms, 50):.3f} ms, "
+            f"p99 {np.percentile(times_ms, 99):.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
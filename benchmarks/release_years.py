@@ -0,0 +1,164 @@
+"""Release years: per-row ``extract_year`` in pandas vs. the indexed SQL column.
+
+``notebook`` is ``prepare_data.ipynb``'s insights cell: read the rows, then
+``extract_year`` (``pd.to_datetime`` per value) and a pandas groupby.
+``sql`` runs on a copy of the database migrated by
+``Database.migrate_schema``, which parses ``albums.release_year`` once and
+indexes it: the same series are ``GROUP BY release_year`` queries. Timed for
+the Release Timeline and Popularity Trends graphs (top 25 artists), tracks
+per year over the whole catalog, and an era lookup (artists with a 1990s
+release). Every result must match the notebook's, as must each album's year.
+
+    python benchmarks/release_years.py --db src/assets/music_data.db
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import Database  # noqa: E402
+from queries import GET_POPULARITY_TRENDS, GET_RELEASE_TIMELINE  # noqa: E402
+
+TOP_ARTISTS = 25
+ERA = (1990, 1999)
+# Artists with a release in the years, an index range scan on release_year
+ERA_ARTIST_IDS = """
+SELECT DISTINCT ta.artist_id
+FROM albums al
+JOIN tracks t ON t.album_id = al.album_id
+JOIN track_artists ta ON ta.track_id = t.track_id
+WHERE al.release_year BETWEEN ? AND ?
+"""
+
+# prepare_data.ipynb, cell 2, with ties in popularity broken by artist_id
+TRACKS_QUERY = """
+WITH TopArtistIds AS (
+    SELECT artist_id FROM artists ORDER BY artist_popularity DESC, artist_id LIMIT 25
+)
+SELECT
+    t.track_id, t.popularity/100.0 as popularity, a.release_date,
+    ar.artist_name, ar.artist_popularity/100.0 as artist_popularity
+FROM tracks t
+JOIN track_artists ta ON t.track_id = ta.track_id
+JOIN artists ar ON ta.artist_id = ar.artist_id
+JOIN albums a ON t.album_id = a.album_id
+JOIN track_features tf ON t.track_id = tf.track_id
+LEFT JOIN track_genres tg ON t.track_id = tg.track_id
+WHERE ar.artist_id IN (SELECT artist_id FROM TopArtistIds)
+"""
+
+
+def extract_year(date_str):
+    """Extract year from various date formats"""
+    if pd.isna(date_str):
+        return None
+    if len(str(date_str).strip()) == 4:
+        return int(date_str)
+    try:
+        return pd.to_datetime(date_str).year
+    except:  # noqa: E722
+        try:
+            year = str(date_str)[:4]
+            return int(year) if year.isdigit() else None
+        except:  # noqa: E722
+            return None
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def notebook_graphs(conn):
+    tracks_df = pd.read_sql_query(TRACKS_QUERY, conn)
+    tracks_df["release_year"] = tracks_df["release_date"].apply(extract_year)
+    timeline = tracks_df.groupby(["artist_name", "release_year"]).size().reset_index(name="tracks")
+    trends = tracks_df.groupby("release_year").agg({
+        "popularity": "mean", "artist_popularity": "mean"
+    }).reset_index()
+    return timeline, trends
+
+
+def sql_graphs(conn):
+    return (
+        pd.read_sql_query(GET_RELEASE_TIMELINE, conn, params=(TOP_ARTISTS,)),
+        pd.read_sql_query(GET_POPULARITY_TRENDS, conn, params=(TOP_ARTISTS,)),
+    )
+
+
+def notebook_catalog(conn):
+    tracks = pd.read_sql_query(
+        "SELECT ta.artist_id, a.release_date FROM tracks t "
+        "JOIN albums a ON t.album_id = a.album_id "
+        "JOIN track_artists ta ON ta.track_id = t.track_id", conn
+    )
+    tracks["release_year"] = tracks["release_date"].apply(extract_year)
+    per_year = tracks.groupby("release_year").size()
+    era = set(tracks.loc[tracks["release_year"].between(*ERA), "artist_id"])
+    return per_year, era
+
+
+def sql_catalog(conn):
+    per_year = pd.read_sql_query(
+        "SELECT a.release_year, COUNT(*) AS tracks FROM tracks t "
+        "JOIN albums a ON t.album_id = a.album_id "
+        "JOIN track_artists ta ON ta.track_id = t.track_id "
+        "WHERE a.release_year IS NOT NULL GROUP BY a.release_year", conn
+    ).set_index("release_year")["tracks"]
+    era = {artist_id for artist_id, in conn.execute(ERA_ARTIST_IDS, ERA)}
+    return per_year, era
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "music_data.db"
+        shutil.copy(args.db, db_path)
+        conn = sqlite3.connect(db_path)
+        albums = pd.read_sql_query("SELECT album_id, release_date FROM albums", conn)
+        years, parse_seconds = timed(lambda: albums["release_date"].apply(extract_year))
+        _, migrate_seconds = timed(Database(db_path).migrate_schema)
+        stored = pd.read_sql_query("SELECT album_id, release_year FROM albums", conn)
+        mismatched = (
+            years.astype("Float64").fillna(-1).to_numpy()
+            != stored["release_year"].astype("Float64").fillna(-1).to_numpy()
+        ).sum()
+        print(f"{len(albums)} albums: extract_year per row {parse_seconds:.2f}s, "
+              f"SQL parse + index once {migrate_seconds:.2f}s, "
+              f"years differing: {mismatched}")
+
+        print(f"{'series':>28} {'notebook s':>11} {'sql s':>8} {'same':>5}")
+        (nb_timeline, nb_trends), nb_seconds = timed(lambda: notebook_graphs(conn))
+        (timeline, trends), sql_seconds = timed(lambda: sql_graphs(conn))
+        same = (
+            nb_timeline.astype({"release_year": int}).equals(timeline)
+            and (nb_trends.astype({"release_year": int}) - trends).abs().max().max() < 1e-9
+        )
+        print(f"{'timeline + popularity trends':>28} {nb_seconds:>11.3f} "
+              f"{sql_seconds:>8.3f} {str(same):>5}")
+
+        (nb_per_year, nb_era), nb_seconds = timed(lambda: notebook_catalog(conn))
+        (per_year, era), sql_seconds = timed(lambda: sql_catalog(conn))
+        same = (
+            nb_per_year.set_axis(nb_per_year.index.astype(int)).to_dict() == per_year.to_dict()
+            and nb_era == era
+        )
+        print(f"{'catalog per year + 1990s':>28} {nb_seconds:>11.3f} "
+              f"{sql_seconds:>8.3f} {str(same):>5}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Host memory used by artist profiles as concurrent sessions and workers grow.
+
+Each worker process simulates ``--sessions`` Streamlit sessions. In ``copy``
+mode every session loads its own frame, as ``SessionState.initialize`` used
+to; in ``shared`` mode the process attaches once to the memory-mapped
+recommendation snapshot.
+Memory is the growth in proportional set size (PSS) summed over workers, so
+pages mapped by several processes are counted once in total. Linux only.
+
+    python benchmarks/shared_profiles_memory.py --workers 1 2 4 8 --sessions 8
+"""
+import argparse
+import multiprocessing as mp
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from database import Database  # noqa: E402
+
+
+def pss_kb() -> int:
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    raise RuntimeError("PSS not available")
+
+
+def worker(mode: str, sessions: int, db_path: str, barrier, results) -> None:
+    database = Database(db_path)
+    before = pss_kb()
+    if mode == "shared":
+        shared = database.get_snapshot().artist_profiles
+        frames = [shared] * sessions
+    else:
+        frames = [
+            Database(db_path).get_artist_profiles().copy() for _ in range(sessions)
+        ]
+    for frame in frames:
+        # Fault every page in, as a similarity scan would
+        frame.select_dtypes("number").to_numpy().sum()
+    barrier.wait()  # measure while every worker holds its data
+    results.put(pss_kb() - before)
+    barrier.wait()
+
+
+def measure(mode: str, workers: int, sessions: int, db_path: str) -> float:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, sessions, db_path, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    total_kb = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    # Publish once up front so the shared runs only measure attaching
+    profiles = Database(args.db).get_snapshot().artist_profiles
+    print(f"catalog: {len(profiles)} artists, sessions per worker: {args.sessions}")
+    print(f"{'workers':>8} {'copy MiB':>10} {'shared MiB':>11}")
+    for workers in args.workers:
+        copied = measure("copy", workers, args.sessions, args.db)
+        shared = measure("shared", workers, args.sessions, args.db)
+        print(f"{workers:>8} {copied:>10.1f} {shared:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
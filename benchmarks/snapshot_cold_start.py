@@ -0,0 +1,72 @@
+"""Time-to-first-recommendation for a new process: SQLite vs. snapshot.
+
+Each mode runs in a fresh interpreter (imports excluded from the timing) and
+produces one artist top-k plus one best song, as the first chat turn does.
+``sql`` loads profiles through pandas and scores songs with the SQL join;
+``snapshot`` memory-maps the prebuilt snapshot instead.
+
+    python benchmarks/snapshot_cold_start.py --db src/assets/music_data.db
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+CHILD_SCRIPT = """
+import sys, time
+sys.path.insert(0, {src!r})
+from database import Database
+from models import UserPreferences
+import snapshot
+
+preferences = UserPreferences()
+start = time.perf_counter()
+database = Database({db!r})
+if {mode!r} == "snapshot":
+    snap = database.get_snapshot()
+    mapped = time.perf_counter() - start
+    profiles = snap.artist_profiles
+    top = database.find_top_k_artists(profiles, preferences, k=15)
+    song = database.find_best_song(top.iloc[0]["artist_id"], preferences)
+else:
+    mapped = 0.0
+    profiles = database.get_artist_profiles()
+    top = database.find_top_k_artists(profiles, preferences, k=15)
+    song = database._find_best_song_sql(top.iloc[0]["artist_id"], preferences)
+print("RESULT", time.perf_counter() - start, mapped, song.track_name)
+"""
+
+
+def first_recommendation(mode: str, db_path: str):
+    script = CHILD_SCRIPT.format(src=str(SRC_DIR), db=db_path, mode=mode)
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    line = next(
+        line for line in result.stdout.splitlines() if line.startswith("RESULT")
+    )
+    _, total, mapped, track = line.split(maxsplit=3)
+    return float(total), float(mapped), track
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The first snapshot run builds it if the database changed
+    build_total, _, _ = first_recommendation("snapshot", args.db)
+    print(f"first snapshot run (includes any rebuild): {build_total:.3f}s")
+
+    for mode in ("sql", "snapshot"):
+        runs = [first_recommendation(mode, args.db) for _ in range(args.repeat)]
+        best_total, best_mapped, track = min(runs)
+        detail = f" (attach {best_mapped:.3f}s)" if mode == "snapshot" else ""
+        print(f"{mode:>8}: {best_total:.3f}s to first recommendation{detail} -> {track}")
+
+
+if __name__ == "__main__":
+    main()
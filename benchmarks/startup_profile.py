@@ -0,0 +1,101 @@
+"""Cold-start profile for the Streamlit app.
+
+Runs the first render of ``src/app.py`` in a fresh interpreter under
+``python -X importtime`` and reports the slowest top-level imports together
+with the time-to-first-paint of a new session. ``--compare`` repeats the run
+with the heavy view modules imported up front, which is how ``app.py``
+behaved before the per-view lazy imports.
+
+    python benchmarks/startup_profile.py --compare
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Modules app.py used to import at load time, before views became lazy
+EAGER_MODULES = [
+    "plotly.graph_objects",
+    "pyvis.network",
+    "visualizations",
+    "graphs",
+]
+
+CHILD_SCRIPT = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+for name in {preload!r}:
+    __import__(name)
+from streamlit.testing.v1 import AppTest
+AppTest.from_file({app!r}, default_timeout=300).run()
+print("FIRST_PAINT", time.perf_counter() - start)
+"""
+
+
+def run_first_paint(preload: List[str]) -> Tuple[float, str]:
+    """Render the app once in a fresh interpreter, returning (seconds, importtime log)."""
+    script = CHILD_SCRIPT.format(
+        src=str(SRC_DIR), preload=preload, app=str(SRC_DIR / "app.py")
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=SRC_DIR.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    first_paint = next(
+        float(line.split()[1])
+        for line in result.stdout.splitlines()
+        if line.startswith("FIRST_PAINT")
+    )
+    return first_paint, result.stderr
+
+
+def summarize_importtime(log: str) -> Dict[str, float]:
+    """Cumulative import seconds per top-level package."""
+    totals: Dict[str, float] = defaultdict(float)
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only count the outermost ones
+        if name.startswith("  "):
+            continue
+        totals[name.strip().split(".")[0]] += int(cumulative) / 1e6
+    return dict(totals)
+
+
+def report(label: str, preload: List[str], top: int) -> float:
+    first_paint, log = run_first_paint(preload)
+    totals = summarize_importtime(log)
+    print(f"\n== {label}")
+    print(f"time to first paint: {first_paint:.2f}s")
+    print(f"total import time:   {sum(totals.values()):.2f}s")
+    for name, seconds in sorted(totals.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<28} {seconds:7.3f}s")
+    return first_paint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--compare", action="store_true",
+                        help="also profile with the heavy modules imported eagerly")
+    parser.add_argument("--top", type=int, default=15,
+                        help="number of top-level imports to list")
+    args = parser.parse_args()
+
+    lazy = report("lazy views (current)", [], args.top)
+    if args.compare:
+        eager = report("eager imports (previous app.py)", EAGER_MODULES, args.top)
+        print(f"\nfirst paint improvement: {eager - lazy:.2f}s "
+              f"({(eager - lazy) / eager:.0%})")
+
+
+if __name__ == "__main__":
+    main()
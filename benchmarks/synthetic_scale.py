@@ -0,0 +1,149 @@
+"""Synthetic catalogs: the old flat ``songs`` generator vs. ``synthetic_data``.
+
+``flat`` is the previous ``generate_synthetic_data``: every column drawn
+whole with ``np.random``, merged in pandas and written with ``to_sql``
+into one ``songs`` table the app cannot query. ``schema`` is
+``synthetic_data.generate_synthetic_data``, which streams the tracks into
+the normalized tables in chunks and builds the indexes and profiles. Each
+run is a fresh process, so its peak RSS is its own; the flat generator
+fails once its ``chr(65 + i)`` names reach the surrogates. Also reports
+the share of tracks held by the top 1% of artists, and checks that a
+second run with the same seed writes an identical file.
+
+    python benchmarks/synthetic_scale.py --tracks 10000 1000000 10000000
+"""
+import argparse
+import filecmp
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from etl import peak_rss_mb  # noqa: E402
+from synthetic_data import generate_synthetic_data  # noqa: E402
+
+
+# The previous src/synthetic_data.py, writing to db_path
+def flat_generate(db_path, num_songs=100, num_artists=25):
+    np.random.seed(42)
+
+    artist_ids = [f"artist_{i}" for i in range(num_artists)]
+    artist_names = [f"Artist {chr(65 + i)}" for i in range(num_artists)]
+    genres = ["Pop", "Rock", "Jazz", "Hip-Hop", "Classical", "Electronic", "Country"]
+    song_artist_ids = np.random.choice(artist_ids, size=num_songs)
+    song_genres = np.random.choice(genres, size=num_songs)
+    song_features = {
+        "song_id": [f"song_{i}" for i in range(num_songs)],
+        "song_name": [f"Song {i}" for i in range(num_songs)],
+        "artist_id": song_artist_ids,
+        "danceability": np.random.rand(num_songs),
+        "energy": np.random.rand(num_songs),
+        "acousticness": np.random.rand(num_songs),
+        "instrumentalness": np.random.rand(num_songs),
+        "liveness": np.random.rand(num_songs),
+        "valence": np.random.rand(num_songs),
+        "speechiness": np.random.rand(num_songs),
+        "popularity": np.random.randint(0, 100, num_songs),
+        "genre": song_genres,
+        "duration_ms": np.random.randint(180000, 300000, num_songs),
+    }
+    songs_df = pd.DataFrame(song_features)
+    artists_df = pd.DataFrame({"artist_id": artist_ids, "artist_name": artist_names})
+    songs_df = songs_df.merge(artists_df, on="artist_id")
+    conn = sqlite3.connect(db_path)
+    songs_df.to_sql("songs", conn, if_exists="replace", index=False)
+    artists_df.to_sql("artists", conn, if_exists="replace", index=False)
+    features = [
+        "danceability", "energy", "acousticness", "instrumentalness", "liveness",
+        "valence", "speechiness", "popularity", "duration_ms",
+    ]
+    artist_profiles = songs_df.groupby("artist_id")[features].mean().reset_index()
+    artist_profiles = artist_profiles.merge(artists_df, on="artist_id")
+    artist_profiles = artist_profiles[["artist_id", "artist_name"] + features]
+    artist_profiles.to_sql("artist_profiles", conn, if_exists="replace", index=False)
+    conn.close()
+
+
+def child(mode: str, num_tracks: int, db_path: Path) -> None:
+    start = time.perf_counter()
+    try:
+        if mode == "flat":
+            flat_generate(db_path, num_tracks, num_tracks // 10)
+        else:
+            generate_synthetic_data(db_path, num_tracks)
+    # Past 55,000 artists chr(65 + i) reaches the UTF-16 surrogates
+    except UnicodeEncodeError as e:
+        print(json.dumps({"error": type(e).__name__}))
+        return
+    print(json.dumps({"seconds": time.perf_counter() - start, "rss": peak_rss_mb()}))
+
+
+def top_share(db_path: Path, mode: str) -> float:
+    """Share of tracks credited to the top 1% of artists by track count."""
+    query = (
+        "SELECT COUNT(*) FROM songs GROUP BY artist_id" if mode == "flat"
+        else "SELECT COUNT(*) FROM track_artists GROUP BY artist_id"
+    )
+    with sqlite3.connect(db_path) as conn:
+        counts = np.sort([count for count, in conn.execute(query)])[::-1]
+    return counts[:max(1, len(counts) // 100)].sum() / counts.sum()
+
+
+def run(mode: str, num_tracks: int, db_path: Path) -> dict:
+    return json.loads(subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(num_tracks), str(db_path)],
+        check=True, capture_output=True, text=True,
+    ).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--flat-max", type=int, default=1_000_000,
+                        help="largest catalog to run the flat generator on")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, num_tracks, db_path = args.child
+        child(mode, int(num_tracks), Path(db_path))
+        return
+
+    print(f"{'tracks':>9} {'path':>7} {'seconds':>8} {'tracks/s':>9} {'peak RSS MiB':>13} "
+          f"{'db MiB':>7} {'top 1% share':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for num_tracks in args.tracks:
+            for mode in ("flat", "schema"):
+                if mode == "flat" and num_tracks > args.flat_max:
+                    continue
+                db_path = tmp / f"{mode}.db"
+                result = run(mode, num_tracks, db_path)
+                if "error" in result:
+                    print(f"{num_tracks:>9} {mode:>7} failed: {result['error']}")
+                    db_path.unlink(missing_ok=True)
+                    continue
+                print(f"{num_tracks:>9} {mode:>7} {result['seconds']:>8.1f} "
+                      f"{num_tracks / result['seconds']:>9.0f} {result['rss']:>13.0f} "
+                      f"{db_path.stat().st_size / 2**20:>7.0f} "
+                      f"{top_share(db_path, mode):>13.1%}")
+                db_path.unlink()
+
+        num_tracks = min(args.tracks)
+        first, second = tmp / "first.db", tmp / "second.db"
+        run("schema", num_tracks, first)
+        run("schema", num_tracks, second)
+        print(f"same seed, {num_tracks} tracks, identical files: "
+              f"{filecmp.cmp(first, second, shallow=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""First-click latency for genre presets, with and without the startup warmup.
+
+A "click" is what applying a preset and then picking its top artist costs:
+top-k artists, the recommendation graph, the artist's best song and its
+similarity graph, with the empty ``RecommendationFilters()`` a session starts
+with. ``cold`` starts from an empty cache, as the first user of a process did
+before; ``warm`` runs ``warm_recommendations`` first, and every warm lookup
+must then be a hit.
+
+    python benchmarks/warmup.py --db src/assets/music_data.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from chatbot import Recommender  # noqa: E402
+from database import Database  # noqa: E402
+from genre_profiles import GenreRegistry  # noqa: E402
+from models import RecommendationFilters  # noqa: E402
+from recommendation_cache import RecommendationCache  # noqa: E402
+from warmup import (  # noqa: E402
+    RECOMMENDATION_K,
+    warm_recommendations,
+    warmup_preferences,
+)
+
+
+def click(recommender: Recommender, preferences) -> float:
+    # What a session passes: st.session_state.recommendation_filters
+    filters = RecommendationFilters()
+    start = time.perf_counter()
+    top = recommender.top_artists(preferences, RECOMMENDATION_K, filters)
+    recommender.recommendation_graph_html(preferences, RECOMMENDATION_K, filters)
+    artist_name = top["artist_name"].iloc[0]
+    artist_row = recommender.find_artist_row(artist_name)
+    song = recommender.best_song(top["artist_id"].iloc[0], preferences, filters)
+    excluded = {song.artist_name} if song is not None else set()
+    recommender.artist_graph_html(artist_row, RECOMMENDATION_K, excluded, filters)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(SRC_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--genres", type=int, default=25)
+    parser.add_argument("--top-artists", type=int, default=50)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    snapshot = database.get_snapshot()
+    profiles = (
+        snapshot.artist_profiles if snapshot is not None
+        else database.get_artist_profiles()
+    )
+    registry = GenreRegistry.load(database)
+    presets = warmup_preferences(registry, args.genres)
+
+    cold_cache = RecommendationCache(log_every=0)
+    cold = Recommender(database, profiles, cold_cache)
+    cold_times = [click(cold, preferences) for preferences in presets.values()]
+
+    warm_cache = RecommendationCache(log_every=0)
+    summary = warm_recommendations(
+        Recommender(database, profiles, warm_cache, warming=True),
+        registry,
+        genres=args.genres,
+        top_artists=args.top_artists,
+    )
+    warm = Recommender(database, profiles, warm_cache)
+    warm_times = [click(warm, preferences) for preferences in presets.values()]
+
+    print(f"catalog: {len(profiles)} artists, presets: {len(presets)}")
+    print(
+        f"warmup: {summary['seconds']:.2f}s in the background, "
+        f"{summary['artists']} artist picks, {summary['entries']} cache entries"
+    )
+    for label, times in (("cold", cold_times), ("warm", warm_times)):
+        times_ms = np.array(times) * 1000
+        print(
+            f"{label:>5}: mean {times_ms.mean():.2f} ms, "
+            f"max {times_ms.max():.2f} ms per preset click"
+        )
+    rates = ", ".join(
+        f"{kind} {rate:.0%}" for kind, rate in sorted(warm_cache.hit_rates().items())
+    )
+    print(f"warm hit rates: {rates}")
+    misses = warm_cache.stats()["misses"]
+    if misses:
+        raise SystemExit(f"{misses} warm clicks missed the warmed cache")
+
+
+if __name__ == "__main__":
+    main()
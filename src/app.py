@@ -1,18 +1,27 @@
 # app.py
+import logging
 import time
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 from pydantic import BaseModel, Field
 
 from chatbot import Chatbot
-from database import Database
-from graphs import display_saved_graphs
-from state_management import SessionState
-from visualizations import plot_pca_visualization
+from state_management import SessionState, get_database, get_genre_registry
 from models import AudioFeature, UserPreferences, Song
-from genre_profiles import GenreProfileManager
+from warmup import start_warmup
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Snapshot builds, cache hit rates and warmup times are logged at INFO
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+for logger_name in ("snapshot", "recommendation_cache", "warmup"):
+    logging.getLogger(logger_name).setLevel(logging.INFO)
+
+# Views are rendered one at a time so that plotly, sklearn and the saved
+# graph pages are only imported once the user actually opens them.
+VIEWS = ["Chatbot", "Cluster Analysis", "Playlist Statistics", "Data Insights"]
 
 class PlaylistStats(BaseModel):
     total_songs: int
@@ -117,7 +126,9 @@ class PlaylistAnalytics:
 
     @staticmethod
     @st.cache_data
-    def create_feature_plot(feature_avgs: Dict[str, float]) -> go.Figure:
+    def create_feature_plot(feature_avgs: Dict[str, float]) -> "go.Figure":
+        import plotly.graph_objects as go
+
         return go.Figure([
             go.Bar(
                 x=list(feature_avgs.keys()),
@@ -131,6 +142,9 @@ class PlaylistAnalytics:
         )
 
 class PreferencesUI:
+    # Track length slider bounds; the upper one stands for "or longer"
+    DURATION_FILTER_MINUTES = (0.0, 10.0)
+
     @staticmethod
     @st.cache_resource
     def get_feature_configs() -> Dict[str, AudioFeature]:
@@ -192,16 +206,6 @@ class PreferencesUI:
                 default=-15.0,
                 labels=["Quiet", "Loud"],
                 description="Overall loudness of the track"
-            ),
-            "popularity": AudioFeature(
-                name="Popularity",
-                type="continuous",
-                min_value=0.0,
-                max_value=100.0,
-                step=1.0,
-                default=50.0,
-                labels=["Less Popular", "More Popular"],
-                description="Artist popularity on Spotify"
             )
         }
 
@@ -210,26 +214,75 @@ class PreferencesUI:
         """Render genre selector UI and return preferences if a genre is selected."""
         st.markdown("### 🎸 Quick Start with Genres")
         
-        # Get genre profiles
-        profiles = GenreProfileManager.get_profiles()
+        # Get genre profiles, most common genres first
+        registry = get_genre_registry()
         
         # Create genre selector
         selected_genre = st.selectbox(
             "Select a genre to set your preferences:",
-            options=list(profiles.keys()),
-            format_func=lambda x: f"{profiles[x].icon} {x}",
+            options=registry.names,
+            format_func=lambda x: f"{registry[x].icon} {x}",
             key='genre_selector'
         )
         
         if selected_genre:
-            profile = profiles[selected_genre]
+            profile = registry[selected_genre]
             st.caption(profile.description)
+
+            # Answered from the genre index, so it costs no more than a full scan
+            genre_only = profile.genre is not None and st.checkbox(
+                f"Only recommend {selected_genre} artists",
+                key="genre_only"
+            )
+            cls.update_filters(genre=profile.genre if genre_only else None)
             
             if st.button(f"Apply {selected_genre} Preferences"):
-                return UserPreferences(**profile.features)
+                return registry.preferences(selected_genre)
         
         return None
 
+    @staticmethod
+    def update_filters(**changes) -> None:
+        """Replace fields of the session's (immutable) recommendation filters."""
+        filters = st.session_state.recommendation_filters
+        if any(getattr(filters, name) != value for name, value in changes.items()):
+            st.session_state.recommendation_filters = filters.model_copy(update=changes)
+
+    @classmethod
+    def render_filters(cls, show_help: bool) -> None:
+        """Range sliders narrowing the candidates; a full range means no filter."""
+        st.markdown("### 🎚️ Filters")
+        popularity = st.slider(
+            "Artist popularity",
+            min_value=0,
+            max_value=100,
+            value=(0, 100),
+            key="popularity_filter",
+            help="Artist popularity on Spotify, 0-100" if show_help else None
+        )
+        low, high = cls.DURATION_FILTER_MINUTES
+        duration = st.slider(
+            "Track length (minutes)",
+            min_value=low,
+            max_value=high,
+            value=(low, high),
+            step=0.5,
+            key="duration_filter",
+            help=(
+                f"Recommend artists with a song of this length; {high:g} means "
+                f"{high:g} or longer" if show_help else None
+            )
+        )
+        cls.update_filters(
+            popularity_range=(
+                None if popularity == (0, 100) else tuple(map(float, popularity))
+            ),
+            duration_range=(
+                None if duration == (low, high)
+                else (duration[0], duration[1] if duration[1] < high else float("inf"))
+            ),
+        )
+
     @classmethod
     def render_preferences_ui(cls, user_preferences: UserPreferences) -> UserPreferences:
         """Render the preferences UI and return updated preferences."""
@@ -283,6 +336,8 @@ class PreferencesUI:
                 updated_values[feature_key] = value
                 st.divider()
 
+        cls.render_filters(show_help)
+
         # Return updated preferences
         return UserPreferences(**updated_values)
 
@@ -304,6 +359,19 @@ def handle_find_artists_button(chatbot: Chatbot):
             st.session_state.is_loading = False
             st.rerun()
 
+def handle_radio_button(chatbot: Chatbot):
+    playlist_count = len(st.session_state.playlist)
+    if st.button(
+        "📻 Fill with Radio",
+        key="radio_btn",
+        disabled=playlist_count >= PlaylistManager.MAX_PLAYLIST_SIZE,
+        help="Fill the playlist in one go with songs from artists similar to its last one",
+    ):
+        with st.spinner("Tuning in..."):
+            chatbot.start_radio(PlaylistManager.MAX_PLAYLIST_SIZE)
+        st.session_state.conversation_started = True
+        st.rerun()
+
 st.set_page_config(
     page_title="Personalized Spotify Playlist Generator",
     page_icon="🎵",
@@ -312,13 +380,15 @@ st.set_page_config(
 
 # Initialize components
 SessionState.initialize()
-database = Database()
+start_warmup()
+database = get_database()
 chatbot = Chatbot(database)
 
 # Sidebar
 with st.sidebar:
     with st.expander("🎵 Your Playlist", expanded=True):
         PlaylistManager.render_playlist_controls()
+        handle_radio_button(chatbot)
         
         st.text_input(
             "Search playlist",
@@ -351,9 +421,15 @@ with st.sidebar:
         handle_find_artists_button(chatbot)
 
 # Main content
-tabs = st.tabs(["Chatbot", "Cluster Analysis", "Playlist Statistics", "Data Insights"])
-
-with tabs[0]:
+active_view = st.segmented_control(
+    "View",
+    options=VIEWS,
+    default=VIEWS[0],
+    key="active_view",
+    label_visibility="collapsed"
+) or VIEWS[0]
+
+if active_view == "Chatbot":
     if st.session_state.is_loading:
         st.spinner("Processing your preferences...")
     elif st.session_state.conversation_started:
@@ -371,13 +447,15 @@ with tabs[0]:
             5. Your selected songs will appear in the playlist
             """)
 
-with tabs[1]:
+elif active_view == "Cluster Analysis":
+    from visualizations import plot_pca_visualization
+
     plot_pca_visualization(
         st.session_state.artist_profiles,
         st.session_state.user_preferences
     )
 
-with tabs[2]:
+elif active_view == "Playlist Statistics":
     st.markdown("### Playlist Statistics")
     if st.session_state.playlist:
         playlist_df = PlaylistManager.create_dataframe(st.session_state.playlist)
@@ -397,5 +475,7 @@ with tabs[2]:
     else:
         st.info("Add some songs to your playlist to see statistics!")
 
-with tabs[3]:
-    display_saved_graphs()
\ No newline at end of file
+else:
+    from graphs import display_saved_graphs
+
+    display_saved_graphs(database)
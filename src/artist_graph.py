@@ -0,0 +1,158 @@
+"""Graph-based recommendations: random walks with restart over similar artists.
+
+The artist graph links every artist to its nearest neighbours in the profile
+feature space (the snapshot's neighbour table), weighted by the similarity
+``find_top_k_artists`` reports. A personalized PageRank seeded from the
+artists already in a playlist then scores the whole catalog, so artists that
+several playlist artists lead to outrank the neighbours of any single one.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Neighbours per artist kept as graph edges, as in the models.ipynb graph
+GRAPH_K = 20
+# Probability of jumping back to the seeds at each step; walks average one
+# hop beyond them, keeping recommendations close to the playlist
+RESTART = 0.5
+# Walk mass left unspread at which the scores are considered converged
+TOLERANCE = 1e-4
+MAX_ITERATIONS = 100
+
+
+def build_artist_graph(
+    neighbour_rows: np.ndarray,
+    neighbour_distances: np.ndarray,
+    k: int = GRAPH_K,
+    epsilon: float = 1,
+) -> Dict[str, np.ndarray]:
+    """CSR arrays of the walk's transition matrix, transposed.
+
+    Each artist links to its first ``k`` neighbours with weight
+    ``1 / (epsilon + distance)``; links are made mutual (weights add where
+    both sides list each other) and each artist's out-weights are normalized
+    to one. Stored transposed, so one walk step is one CSR product.
+    """
+    from scipy.sparse import csr_matrix
+
+    n = len(neighbour_rows)
+    k = min(k, neighbour_rows.shape[1])
+    sources = np.repeat(np.arange(n, dtype=np.int32), k)
+    targets = np.asarray(neighbour_rows[:, :k]).ravel()
+    weights = 1 / (epsilon + np.asarray(neighbour_distances[:, :k]).ravel())
+    adjacency = csr_matrix(
+        (weights.astype(np.float64), (sources, targets)), shape=(n, n)
+    )
+    adjacency = (adjacency + adjacency.T).tocsr()
+    out_weights = np.asarray(adjacency.sum(axis=1)).ravel()
+    # Symmetric, so column j of the transpose is row j scaled by 1 / out_weights[j]
+    adjacency.data /= out_weights[adjacency.indices]
+    adjacency.sort_indices()
+    return {
+        "artist_graph_indptr": adjacency.indptr.astype(np.int64),
+        "artist_graph_indices": adjacency.indices.astype(np.int32),
+        "artist_graph_weights": adjacency.data.astype(np.float32),
+    }
+
+
+class ArtistGraph:
+    """Random walks with restart over the artist graph.
+
+    Wraps the arrays of ``build_artist_graph``, which may be memory-mapped.
+    The sparse matrix, and scipy with it, is only set up on the first walk.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._transition = None
+
+    @property
+    def transition(self):
+        """The transposed transition matrix, as a scipy CSR matrix."""
+        if self._transition is None:
+            from scipy.sparse import csr_matrix
+
+            n = len(self)
+            self._transition = csr_matrix(
+                (self.weights, self.indices, self.indptr), shape=(n, n)
+            )
+        return self._transition
+
+    @classmethod
+    def from_neighbours(
+        cls, neighbour_rows: np.ndarray, neighbour_distances: np.ndarray
+    ) -> "ArtistGraph":
+        arrays = build_artist_graph(neighbour_rows, neighbour_distances)
+        return cls(
+            arrays["artist_graph_indptr"],
+            arrays["artist_graph_indices"],
+            arrays["artist_graph_weights"],
+        )
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def personalized_pagerank(
+        self,
+        seed_rows: np.ndarray,
+        seed_weights: Optional[np.ndarray] = None,
+        restart: float = RESTART,
+        tol: float = TOLERANCE,
+        max_iterations: int = MAX_ITERATIONS,
+    ) -> Tuple[np.ndarray, int]:
+        """Visit probabilities of a walk that restarts at the seeds.
+
+        Sums the series ``restart * (1 - restart)^t * P^t s`` by sparse power
+        iteration. Every score only grows, by at most the walk mass still to
+        be spread, so the walk stops once that mass falls below ``tol``.
+        Returns (scores, iterations run).
+        """
+        seeds = np.zeros(len(self), dtype=np.float32)
+        np.add.at(
+            seeds,
+            np.asarray(seed_rows),
+            1 if seed_weights is None else np.asarray(seed_weights, dtype=np.float32),
+        )
+        seeds /= seeds.sum()
+
+        scores = restart * seeds
+        walk = (1 - restart) * seeds
+        iterations = 0
+        while iterations < max_iterations:
+            walk = self.transition @ walk
+            walk *= 1 - restart
+            scores += restart * walk
+            iterations += 1
+            # All that later steps can still add, over every score together
+            if float(walk.sum()) * (1 - restart) < tol:
+                break
+        return scores, iterations
+
+    def recommend(
+        self,
+        seed_rows: np.ndarray,
+        k: int,
+        seed_weights: Optional[np.ndarray] = None,
+        candidate_rows: Optional[np.ndarray] = None,
+        restart: float = RESTART,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The k artists the walk from the seeds visits most, seeds excluded.
+
+        ``candidate_rows`` restricts the result. Returns (rows, scores), best
+        first, ties broken by row.
+        """
+        eligible = np.ones(len(self), dtype=bool)
+        if candidate_rows is not None:
+            eligible[:] = False
+            eligible[candidate_rows] = True
+        eligible[np.asarray(seed_rows)] = False
+        scores, _ = self.personalized_pagerank(seed_rows, seed_weights, restart)
+        rows = np.flatnonzero(eligible & (scores > 0))
+        if len(rows) > k:
+            # Only scores tied with the k-th best can still place
+            kth = np.partition(scores[rows], len(rows) - k)[len(rows) - k]
+            rows = rows[scores[rows] >= kth]
+        order = np.lexsort((rows, -scores[rows]))[:k]
+        return rows[order], scores[rows[order]]
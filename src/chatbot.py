@@ -1,11 +1,18 @@
-import time
-from typing import List, Dict, Optional, Set
+from typing import TYPE_CHECKING, List, Dict, Optional, Sequence, Set, Tuple
 import streamlit as st
-from pyvis.network import Network
-from models import Song, UserPreferences
-from database import Database
+from models import RecommendationFilters, Song, UserPreferences
+from artist_graph import GRAPH_K, ArtistGraph
+from database import SONG_FEATURES, Database, artist_feature_matrix
+from radio import radio_playlist
+from recommendation_cache import RecommendationCache, quantize_preferences
+from similarity import neighbour_table
+from state_management import get_recommendation_cache
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from pyvis.network import Network
+
 class NetworkGraphBuilder:
     def __init__(self):
         self.default_image = (
@@ -17,7 +24,7 @@ class NetworkGraphBuilder:
         selected_artist: Dict,
         similar_artists: pd.DataFrame,
         excluded_artists: Set[str]
-    ) -> Network:
+    ) -> "Network":
         """Create network graph of artist similarities."""
         graph = self._initialize_graph()
         
@@ -64,8 +71,11 @@ class NetworkGraphBuilder:
         
         return graph
 
-    def _initialize_graph(self) -> Network:
+    def _initialize_graph(self) -> "Network":
         """Initialize graph with basic settings."""
+        # pyvis pulls in jinja2 and networkx; defer it until a graph is drawn
+        from pyvis.network import Network
+
         graph = Network(
             height="750px",
             width="100%",
@@ -75,7 +85,7 @@ class NetworkGraphBuilder:
         graph.set_options(self._get_graph_options())
         return graph
 
-    def _add_main_artist_node(self, graph: Network, artist: Dict) -> None:
+    def _add_main_artist_node(self, graph: "Network", artist: Dict) -> None:
         """Add main artist node to graph."""
         hover_info = self._generate_hover_info(artist)
         image_url = self._get_artist_image(artist)
@@ -93,7 +103,7 @@ class NetworkGraphBuilder:
 
     def _add_similar_artist_nodes(
         self, 
-        graph: Network, 
+        graph: "Network", 
         similar_artists: pd.DataFrame,
         main_artist: str,
         excluded_artists: Set[str]
@@ -165,6 +175,57 @@ class NetworkGraphBuilder:
             return artist['images'][0]['url']
         return artist.get('artist_image_url', self.default_image)
 
+    def create_recommendation_graph(self, top_artists: pd.DataFrame) -> "Network":
+        """Graph of the user's top artist matches around a "You" node."""
+        graph = self._initialize_graph()
+
+        # Add user node at center
+        graph.add_node(
+            "You",
+            title="Your Music Profile",
+            label="You",
+            image=self.default_image,
+            shape='circularImage',
+            size=60,
+            borderWidth=3,
+            color="#FF4444"
+        )
+
+        # Add recommended artist nodes
+        for artist in top_artists.to_dict(orient="records"):
+            hover_info = self._generate_hover_info(
+                artist,
+                include_similarity=True
+            )
+            image_url = self._get_artist_image(artist)
+
+            graph.add_node(
+                artist["artist_name"],
+                title=hover_info,
+                label=artist["artist_name"],
+                image=image_url,
+                shape='circularImage',
+                size=50,
+                borderWidth=2,
+                color="#1DB954"
+            )
+
+            # Add edge from user to artist
+            edge_width = artist["similarity"] * 2
+            graph.add_edge(
+                "You",
+                artist["artist_name"],
+                value=artist["similarity"],
+                width=edge_width,
+                title=f"Match Score: {artist['similarity']:.2f}",
+            )
+        return graph
+
+    @staticmethod
+    def generate_html(graph: "Network") -> str:
+        """Render a graph to an HTML page in memory, without temporary files."""
+        return graph.generate_html()
+
     @staticmethod
     def _get_graph_options() -> str:
         """Get graph visualization options."""
@@ -211,11 +272,256 @@ class NetworkGraphBuilder:
             }
         }'''
 
+class Recommender:
+    """Recommendations over one artist profile frame, memoized process-wide.
+
+    Holds no session state, so sessions and the startup warmup share it. With
+    ``warming`` set, results are pinned in the cache and the lookups are left
+    out of its hit rates.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        artist_profiles: pd.DataFrame,
+        cache: RecommendationCache,
+        graph_builder: Optional[NetworkGraphBuilder] = None,
+        warming: bool = False
+    ):
+        self.database = database
+        self.artist_profiles = artist_profiles
+        self.cache = cache
+        self.graph_builder = graph_builder or NetworkGraphBuilder()
+        self.warming = warming
+
+    def snapshot(self):
+        """The snapshot, if the artist profiles come from it."""
+        snapshot = self.database.get_snapshot()
+        if snapshot is not None and snapshot.artist_profiles is self.artist_profiles:
+            return snapshot
+        return None
+
+    def dataset_version(self) -> str:
+        """Identifies the data behind the artist profiles."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.manifest["source_sha256"]
+        return f"profiles-{id(self.artist_profiles)}"
+
+    def _cached(self, key: tuple, compute):
+        # Sessions pass RecommendationFilters() and the warmup None; both mean unfiltered
+        key = tuple(
+            None if isinstance(part, RecommendationFilters) and part.is_empty() else part
+            for part in key
+        )
+        return self.cache.get_or_compute(
+            self.dataset_version(),
+            key,
+            compute,
+            pinned=self.warming,
+            record=not self.warming,
+        )
+
+    def find_artist_row(self, artist_name: str) -> Optional[int]:
+        """Position of the first artist matching the name, case-insensitively."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.artist_row(artist_name)
+
+        matches = np.flatnonzero(
+            self.artist_profiles["artist_name"].str.lower() == artist_name.lower()
+        )
+        return int(matches[0]) if len(matches) else None
+
+    def candidate_rows(
+        self, filters: Optional[RecommendationFilters]
+    ) -> Optional[np.ndarray]:
+        """Sorted rows of the artists passing the filters; None if unfiltered."""
+        if filters is None or filters.is_empty():
+            return None
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.filtered_artist_rows(filters)
+        return self.database.filter_artist_rows(self.artist_profiles, filters)
+
+    def top_artists(
+        self,
+        preferences: UserPreferences,
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> pd.DataFrame:
+        """Top-k artists for the preferences among those passing the filters."""
+        grid, snapped = quantize_preferences(preferences)
+        return self._cached(
+            ("top_artists", grid, k, filters),
+            lambda: self.database.find_top_k_artists(
+                self.artist_profiles,
+                snapped,
+                k=k,
+                candidate_rows=self.candidate_rows(filters)
+            ),
+        )
+
+    def recommendation_graph_html(
+        self,
+        preferences: UserPreferences,
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> str:
+        """Rendered graph of the top-k artists for the preferences."""
+        grid, snapped = quantize_preferences(preferences)
+        return self._cached(
+            ("recommendation_graph", grid, k, filters),
+            lambda: self.graph_builder.generate_html(
+                self.graph_builder.create_recommendation_graph(
+                    self.top_artists(snapped, k, filters)
+                )
+            ),
+        )
+
+    def best_song(
+        self,
+        artist_id: str,
+        preferences: UserPreferences,
+        filters: Optional[RecommendationFilters] = None
+    ) -> Optional[Song]:
+        """Best matching song of an artist, within the filters if it has one there."""
+        grid, snapped = quantize_preferences(preferences, SONG_FEATURES)
+
+        def compute() -> Optional[Song]:
+            song = self.database.find_best_song(artist_id, snapped, filters)
+            if song is None and filters is not None and not filters.is_empty():
+                return self.best_song(artist_id, snapped)
+            return song
+
+        return self._cached(("best_song", artist_id, grid, filters), compute)
+
+    def best_songs(
+        self,
+        preferences: UserPreferences,
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> List[Song]:
+        """Best matching songs across the whole catalog."""
+        grid, snapped = quantize_preferences(preferences, SONG_FEATURES)
+        return self._cached(
+            ("best_songs", grid, k, filters),
+            lambda: self.database.find_best_songs(snapped, k, filters),
+        )
+
+    def similar_artists(
+        self,
+        artist_row: int,
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> pd.DataFrame:
+        """Top-k artists similar to one, from the neighbour table when possible."""
+        def compute() -> pd.DataFrame:
+            candidate_rows = self.candidate_rows(filters)
+            snapshot = self.snapshot()
+            similar = (
+                snapshot.similar_artists(
+                    artist_row, k=k, candidate_rows=candidate_rows
+                )
+                if snapshot is not None else None
+            )
+            if similar is None:
+                similar = self.database.find_top_k_artists(
+                    self.artist_profiles,
+                    self.artist_profiles.iloc[artist_row].to_dict(),
+                    k=k,
+                    candidate_rows=candidate_rows
+                )
+            return similar
+
+        return self._cached(("similar_artists", artist_row, k, filters), compute)
+
+    def neighbours(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest neighbours of every artist, from the snapshot when possible."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.neighbour_rows, snapshot.neighbour_distances
+        return self._cached(
+            ("neighbours", GRAPH_K),
+            lambda: neighbour_table(
+                artist_feature_matrix(self.artist_profiles), GRAPH_K
+            ),
+        )
+
+    def artist_graph(self) -> ArtistGraph:
+        """Graph of similar artists, from the snapshot when possible."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.artist_graph
+        return self._cached(
+            ("artist_graph",), lambda: ArtistGraph.from_neighbours(*self.neighbours())
+        )
+
+    def playlist_artists(
+        self,
+        artist_rows: Sequence[int],
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> pd.DataFrame:
+        """Top-k artists a random walk from the playlist's artists visits most.
+
+        Artists with several songs in the playlist weigh more as seeds; the
+        seeds themselves are never recommended.
+        """
+        seeds, counts = np.unique(
+            np.asarray(artist_rows, dtype=np.int64), return_counts=True
+        )
+
+        def compute() -> pd.DataFrame:
+            rows, scores = self.artist_graph().recommend(
+                seeds, k, counts, candidate_rows=self.candidate_rows(filters)
+            )
+            recommended = self.artist_profiles.iloc[rows].copy()
+            recommended["score"] = scores
+            return recommended
+
+        return self._cached(
+            ("playlist_artists", tuple(seeds), tuple(counts), k, filters), compute
+        )
+
+    def artist_graph_html(
+        self,
+        artist_row: int,
+        k: int,
+        excluded_artists: Set[str],
+        filters: Optional[RecommendationFilters] = None
+    ) -> str:
+        """Rendered similarity graph of an artist, without the excluded artists."""
+        similar = self.similar_artists(artist_row, k, filters)
+        # Only exclusions that appear in the graph change it
+        excluded = tuple(sorted(set(similar["artist_name"]) & excluded_artists))
+        return self._cached(
+            ("artist_graph", artist_row, k, excluded, filters),
+            lambda: self.graph_builder.generate_html(
+                self.graph_builder.create_network_graph(
+                    self.artist_profiles.iloc[artist_row].to_dict(),
+                    similar,
+                    set(excluded)
+                )
+            ),
+        )
+
+
 class Chatbot:
     def __init__(self, database: Database):
         self.database = database
         self.graph_builder = NetworkGraphBuilder()
 
+    @property
+    def recommender(self) -> Recommender:
+        """Recommender over this session's (shared) artist profiles."""
+        return Recommender(
+            self.database,
+            st.session_state.artist_profiles,
+            get_recommendation_cache(),
+            self.graph_builder
+        )
+
     def run(self) -> None:
         """Main chatbot loop."""
         st.markdown("## 💬 Chat")
@@ -290,72 +596,13 @@ class Chatbot:
         """Show initial artist recommendations based on user preferences as a graph."""
         if "messages" not in st.session_state:
             st.session_state.messages = []
-            
-        top_artists = self.database.find_top_k_artists(
-            artist_profiles=st.session_state.artist_profiles,
-            selected_artist_profile=st.session_state.user_preferences,
-            k=15
-        )
 
-        # Create a pseudo-artist dict for the user node
-        user_node = {
-            "artist_name": "You",
-            "artist_popularity": 100,
-            "images": [],
-            "artist_image_url": "https://i.scdn.co/image/ab67616d00001e02ff9ca10b55ce82ae553c8228"  # default image
-        }
-        
-        # Initialize network graph
-        graph = self.graph_builder._initialize_graph()
-        
-        # Add user node at center
-        hover_info = "Your Music Profile"
-        graph.add_node(
-            "You",
-            title=hover_info,
-            label="You",
-            image=user_node["artist_image_url"],
-            shape='circularImage',
-            size=60,
-            borderWidth=3,
-            color="#FF4444"
+        preferences = st.session_state.user_preferences
+        filters = st.session_state.recommendation_filters
+        top_artists = self.recommender.top_artists(preferences, k=15, filters=filters)
+        graph_html = self.recommender.recommendation_graph_html(
+            preferences, k=15, filters=filters
         )
-        
-        # Add recommended artist nodes
-        top_artists_dict = top_artists.to_dict(orient="records")
-        for artist in top_artists_dict:
-            hover_info = self.graph_builder._generate_hover_info(
-                artist,
-                include_similarity=True
-            )
-            image_url = self.graph_builder._get_artist_image(artist)
-            
-            graph.add_node(
-                artist["artist_name"],
-                title=hover_info,
-                label=artist["artist_name"],
-                image=image_url,
-                shape='circularImage',
-                size=50,
-                borderWidth=2,
-                color="#1DB954"
-            )
-            
-            # Add edge from user to artist
-            edge_width = artist["similarity"] * 2
-            graph.add_edge(
-                "You",
-                artist["artist_name"],
-                value=artist["similarity"],
-                width=edge_width,
-                title=f"Match Score: {artist['similarity']:.2f}",
-            )
-        
-        # Save and read the graph
-        filename = f"initial_recommendations_{int(time.time())}.html"
-        graph.save_graph(filename)
-        with open(filename, "r", encoding="utf-8") as f:
-            graph_html = f.read()
 
         # Add message with graph to session state
         st.session_state.messages.append({
@@ -367,7 +614,7 @@ class Chatbot:
                 "to see more details. Type an artist's name to explore their music and "
                 "find similar artists."
             ),
-            "artists": [artist["artist_name"] for artist in top_artists_dict],
+            "artists": top_artists["artist_name"].tolist(),
             "graph": graph_html
         })
         
@@ -379,59 +626,50 @@ class Chatbot:
         user_preferences: UserPreferences
     ) -> Optional[Song]:
         """Handle artist selection and return best matching song."""
-        matching_artists = st.session_state.artist_profiles[
-            st.session_state.artist_profiles["artist_name"].str.lower() == 
-            artist_name.lower()
-        ]
-
-        if matching_artists.empty:
+        recommender = self.recommender
+        artist_row = recommender.find_artist_row(artist_name)
+        if artist_row is None:
             return None
 
-        artist_id = matching_artists.iloc[0]["artist_id"]
-        return self.database.find_best_song(artist_id, user_preferences)
-
-    def generate_artist_graph(
-        self,
-        selected_artist: Dict,
-        similar_artists: pd.DataFrame
-    ) -> str:
-        """Generate artist similarity graph."""
-        last_ten_artists = {
-            item.artist_name for item in st.session_state.playlist[-10:]
-        }
-        
-        graph = self.graph_builder.create_network_graph(
-            selected_artist,
-            similar_artists,
-            last_ten_artists
+        artist_id = recommender.artist_profiles["artist_id"].iloc[artist_row]
+        return recommender.best_song(
+            artist_id, user_preferences, st.session_state.recommendation_filters
         )
-        
-        filename = f"artist_graph_{int(time.time())}.html"
-        graph.save_graph(filename)
-        
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read()
 
     def handle_successful_match(self, artist_name: str, song: Song) -> None:
         """Handle successful artist match."""
         # Add song to playlist
         st.session_state.playlist.append(song)
 
-        # Get similar artists
-        matching_artists = st.session_state.artist_profiles[
-            st.session_state.artist_profiles["artist_name"].str.lower() == 
-            artist_name.lower()
-        ]
-        selected_artist = matching_artists.iloc[0].to_dict()
-        
-        similar_artists = self.database.find_top_k_artists(
-            st.session_state.artist_profiles,
-            selected_artist,
-            k=15
+        # Get similar artists and their graph, shared across sessions
+        recommender = self.recommender
+        artist_row = recommender.find_artist_row(artist_name)
+        filters = st.session_state.recommendation_filters
+        similar_artists = recommender.similar_artists(
+            artist_row, k=15, filters=filters
         )
-
-        # Generate and save graph
-        graph_html = self.generate_artist_graph(selected_artist, similar_artists)
+        last_ten_artists = {
+            item.artist_name for item in st.session_state.playlist[-10:]
+        }
+        graph_html = recommender.artist_graph_html(
+            artist_row, 15, last_ten_artists, filters=filters
+        )
+        # Once the playlist spans several artists, suggest from all of them
+        playlist_rows = [
+            row for row in (
+                recommender.find_artist_row(item.artist_name)
+                for item in st.session_state.playlist
+            )
+            if row is not None
+        ]
+        if len(set(playlist_rows)) > 1:
+            suggested_artists = recommender.playlist_artists(
+                playlist_rows, k=15, filters=filters
+            )["artist_name"].tolist()
+            suggestion = "Here are artists picked from your whole playlist."
+        else:
+            suggested_artists = similar_artists["artist_name"].tolist()
+            suggestion = ""
         for msg in st.session_state.messages:
             if "graph" in msg:
                 del msg["graph"]
@@ -453,12 +691,44 @@ class Chatbot:
                 "content": (
                     "Would you like to explore another artist? Type another artist name, "
                     "or adjust your preferences in the sidebar and click 'Find Matching "
-                    "Artists' for new recommendations."
-                ),
-                "artists": similar_artists["artist_name"].tolist()
+                    f"Artists' for new recommendations. {suggestion}"
+                ).strip(),
+                "artists": suggested_artists
             }
         ])
 
+    def start_radio(self, max_songs: int) -> None:
+        """Fill the playlist up to ``max_songs`` in one pass.
+
+        Radio starts from the playlist's last artist, or from the preferences
+        when the playlist is empty, and skips artists already in it.
+        """
+        recommender = self.recommender
+        playlist = st.session_state.playlist
+        playlist_rows = [
+            row for row in (
+                recommender.find_artist_row(item.artist_name) for item in playlist
+            )
+            if row is not None
+        ]
+        songs = radio_playlist(
+            recommender,
+            st.session_state.user_preferences,
+            max_songs - len(playlist),
+            seed_artist_row=playlist_rows[-1] if playlist_rows else None,
+            filters=st.session_state.recommendation_filters,
+            exclude_rows=playlist_rows,
+        )
+        playlist.extend(songs)
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": (
+                f"📻 Radio added {len(songs)} songs to your playlist."
+                if songs else
+                "📻 Radio couldn't find any more songs for your preferences."
+            )
+        })
+
     def handle_failed_match(self) -> None:
         """Handle case when no artist match is found."""
         st.session_state.messages.append({
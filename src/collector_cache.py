@@ -0,0 +1,112 @@
+"""On-disk state that saves the Spotify collector requests across runs.
+
+Two tables in one SQLite file: artist objects keyed by artist id, reused
+until they are ``artist_ttl`` seconds old, and the ids of every track
+already collected. The collector looks in both before going to the network,
+so a restart, or a random query that lands on known tracks, costs no
+audio-features or artist requests for what it has already seen.
+"""
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Artist metadata (followers, popularity) drifts; refetch after a week
+ARTIST_TTL = 7 * 24 * 3600
+# Ids per IN (...) lookup, below SQLite's variable limit
+LOOKUP_CHUNK = 500
+
+CREATE_CACHE_TABLES = """
+CREATE TABLE IF NOT EXISTS artist_cache (
+    artist_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_tracks (
+    track_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+GET_CACHED_ARTISTS = """
+SELECT artist_id, data FROM artist_cache
+WHERE fetched_at >= ? AND artist_id IN ({placeholders})
+"""
+
+PUT_CACHED_ARTIST = """
+INSERT OR REPLACE INTO artist_cache (artist_id, data, fetched_at) VALUES (?, ?, ?)
+"""
+
+GET_SEEN_TRACKS = """
+SELECT track_id FROM seen_tracks WHERE track_id IN ({placeholders})
+"""
+
+PUT_SEEN_TRACK = "INSERT OR IGNORE INTO seen_tracks (track_id) VALUES (?)"
+
+
+def _chunks(ids: Sequence[str]) -> Iterable[Sequence[str]]:
+    for start in range(0, len(ids), LOOKUP_CHUNK):
+        yield ids[start:start + LOOKUP_CHUNK]
+
+
+class CollectorCache:
+    """Artist metadata with a TTL and the set of collected track ids."""
+
+    def __init__(
+        self,
+        path: str,
+        artist_ttl: float = ARTIST_TTL,
+        conn: Optional[sqlite3.Connection] = None,
+    ):
+        """``conn``, if given, is an open connection to ``path`` to share."""
+        self.path = path
+        self.artist_ttl = artist_ttl
+        self.conn = conn or sqlite3.connect(path)
+        self.conn.executescript(CREATE_CACHE_TABLES)
+        # Handed to a consumer but not stored yet; seen all the same
+        self.held = set()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def artists(self, artist_ids: Sequence[str]) -> Dict[str, Dict]:
+        """The cached artists among ``artist_ids`` still within the TTL."""
+        fresh_after = time.time() - self.artist_ttl
+        found = {}
+        for chunk in _chunks(list(artist_ids)):
+            query = GET_CACHED_ARTISTS.format(placeholders=",".join("?" * len(chunk)))
+            for artist_id, data in self.conn.execute(query, (fresh_after, *chunk)):
+                found[artist_id] = json.loads(data)
+        return found
+
+    def put_artists(self, artists: Iterable[Dict]) -> None:
+        fetched_at = time.time()
+        with self.conn:
+            self.conn.executemany(
+                PUT_CACHED_ARTIST,
+                ((artist["id"], json.dumps(artist), fetched_at) for artist in artists),
+            )
+
+    def unseen(self, track_ids: Sequence[str]) -> List[str]:
+        """``track_ids`` not collected before nor held, in order."""
+        seen = set()
+        for chunk in _chunks(list(track_ids)):
+            query = GET_SEEN_TRACKS.format(placeholders=",".join("?" * len(chunk)))
+            seen.update(track_id for track_id, in self.conn.execute(query, chunk))
+        return [
+            track_id for track_id in track_ids
+            if track_id not in seen and track_id not in self.held
+        ]
+
+    def hold(self, track_id: str) -> None:
+        """Count a track as seen until ``mark_seen`` stores it (or the run ends)."""
+        self.held.add(track_id)
+
+    def mark_seen(self, track_ids: Iterable[str]) -> None:
+        """Record tracks as collected, committing the connection's transaction."""
+        track_ids = list(track_ids)
+        with self.conn:
+            self.conn.executemany(PUT_SEEN_TRACK, ((track_id,) for track_id in track_ids))
+        self.held.difference_update(track_ids)
+
+    def seen_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen_tracks").fetchone()[0]
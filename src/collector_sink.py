@@ -0,0 +1,269 @@
+"""Collected tracks streamed straight into the normalized SQLite database.
+
+Rows go into ``tracks``, ``albums``, ``artists``, ``track_artists``,
+``track_features`` and ``track_genres`` (see ``schema.py``) in batched
+transactions, transformed the way ``prepare_data.ipynb`` transforms the
+exported spreadsheet. Each transaction also moves a checkpoint: the seed of
+the search page sequence and the position in it before which every page's
+tracks are stored. A killed run resumes from there, and pages it re-searches
+cost no enrichment, since their stored tracks are already marked seen.
+``artist_profiles`` is kept current by the triggers of ``schema.py`` as
+rows arrive, so the database is ready for the app at every checkpoint.
+Memory stays bounded by the batch and queue sizes however long it runs.
+
+    python src/collector_sink.py --tracks 900000 --db spotify_tracks.db
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from collector_cache import CollectorCache
+from schema import (
+    BINARY_FEATURE_THRESHOLDS,
+    CREATE_INDEXES,
+    CREATE_TABLES,
+    TABLE_COLUMNS,
+    add_derived_columns,
+    create_artist_profiles,
+    has_artist_feature_sums,
+    insert_statement,
+)
+from spotify_collector import (
+    CollectorStats,
+    SpotifyClient,
+    TrackCollector,
+    credentials_from_env,
+    search_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction
+SINK_BATCH = 500
+
+CREATE_CHECKPOINT = """
+CREATE TABLE IF NOT EXISTS collector_checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seed INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    query TEXT,
+    search_offset INTEGER,
+    tracks INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+GET_CHECKPOINT = "SELECT seed, position, tracks FROM collector_checkpoint WHERE id = 1"
+
+PUT_CHECKPOINT = """
+INSERT OR REPLACE INTO collector_checkpoint
+    (id, seed, position, query, search_offset, tracks, updated_at)
+VALUES (1, ?, ?, ?, ?, ?, ?)
+"""
+
+GET_ALBUM_ID = """
+SELECT album_id FROM albums
+WHERE album_name IS ? AND release_date IS ? AND album_image_url IS ?
+LIMIT 1
+"""
+
+UPSERT_ARTIST = """
+INSERT INTO artists ({columns}) VALUES ({placeholders})
+ON CONFLICT (artist_id) DO UPDATE SET
+    artist_popularity = COALESCE(excluded.artist_popularity, artist_popularity),
+    artist_followers = COALESCE(excluded.artist_followers, artist_followers),
+    artist_image_url = COALESCE(excluded.artist_image_url, artist_image_url),
+    artist_external_url = COALESCE(excluded.artist_external_url, artist_external_url)
+""".format(
+    columns=", ".join(TABLE_COLUMNS["artists"]),
+    placeholders=", ".join("?" * len(TABLE_COLUMNS["artists"])),
+)
+
+
+def _insert(table: str) -> str:
+    return insert_statement(table, "INSERT OR IGNORE")
+
+
+def generate_artist_id(name: str) -> str:
+    """The artist id ``prepare_data.ipynb`` derives from the artist name."""
+    return hashlib.md5(str(name).encode()).hexdigest()
+
+
+def _split(names: Optional[str]) -> List[str]:
+    return [name.strip() for name in (names or "").split(",") if name.strip()]
+
+
+def _scaled(value, scale: float):
+    return None if value is None else value / scale
+
+
+class CollectorSink:
+    """A normalized music database that collected rows are written into."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(CREATE_TABLES)
+        add_derived_columns(self.conn)
+        self.conn.executescript(CREATE_INDEXES + CREATE_CHECKPOINT)
+        if not has_artist_feature_sums(self.conn):
+            create_artist_profiles(self.conn)
+        self.cache = CollectorCache(path, conn=self.conn)
+        if self.cache.seen_count() == 0:
+            # Tracks loaded by other means count as collected too
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO seen_tracks SELECT track_id FROM tracks")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def checkpoint(self) -> Optional[Tuple[int, int, int]]:
+        """(seed, position, tracks stored) of the last batch, if any."""
+        return self.conn.execute(GET_CHECKPOINT).fetchone()
+
+    def _album_ids(self, rows: Sequence[Dict]) -> Dict[Tuple, int]:
+        album_ids = {}
+        next_id = None
+        for row in rows:
+            key = (row["album_name"], row["release_date"], row["album_image_url"])
+            if key in album_ids:
+                continue
+            found = self.conn.execute(GET_ALBUM_ID, key).fetchone()
+            if found is None:
+                if next_id is None:
+                    next_id = self.conn.execute(
+                        "SELECT COALESCE(MAX(album_id), 0) + 1 FROM albums"
+                    ).fetchone()[0]
+                self.conn.execute(_insert("albums"), (next_id, *key))
+                found = (next_id,)
+                next_id += 1
+            album_ids[key] = found[0]
+        return album_ids
+
+    def write(self, rows: Sequence[Dict], seed: int, position: int, tracks: int) -> None:
+        """Store ``rows`` and move the checkpoint, in one transaction.
+
+        The row's artist metadata belongs to its first artist; the other
+        artists are stored by name only until a row of their own fills them in.
+        """
+        album_ids = self._album_ids(rows)
+        track_values, feature_values, artist_values = [], [], []
+        track_artist_values, genre_values = [], []
+        for row in rows:
+            track_id = row["track_id"]
+            album_key = (row["album_name"], row["release_date"], row["album_image_url"])
+            track_values.append((
+                track_id,
+                row["track_name"],
+                _scaled(row["popularity"], 100),
+                row["duration_ms"],
+                int(bool(row["explicit"])),
+                row["track_external_url"],
+                row.get("uri") or f"spotify:track:{track_id}",
+                album_ids[album_key],
+            ))
+            features = {
+                name: int(row[name] >= threshold)
+                for name, threshold in BINARY_FEATURE_THRESHOLDS.items()
+            }
+            feature_values.append((
+                track_id,
+                row["danceability"],
+                row["energy"],
+                row["key"],
+                row["loudness"],
+                row["mode"],
+                row["speechiness"],
+                features["acousticness"],
+                features["instrumentalness"],
+                features["liveness"],
+                row["valence"],
+                row["tempo"],
+                round(row["duration_ms"] / 60000, 2),
+            ))
+            for number, name in enumerate(_split(row["artists"])):
+                artist_id = generate_artist_id(name)
+                track_artist_values.append((track_id, artist_id))
+                if number == 0:
+                    artist_values.append((
+                        artist_id,
+                        name,
+                        _scaled(row["artist_popularity"], 100),
+                        row["artist_followers"],
+                        row["artist_image_url"],
+                        row["artist_external_url"],
+                    ))
+                else:
+                    artist_values.append((artist_id, name, None, None, None, None))
+            genre_values.extend((track_id, genre) for genre in _split(row["track_genre"]))
+
+        self.conn.executemany(_insert("tracks"), track_values)
+        self.conn.executemany(_insert("track_features"), feature_values)
+        self.conn.executemany(UPSERT_ARTIST, artist_values)
+        self.conn.executemany(_insert("track_artists"), track_artist_values)
+        self.conn.executemany(_insert("track_genres"), genre_values)
+        query, offset = next(search_pages(seed, position))
+        self.conn.execute(
+            PUT_CHECKPOINT, (seed, position, query, offset, tracks, time.time())
+        )
+        # Commits the transaction: rows, checkpoint and seen tracks together
+        self.cache.mark_seen(row["track_id"] for row in rows)
+
+
+async def collect_to_sqlite(
+    client: SpotifyClient,
+    sink: CollectorSink,
+    num_tracks: int,
+    seed: int = 0,
+    batch_size: int = SINK_BATCH,
+) -> CollectorStats:
+    """Collect ``num_tracks`` more tracks into ``sink``, resuming its checkpoint.
+
+    A fresh database starts at page 0 of ``seed``'s sequence; one with a
+    checkpoint carries on with the seed and position stored there.
+    """
+    checkpoint = sink.checkpoint()
+    if checkpoint is None:
+        start, stored = 0, 0
+    else:
+        seed, start, stored = checkpoint
+        logger.info(f"Resuming at page {start} of seed {seed}, {stored} tracks stored")
+    collector = TrackCollector(client, cache=sink.cache)
+    batch = []
+    async for row in collector.collect(num_tracks, search_pages(seed, start)):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            stored += len(batch)
+            sink.write(batch, seed, start + collector.pages_done, stored)
+            batch = []
+    stored += len(batch)
+    sink.write(batch, seed, start + collector.pages_done, stored)
+    return client.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect Spotify tracks into SQLite")
+    parser.add_argument("--tracks", type=int, default=900000)
+    parser.add_argument("--db", default="spotify_tracks.db")
+    parser.add_argument("--seed", type=int, default=0, help="ignored when resuming")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    async def run() -> CollectorStats:
+        sink = CollectorSink(args.db)
+        try:
+            async with SpotifyClient(credentials_from_env()) as client:
+                return await collect_to_sqlite(client, sink, args.tracks, args.seed)
+        finally:
+            sink.close()
+
+    logger.info(asyncio.run(run()).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,188 @@
+import json
 import sqlite3
+import weakref
 from functools import lru_cache
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict, List, Union
-from models import Song, UserPreferences
-from queries import GET_ALL_ARTIST_PROFILES, GET_ARTIST_PROFILE, GET_SONGS_FOR_ARTIST
+from typing import Optional, Dict, List, Sequence, Tuple, Union
+from artist_graph import GRAPH_K
+from models import RecommendationFilters, Song, UserPreferences
+from queries import (
+    BUILD_GENRE_PROFILES,
+    CREATE_ARTIST_EDGES,
+    GET_ALL_ARTIST_PROFILES,
+    GET_ARTIST_NAMES,
+    GET_ARTIST_PROFILE,
+    GET_DURATION_ARTIST_IDS,
+    GET_GENRE_ARTIST_IDS,
+    GET_GENRE_PROFILES,
+    GET_NEXT_HOP,
+    GET_TRACK_FEATURE_STORE,
+    GET_TRACK_DETAILS_BY_ROWIDS,
+    INSERT_ARTIST_EDGE,
+)
+from schema import CREATE_INDEXES, add_derived_columns, create_artist_profiles
+from similarity import gather_members, neighbour_table
 from pathlib import Path
 import gzip
+import os
 import shutil
+import threading
 # Get the directory containing your streamlit app
 BASE_DIR = Path(__file__).parent
 
+# Features used for artist similarity, in feature matrix column order
+PROFILE_FEATURES = [
+    "danceability", "energy", "acousticness",
+    "instrumentalness", "liveness", "valence"
+]
+# Features stored 0/1 per track; artist and genre presets take their mode
+BINARY_FEATURES = ["acousticness", "instrumentalness", "liveness"]
+# Track features scored by find_best_song, in track feature matrix column order
+SONG_FEATURES = PROFILE_FEATURES + ["loudness"]
+# Song features not already on a 0-1 scale, with the range rescaled to 0-1
+# (the bounds of UserPreferences)
+SONG_FEATURE_RANGES = {"loudness": (-30.0, 0.0)}
+PROFILE_NUMERIC_COLUMNS = ["loudness", "artist_popularity"]
+# Above this fraction of the catalog, candidates are scored in place and the
+# rest masked out, which is cheaper than gathering their rows
+DENSE_CANDIDATE_FRACTION = 0.5
+PROFILE_STRING_COLUMNS = ["artist_id", "artist_name", "artist_image_url"]
+
+# Contiguous feature matrices of frames built by build_artist_profiles, by id()
+_FEATURE_MATRICES: Dict[int, np.ndarray] = {}
+
+def arrow_string_dtype():
+    import pyarrow as pa
+
+    return pd.ArrowDtype(pa.large_string())
+
+def build_artist_profiles(
+    features: np.ndarray,
+    columns: Dict[str, object]
+) -> pd.DataFrame:
+    """Assemble the compact profile layout around a (n, d) float32 feature matrix.
+
+    The matrix becomes the frame's first block without a copy and is registered
+    so ``artist_feature_matrix`` can hand it to the similarity code directly.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    features.flags.writeable = False
+    artist_profiles = pd.DataFrame(features, columns=PROFILE_FEATURES, copy=False)
+    for column, values in columns.items():
+        artist_profiles[column] = values
+
+    _FEATURE_MATRICES[id(artist_profiles)] = features
+    weakref.finalize(artist_profiles, _FEATURE_MATRICES.pop, id(artist_profiles), None)
+    return artist_profiles
+
+def compact_artist_profiles(raw: pd.DataFrame) -> pd.DataFrame:
+    """Downcast a raw profile query result to float32 features and Arrow strings."""
+    columns = {
+        column: raw[column].to_numpy(dtype=np.float32)
+        for column in PROFILE_NUMERIC_COLUMNS
+    }
+    for column in PROFILE_STRING_COLUMNS:
+        columns[column] = raw[column].astype(arrow_string_dtype()).array
+    return build_artist_profiles(
+        raw[PROFILE_FEATURES].to_numpy(dtype=np.float32), columns
+    )
+
+def artist_feature_matrix(artist_profiles: pd.DataFrame) -> np.ndarray:
+    """Contiguous (n, d) float32 matrix of ``PROFILE_FEATURES``, row-aligned.
+
+    Zero-copy for frames built by ``build_artist_profiles``; other frames
+    (e.g. filtered subsets) get a fresh matrix.
+    """
+    features = _FEATURE_MATRICES.get(id(artist_profiles))
+    if features is not None and len(features) == len(artist_profiles):
+        return features
+    return np.ascontiguousarray(
+        artist_profiles[PROFILE_FEATURES].to_numpy(dtype=np.float32)
+    )
+
+def preference_matrix(
+    preferences: Union[Sequence[UserPreferences], np.ndarray],
+    features: List[str] = PROFILE_FEATURES
+) -> np.ndarray:
+    """(n, d) float32 matrix of ``features`` from many preference vectors."""
+    if isinstance(preferences, np.ndarray):
+        return np.ascontiguousarray(preferences, dtype=np.float32)
+    return np.array(
+        [[getattr(p, f) for f in features] for p in preferences],
+        dtype=np.float32
+    ).reshape(len(preferences), len(features))
+
+def normalize_song_features(
+    values: np.ndarray, features: List[str] = SONG_FEATURES
+) -> np.ndarray:
+    """Rescale ``SONG_FEATURE_RANGES`` features to 0-1, clipping outliers.
+
+    Takes one vector or a (n, d) matrix whose last axis follows ``features``
+    and returns a float32 copy, so distances weigh every feature alike.
+    """
+    values = np.array(values, dtype=np.float32)
+    for column, feature in enumerate(features):
+        if feature in SONG_FEATURE_RANGES:
+            low, high = SONG_FEATURE_RANGES[feature]
+            values[..., column] = np.clip(
+                (values[..., column] - low) / (high - low), 0.0, 1.0
+            )
+    return values
+
+def popularity_percent(popularity: np.ndarray) -> np.ndarray:
+    """Artist popularity on the 0-100 scale of ``UserPreferences.popularity``.
+
+    Spotify reports 0-100; catalogs that store it as a fraction are scaled up.
+    """
+    popularity = np.asarray(popularity, dtype=np.float32)
+    if len(popularity) and np.nanmax(popularity) <= 1:
+        return popularity * 100
+    return popularity
+
+def top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first, without a full sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    # Ties are broken by position, matching DataFrame.nlargest(keep="first");
+    # the partition may pick any of the rows tied with the k-th score
+    threshold = scores[candidates].min()
+    if np.count_nonzero(scores == threshold) > np.count_nonzero(
+        scores[candidates] == threshold
+    ):
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate((above, tied))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
 class Database:
     def __init__(self, db_path= BASE_DIR / "assets" / "music_data.db"):
         self.db_path = db_path
         compressed_file_path = f'{db_path}.gz'
 
-        # Decompress the file
-        with gzip.open(compressed_file_path, 'rb') as compressed_file:
-            with open(db_path, 'wb') as db_file:
-                shutil.copyfileobj(compressed_file, db_file)
+        # Decompress the file, unless an up-to-date copy is already on disk
+        if self._needs_decompress(db_path, compressed_file_path):
+            tmp_path = f'{db_path}.{os.getpid()}.tmp'
+            with gzip.open(compressed_file_path, 'rb') as compressed_file:
+                with open(tmp_path, 'wb') as db_file:
+                    shutil.copyfileobj(compressed_file, db_file)
+            os.replace(tmp_path, db_path)
+
+        # Size and mtime of the file the cached reads and snapshot were taken from
+        self._source_signature = None
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    @staticmethod
+    def _needs_decompress(db_path, compressed_file_path) -> bool:
+        """Whether the plain DB is missing or older than its compressed asset."""
+        if not os.path.exists(db_path):
+            return True
+        if not os.path.exists(compressed_file_path):
+            return False
+        return os.path.getmtime(compressed_file_path) > os.path.getmtime(db_path)
 
     def get_connection(self) -> sqlite3.Connection:
         return sqlite3.connect(self.db_path)
@@ -35,17 +198,500 @@ class Database:
 
     @lru_cache(maxsize=1)
     def get_artist_profiles(self) -> Optional[pd.DataFrame]:
-        """Cached retrieval of all artist profiles."""
+        """Cached retrieval of all artist profiles in the compact layout."""
+        with self.get_connection() as conn:
+            artist_profiles = pd.read_sql_query(
+                GET_ALL_ARTIST_PROFILES,
+                conn,
+                dtype={
+                    column: "float32"
+                    for column in PROFILE_FEATURES + PROFILE_NUMERIC_COLUMNS
+                }
+            )
+        if artist_profiles.empty:
+            return None
+        return compact_artist_profiles(artist_profiles)
+
+    def migrate_schema(self) -> None:
+        """Add schema.py's derived columns and indexes to an older database.
+
+        Fills albums.release_year and release_precision in one UPDATE and
+        indexes the year, so yearly series are SQL GROUP BYs.
+        """
         with self.get_connection() as conn:
-            artist_profiles = pd.read_sql_query(GET_ALL_ARTIST_PROFILES, conn)
-            return artist_profiles if not artist_profiles.empty else None
+            add_derived_columns(conn)
+            conn.executescript(CREATE_INDEXES)
+
+    def materialize_artist_profiles(self) -> None:
+        """Turn artist_profiles into the trigger-maintained view of schema.py.
+
+        For databases built by the notebooks; ingesting tracks afterwards
+        updates the profiles of their artists in place. Clears the cached reads.
+        """
+        self.migrate_schema()
+        with self.get_connection() as conn:
+            create_artist_profiles(conn)
+        self.get_artist_profile.cache_clear()
+        self.get_artist_profiles.cache_clear()
+
+    def build_genre_profiles(self) -> None:
+        """Materialize per-genre centroids, spreads and counts in one SQL pass."""
+        with self.get_connection() as conn:
+            conn.execute("BEGIN")
+            conn.execute("DROP TABLE IF EXISTS genre_profiles")
+            conn.execute(BUILD_GENRE_PROFILES)
+
+    @staticmethod
+    def _has_genre_profiles(conn: sqlite3.Connection) -> bool:
+        """Whether genre_profiles exists in the current layout (with counts)."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(genre_profiles)")}
+        return "track_count" in columns
+
+    @lru_cache(maxsize=1)
+    def get_genre_profiles(self) -> Optional[pd.DataFrame]:
+        """Cached genre centroids, most common genres first.
+
+        The table is built on first use when missing or in the older
+        notebook layout; it lives in the decompressed database, so it is
+        rebuilt whenever that is replaced.
+        """
+        try:
+            with self.get_connection() as conn:
+                if not self._has_genre_profiles(conn):
+                    self.build_genre_profiles()
+                genre_profiles = pd.read_sql_query(GET_GENRE_PROFILES, conn)
+        except Exception as e:
+            print(f"Error loading genre profiles: {str(e)}")
+            return None
+        return genre_profiles if not genre_profiles.empty else None
+
+    @lru_cache(maxsize=256)
+    def get_genre_artist_ids(self, genre: str) -> List[str]:
+        """Ids of the artists with a track in the genre (no snapshot needed)."""
+        with self.get_connection() as conn:
+            rows = conn.execute(GET_GENRE_ARTIST_IDS, (genre,)).fetchall()
+        return [artist_id for (artist_id,) in rows]
+
+    @lru_cache(maxsize=256)
+    def get_duration_artist_ids(self, low_minutes: float, high_minutes: float) -> List[str]:
+        """Ids of the artists with a track of length in the window (no snapshot needed)."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                GET_DURATION_ARTIST_IDS, (low_minutes * 60000, high_minutes * 60000)
+            ).fetchall()
+        return [artist_id for (artist_id,) in rows]
+
+    def filter_artist_rows(
+        self,
+        artist_profiles: pd.DataFrame,
+        filters: RecommendationFilters
+    ) -> Optional[np.ndarray]:
+        """Sorted rows of the profiles passing the filters, resolved via SQL.
+
+        The fallback for frames without a snapshot; None if nothing is filtered.
+        """
+        mask = None
+        if filters.genre is not None:
+            mask = artist_profiles["artist_id"].isin(
+                self.get_genre_artist_ids(filters.genre)
+            ).to_numpy()
+        if filters.popularity_range is not None:
+            low, high = filters.popularity_range
+            popularity = popularity_percent(artist_profiles["artist_popularity"])
+            in_band = (popularity >= low) & (popularity <= high)
+            mask = in_band if mask is None else mask & in_band
+        if filters.duration_range is not None:
+            in_window = artist_profiles["artist_id"].isin(
+                self.get_duration_artist_ids(*filters.duration_range)
+            ).to_numpy()
+            mask = in_window if mask is None else mask & in_window
+        return None if mask is None else np.flatnonzero(mask).astype(np.int32)
+
+    def build_artist_edges(self, k: int = GRAPH_K) -> None:
+        """Materialize each artist's k nearest neighbours as artist_edges.
+
+        Neighbours come from the snapshot's table when it has enough, else
+        from a KD-tree over the profiles. Edge weights are the similarities
+        of find_top_k_artists, 1 / (1 + distance).
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None and snapshot.neighbour_rows.shape[1] >= k:
+            artist_profiles = snapshot.artist_profiles
+            rows = snapshot.neighbour_rows[:, :k]
+            distances = snapshot.neighbour_distances[:, :k]
+        else:
+            artist_profiles = self.get_artist_profiles()
+            if artist_profiles is None:
+                raise ValueError("No artist profiles to link")
+            rows, distances = neighbour_table(artist_feature_matrix(artist_profiles), k)
+
+        artist_ids = artist_profiles["artist_id"].to_numpy(dtype=object)
+        edges = zip(
+            np.repeat(artist_ids, rows.shape[1]),
+            artist_ids[np.ravel(rows)],
+            (1 / (1 + np.ravel(distances).astype(np.float64))).tolist(),
+        )
+        with self.get_connection() as conn:
+            conn.execute("BEGIN")
+            conn.execute("DROP TABLE IF EXISTS artist_edges")
+            conn.execute(CREATE_ARTIST_EDGES)
+            conn.executemany(INSERT_ARTIST_EDGE, edges)
+
+    @staticmethod
+    def _has_artist_edges(conn: sqlite3.Connection) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artist_edges'"
+        ).fetchone() is not None
+
+    def find_artists_within_hops(
+        self,
+        artist_id: str,
+        hops: int = 2,
+        exclude_artist_ids: Sequence[str] = (),
+        k: int = 15
+    ) -> Optional[pd.DataFrame]:
+        """Artists at most ``hops`` edges from one, best path weight first.
+
+        Walks artist_edges one hop per query, with one primary key seek per
+        expanded artist, so no graph server or full scan is involved. Each
+        hop keeps the best path weight (the product of its edge weights) to
+        every artist reached and only expands the artists it improved, so
+        the work grows with hops * artists * GRAPH_K rather than GRAPH_K **
+        hops. Paths never pass through the excluded artists or back through
+        the start. The table is built on first use and, like genre_profiles,
+        rebuilt whenever the decompressed database is replaced. Returns
+        artist_id, hops and path_weight of each artist's best path (the
+        shorter one among equal weights), ties broken by artist id.
+        """
+        excluded = json.dumps(
+            [str(artist_id), *(str(excluded) for excluded in exclude_artist_ids)]
+        )
+        best: Dict[str, Tuple[float, int]] = {}
+        frontier = {str(artist_id): 1.0}
+        try:
+            with self.get_connection() as conn:
+                if not self._has_artist_edges(conn):
+                    self.build_artist_edges()
+                for hop in range(1, hops + 1):
+                    if not frontier:
+                        break
+                    reached = conn.execute(
+                        GET_NEXT_HOP, (json.dumps(frontier), excluded)
+                    ).fetchall()
+                    frontier = {}
+                    for target_id, weight in reached:
+                        if weight > best.get(target_id, (0.0, 0))[0]:
+                            best[target_id] = (weight, hop)
+                            frontier[target_id] = weight
+        except Exception as e:
+            print(f"Error finding nearby artists: {str(e)}")
+            return None
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:k]
+        return pd.DataFrame(
+            [(target_id, hop, weight) for target_id, (weight, hop) in ranked],
+            columns=["artist_id", "hops", "path_weight"],
+        )
+
+    def _source_changed(self) -> bool:
+        """Whether the database file changed since the last check.
+
+        Collection, the profile triggers and migrations write to the file a
+        running process reads, so a change clears every cached read.
+        """
+        stat = os.stat(self.db_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._source_signature:
+            return False
+        if self._source_signature is not None:
+            for cached in (
+                self.get_artist_profile,
+                self.get_artist_profiles,
+                self.get_genre_profiles,
+                self.get_genre_artist_ids,
+                self.get_duration_artist_ids,
+            ):
+                cached.cache_clear()
+        self._source_signature = signature
+        return True
+
+    def get_snapshot(self):
+        """Memory-mapped recommendation snapshot, or None if it cannot be built.
+
+        Reattached, and rebuilt if need be, once the database file changes;
+        until then each call costs one ``os.stat``.
+        """
+        from snapshot import load_snapshot
+
+        with self._snapshot_lock:
+            if self._source_changed():
+                try:
+                    self._snapshot = load_snapshot(self)
+                except Exception as e:
+                    print(f"Error loading recommendation snapshot: {str(e)}")
+                    self._snapshot = None
+            return self._snapshot
 
     def find_best_song(
         self, 
         artist_id: int, 
-        user_preferences: UserPreferences
+        user_preferences: UserPreferences,
+        filters: Optional[RecommendationFilters] = None
+    ) -> Optional[Song]:
+        """Find best matching song, from the snapshot's track store when available.
+
+        Only the artist's tracks in the ``filters`` genre and length window are
+        considered; loudness is rescaled to 0-1 like the other features.
+        """
+        filters = filters or RecommendationFilters()
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            artist_row = snapshot.artist_row_by_id(artist_id)
+            if artist_row is not None:
+                return self._find_best_song_in_snapshot(
+                    snapshot, artist_row, user_preferences, filters
+                )
+        return self._find_best_song_sql(artist_id, user_preferences, filters)
+
+    def _find_best_song_in_snapshot(
+        self,
+        snapshot,
+        artist_row: int,
+        user_preferences: UserPreferences,
+        filters: RecommendationFilters
+    ) -> Optional[Song]:
+        """Score the artist's tracks in memory, then fetch one row from SQLite."""
+        track_rows = snapshot.filter_track_rows(
+            snapshot.artist_tracks(artist_row), filters
+        )
+        if len(track_rows) == 0:
+            return None
+
+        distances = np.linalg.norm(
+            snapshot.track_features[track_rows]
+            - self._song_vector(snapshot, user_preferences),
+            axis=1
+        )
+        return self._snapshot_songs(
+            snapshot, [track_rows[distances.argmin()]], [artist_row]
+        )[0]
+
+    def find_best_songs_for_artists(
+        self,
+        artist_ids: Sequence[str],
+        user_preferences: UserPreferences,
+        filters: Optional[RecommendationFilters] = None
+    ) -> List[Optional[Song]]:
+        """``find_best_song`` for many artists, None where one has no match.
+
+        With the snapshot, every artist's tracks are scored in one pass and
+        the songs fetched in one query; otherwise artist by artist.
+        """
+        filters = filters or RecommendationFilters()
+        snapshot = self.get_snapshot()
+        artist_rows = (
+            [snapshot.artist_row_by_id(artist_id) for artist_id in artist_ids]
+            if snapshot is not None else [None] * len(artist_ids)
+        )
+        songs = [None] * len(artist_ids)
+        in_snapshot = np.array(
+            [row for row in artist_rows if row is not None], dtype=np.int64
+        )
+        if len(in_snapshot):
+            track_rows, track_artists = gather_members(
+                in_snapshot, snapshot.artist_track_offsets, snapshot.artist_track_rows
+            )
+            mask = snapshot.track_mask(filters)
+            if mask is not None:
+                keep = mask[track_rows]
+                track_rows, track_artists = track_rows[keep], track_artists[keep]
+            distances = np.linalg.norm(
+                snapshot.track_features[track_rows]
+                - self._song_vector(snapshot, user_preferences),
+                axis=1
+            )
+            # Each artist's first nearest track, as argmin picks in find_best_song
+            order = np.lexsort(
+                (np.arange(len(track_rows)), distances, track_artists)
+            )
+            first = order[np.unique(track_artists[order], return_index=True)[1]]
+            best = dict(zip(
+                track_artists[first].tolist(),
+                self._snapshot_songs(snapshot, track_rows[first], track_artists[first]),
+            ))
+            songs = [best.get(row) for row in artist_rows]
+        for i, (artist_id, row) in enumerate(zip(artist_ids, artist_rows)):
+            if row is None:
+                songs[i] = self._find_best_song_sql(artist_id, user_preferences, filters)
+        return songs
+
+    @staticmethod
+    def _song_vector(snapshot, user_preferences: UserPreferences) -> np.ndarray:
+        """Preferences in the normalized space of the snapshot's track features."""
+        features = snapshot.manifest["song_features"]
+        return normalize_song_features(
+            [getattr(user_preferences, f) for f in features], features
+        )
+
+    def _snapshot_songs(
+        self, snapshot, track_rows: Sequence[int], artist_rows: Sequence[int]
+    ) -> List[Optional[Song]]:
+        """Songs for rows of the snapshot's track store, credited to artists."""
+        artist_names = snapshot.artist_profiles["artist_name"]
+        return self._songs_by_rowid(
+            [int(snapshot.track_rowids[row]) for row in track_rows],
+            [str(artist_names.iloc[row]) for row in artist_rows],
+            [snapshot.track_ids.iloc[row] for row in track_rows]
+        )
+
+    def _songs_by_rowid(
+        self,
+        track_rowids: Sequence[int],
+        artist_names: Sequence[str],
+        track_ids: Optional[Sequence[str]] = None
+    ) -> List[Optional[Song]]:
+        """Fetch track details in one query; None where a row is not the
+        expected track (the database changed underneath the snapshot)."""
+        if not track_rowids:
+            return []
+        query = GET_TRACK_DETAILS_BY_ROWIDS.format(
+            placeholders=", ".join("?" * len(track_rowids))
+        )
+        try:
+            with self.get_connection() as conn:
+                tracks = {
+                    row[0]: row[1:]
+                    for row in conn.execute(query, tuple(track_rowids)).fetchall()
+                }
+        except sqlite3.Error as e:
+            print(f"Error finding best song: {str(e)}")
+            return [None] * len(track_rowids)
+
+        songs = []
+        for i, (rowid, artist_name) in enumerate(zip(track_rowids, artist_names)):
+            track = tracks.get(rowid)
+            if track is None or (track_ids is not None and track[0] != track_ids[i]):
+                songs.append(None)
+                continue
+            _, track_name, popularity, track_url, uri, album_name, album_image_url = track
+            songs.append(Song(
+                track_name=str(track_name),
+                artist_name=artist_name,
+                album_image_url=str(album_image_url),
+                album_name=str(album_name),
+                popularity=int(popularity),
+                uri=str(uri),
+                track_external_url=str(track_url)
+            ))
+        return songs
+
+    def find_best_songs(
+        self,
+        user_preferences: UserPreferences,
+        k: int = 10,
+        filters: Optional[RecommendationFilters] = None,
+        max_artists: Optional[int] = None,
+        quantized: bool = True
+    ) -> List[Song]:
+        """Best matching songs across the whole catalog, best first.
+
+        With the snapshot, every track is scanned over its resident uint8
+        codes and the few that could still place are re-ranked exactly from
+        the file. Without ``quantized``, or with ``max_artists``, a two-stage
+        search scores only the tracks of the artists whose track centroids
+        could hold a match (``max_artists`` caps how many, trading exactness
+        for latency). Without the snapshot every track is scored from SQLite.
+        """
+        filters = filters or RecommendationFilters()
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return self._find_best_songs_sql(user_preferences, k, filters)
+
+        query = self._song_vector(snapshot, user_preferences)
+        if quantized and max_artists is None:
+            track_rows, artist_rows, _ = snapshot.scan_tracks(query, k, filters)
+        else:
+            track_rows, artist_rows, _ = snapshot.best_tracks(
+                query, k, filters, max_artists
+            )
+        songs = self._snapshot_songs(snapshot, track_rows, artist_rows)
+        return [song for song in songs if song is not None]
+
+    def _find_best_songs_sql(
+        self,
+        user_preferences: UserPreferences,
+        k: int,
+        filters: RecommendationFilters
+    ) -> List[Song]:
+        """Brute-force catalog-wide song search over every track in SQLite."""
+        query = GET_TRACK_FEATURE_STORE + "WHERE 1 = 1"
+        params = ()
+        if filters.genre is not None:
+            query += """
+            AND t.track_id IN (
+                SELECT track_id FROM track_genres WHERE track_genre = ?
+            )"""
+            params += (filters.genre,)
+        if filters.duration_range is not None:
+            query += """
+            AND t.duration_ms BETWEEN ? AND ?"""
+            low, high = filters.duration_range
+            params += (low * 60000, high * 60000)
+        try:
+            with self.get_connection() as conn:
+                tracks = pd.read_sql_query(query, conn, params=params)
+        except Exception as e:
+            print(f"Error finding best songs: {str(e)}")
+            return []
+
+        if filters.popularity_range is not None:
+            artist_profiles = self.get_artist_profiles()
+            rows = self.filter_artist_rows(
+                artist_profiles,
+                RecommendationFilters(popularity_range=filters.popularity_range)
+            )
+            tracks = tracks[
+                tracks["artist_id"].isin(artist_profiles["artist_id"].iloc[rows])
+            ]
+        distances = np.linalg.norm(
+            normalize_song_features(tracks[SONG_FEATURES].to_numpy())
+            - normalize_song_features(
+                [getattr(user_preferences, f) for f in SONG_FEATURES]
+            ),
+            axis=1
+        )
+        best = (
+            tracks.assign(distance=distances)
+            .sort_values(["distance", "track_rowid"], kind="stable")
+            .drop_duplicates("track_rowid")
+            .head(k)
+        )
+        if best.empty:
+            return []
+        # Every track row joined artists, so each id has a name there, with
+        # or without an artist_profiles row
+        artist_ids = best["artist_id"].unique().tolist()
+        query = GET_ARTIST_NAMES.format(placeholders=", ".join("?" * len(artist_ids)))
+        try:
+            with self.get_connection() as conn:
+                names = dict(conn.execute(query, artist_ids).fetchall())
+        except sqlite3.Error as e:
+            print(f"Error finding best songs: {str(e)}")
+            return []
+        songs = self._songs_by_rowid(
+            best["track_rowid"].astype(int).tolist(),
+            [str(names.get(artist_id)) for artist_id in best["artist_id"]]
+        )
+        return [song for song in songs if song is not None]
+
+    def _find_best_song_sql(
+        self, 
+        artist_id: int, 
+        user_preferences: UserPreferences,
+        filters: Optional[RecommendationFilters] = None
     ) -> Optional[Song]:
         """Find best matching song with proper Series handling."""
+        filters = filters or RecommendationFilters()
         try:
             with self.get_connection() as conn:
                 query = """
@@ -63,19 +709,30 @@ class Database:
                 JOIN albums a ON t.album_id = a.album_id
                 WHERE ar.artist_id = ?
                 """
-                songs_df = pd.read_sql_query(query, conn, params=(artist_id,))
+                params = (artist_id,)
+                if filters.genre is not None:
+                    query += """
+                AND t.track_id IN (
+                    SELECT track_id FROM track_genres WHERE track_genre = ?
+                )
+                """
+                    params += (filters.genre,)
+                if filters.duration_range is not None:
+                    query += """
+                AND t.duration_ms BETWEEN ? AND ?
+                """
+                    low, high = filters.duration_range
+                    params += (low * 60000, high * 60000)
+                songs_df = pd.read_sql_query(query, conn, params=params)
                 
                 if songs_df.empty:
                     return None
 
                 # Calculate similarity using vectorized operations
-                features = [
-                    "danceability", "energy", "acousticness",
-                    "instrumentalness", "liveness", "valence", "loudness"
-                ]
+                features = SONG_FEATURES
                 
-                song_vectors = songs_df[features].values
-                pref_vector = np.array([
+                song_vectors = normalize_song_features(songs_df[features].values)
+                pref_vector = normalize_song_features([
                     getattr(user_preferences, f) for f in features
                 ])
                 
@@ -104,39 +761,94 @@ class Database:
         artist_profiles: pd.DataFrame, 
         selected_artist_profile: Union[Dict, UserPreferences], 
         k: int = 10, 
-        epsilon: float = 1
+        epsilon: float = 1,
+        candidate_rows: Optional[np.ndarray] = None
     ) -> pd.DataFrame:
-        """Find similar artists with better user preferences handling."""
-        features = [
-            "danceability", "energy", "acousticness",
-            "instrumentalness", "liveness", "valence"
-        ]
+        """Find similar artists with better user preferences handling.
+
+        ``candidate_rows`` (sorted positions, e.g. the artists passing the
+        recommendation filters) limits the scan to those rows; ties still
+        break by position.
+        """
+        features = PROFILE_FEATURES
         
         # Handle both Dict and UserPreferences inputs
         if isinstance(selected_artist_profile, UserPreferences):
             profile_vector = np.array([
                 getattr(selected_artist_profile, f) for f in features
-            ])
+            ], dtype=np.float32)
             current_artist_name = None  # No artist to exclude for user preferences
         else:
             profile_vector = np.array([
                 selected_artist_profile[f] for f in features
-            ])
+            ], dtype=np.float32)
             current_artist_name = selected_artist_profile.get('artist_name')
         
-        # Filter out current artist if it exists
-        if current_artist_name:
-            artist_profiles = artist_profiles[
-                artist_profiles['artist_name'] != current_artist_name
-            ].copy()
-            
-        artist_vectors = artist_profiles[features].values
+        artist_vectors = artist_feature_matrix(artist_profiles)
+        artist_names = artist_profiles["artist_name"]
+        excluded = None
+        if (
+            candidate_rows is not None
+            and len(candidate_rows) > DENSE_CANDIDATE_FRACTION * len(artist_profiles)
+        ):
+            excluded = np.ones(len(artist_profiles), dtype=bool)
+            excluded[candidate_rows] = False
+            candidate_rows = None
+        if candidate_rows is not None:
+            artist_vectors = artist_vectors[candidate_rows]
+            artist_names = artist_names.iloc[candidate_rows]
         
         # Compute similarities
         differences = artist_vectors - profile_vector
         distances = np.sqrt(np.sum(differences ** 2, axis=1))
         similarities = 1 / (epsilon + distances)
-        
-        artist_profiles = artist_profiles.copy()
-        artist_profiles["similarity"] = similarities
-        return artist_profiles.nlargest(k, "similarity")
\ No newline at end of file
+        if excluded is not None:
+            similarities[excluded] = -np.inf
+
+        # Mask out the current artist instead of copying the shared catalog
+        if current_artist_name:
+            similarities[(artist_names == current_artist_name).to_numpy()] = -np.inf
+
+        top_positions = top_k_positions(similarities, k)
+        top_positions = top_positions[np.isfinite(similarities[top_positions])]
+        top_rows = (
+            top_positions if candidate_rows is None else candidate_rows[top_positions]
+        )
+
+        # Only the k selected rows are materialized
+        top_artists = artist_profiles.iloc[top_rows].copy()
+        top_artists["similarity"] = similarities[top_positions]
+        return top_artists
+
+    def find_top_k_artists_batch(
+        self,
+        artist_profiles: pd.DataFrame,
+        preferences: Union[Sequence[UserPreferences], np.ndarray],
+        k: int = 10,
+        epsilon: float = 1,
+        candidate_rows: Optional[np.ndarray] = None,
+        workers: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k artists for many preference vectors at once, for offline jobs.
+
+        ``preferences`` is a list of ``UserPreferences`` or an (n_users, d)
+        matrix of ``PROFILE_FEATURES``. Row i of the returned (artist ids,
+        similarities) arrays matches ``find_top_k_artists`` for user i;
+        ``workers`` spreads the blocks over a process pool.
+        """
+        from similarity import batch_top_k
+
+        artist_vectors = artist_feature_matrix(artist_profiles)
+        if candidate_rows is not None:
+            artist_vectors = artist_vectors[candidate_rows]
+        rows, similarities = batch_top_k(
+            preference_matrix(preferences),
+            artist_vectors,
+            k,
+            epsilon=epsilon,
+            workers=workers
+        )
+        if candidate_rows is not None:
+            rows = candidate_rows[rows]
+        artist_ids = artist_profiles["artist_id"].to_numpy(dtype=object)
+        return artist_ids[rows], similarities
@@ -0,0 +1,215 @@
+"""Bulk load of the normalized CSVs into the music database.
+
+Replaces the ``pd.read_csv(...).to_sql(...)`` cells of
+``notebooks/prepare_data.ipynb``. Each CSV is streamed in blocks by
+pyarrow's incremental reader, so no table is ever held whole, and inserted
+with ``executemany``, one transaction per table, with journaling
+and syncing off while the load runs. The load goes to a scratch file that
+replaces the database only once complete, so turning them off risks
+nothing. Indexes, the artist sums behind ``artist_profiles`` and
+``genre_profiles`` are built after the data is in, and the result is gzipped into the asset ``Database``
+decompresses on startup.
+
+    python src/etl.py --csv-dir src/assets --db src/assets/music_data.db
+"""
+import argparse
+import gzip
+import logging
+import os
+import resource
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+from queries import BUILD_GENRE_PROFILES
+from schema import (
+    CREATE_INDEXES,
+    CREATE_TABLES,
+    TABLE_COLUMNS,
+    UNIQUE_KEYS,
+    create_artist_profiles,
+    declared_types,
+    insert_statement,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+# Bytes of CSV parsed and inserted per executemany call
+CHUNK_BYTES = 1 << 20
+# Only for the load; the finished database is journaled normally
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-65536",
+]
+GZIP_LEVEL = 6
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_table(
+    conn: sqlite3.Connection, table: str, csv_path: Path, chunk_bytes: int = CHUNK_BYTES
+) -> int:
+    """Insert a CSV into ``table`` block by block; returns the rows loaded.
+
+    Only the table's schema columns are read; ones the CSV lacks are NULL,
+    as are empty fields, which is how ``pd.read_csv`` reads them too.
+    Columns the schema declares TEXT are read as strings: pyarrow infers
+    types from the first block, which would turn all-numeric ids or
+    all-``YYYY-MM-DD`` dates into numbers or dates that later blocks break.
+    Derived columns (album release years) are computed by the INSERT.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    columns = TABLE_COLUMNS[table]
+    text_columns = [c for c, t in declared_types(table).items() if t == "TEXT"]
+    reader = csv.open_csv(
+        csv_path,
+        read_options=csv.ReadOptions(block_size=chunk_bytes),
+        convert_options=csv.ConvertOptions(
+            include_columns=columns,
+            include_missing_columns=True,
+            column_types={c: pa.string() for c in text_columns},
+            strings_can_be_null=True,
+        ),
+    )
+    insert = insert_statement(table)
+    rows = 0
+    with conn:
+        for batch in reader:
+            conn.executemany(insert, zip(*(column.to_pylist() for column in batch.columns)))
+            rows += batch.num_rows
+    return rows
+
+
+def compress(db_path: Path) -> Path:
+    """Gzip ``db_path`` next to itself, replacing any previous asset atomically."""
+    compressed_path = Path(f"{db_path}.gz")
+    tmp_path = Path(f"{compressed_path}.{os.getpid()}.tmp")
+    with open(db_path, "rb") as db_file:
+        with gzip.open(tmp_path, "wb", compresslevel=GZIP_LEVEL) as compressed_file:
+            shutil.copyfileobj(db_file, compressed_file, length=1 << 20)
+    os.replace(tmp_path, compressed_path)
+    return compressed_path
+
+
+@contextmanager
+def scratch_database(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """A connection to a new database with empty tables, for a bulk load.
+
+    The load runs with ``LOAD_PRAGMAS`` into a scratch file next to
+    ``db_path``, which replaces ``db_path`` once the block completes; if
+    the block raises, the scratch file is removed and ``db_path`` is left
+    as it was.
+    """
+    tmp_path = Path(f"{db_path}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        conn.executescript(CREATE_TABLES)
+        yield conn
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def drop_duplicate_keys(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Keep the first row of each unique key; returns the rows dropped per table.
+
+    The notebook's tracks.csv joins tracks to albums by name, so albums
+    sharing a name repeat their tracks' ids.
+    """
+    dropped = {}
+    with conn:
+        for table, key in UNIQUE_KEYS.items():
+            dropped[table] = conn.execute(
+                f"DELETE FROM {table} WHERE rowid NOT IN "
+                f"(SELECT MIN(rowid) FROM {table} GROUP BY {', '.join(key)})"
+            ).rowcount
+    return dropped
+
+
+def finish_load(conn: sqlite3.Connection, timings: Dict[str, float]) -> None:
+    """Build the indexes and profiles over loaded tables, timing each step."""
+    start = time.perf_counter()
+    try:
+        conn.executescript(CREATE_INDEXES)
+    # Only a load with repeated keys pays for the dedupe
+    except sqlite3.IntegrityError as e:
+        dropped = {t: n for t, n in drop_duplicate_keys(conn).items() if n}
+        logger.warning(f"{e}; dropped rows repeating a key: {dropped}")
+        conn.executescript(CREATE_INDEXES)
+    timings["indexes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    create_artist_profiles(conn)
+    with conn:
+        conn.execute(BUILD_GENRE_PROFILES)
+    timings["profiles"] = time.perf_counter() - start
+    conn.execute("PRAGMA journal_mode=DELETE")
+
+
+def run_etl(
+    csv_dir: Path,
+    db_path: Path,
+    chunk_bytes: int = CHUNK_BYTES,
+    gzip_asset: bool = True,
+) -> Dict[str, float]:
+    """Build ``db_path`` from ``<table>.csv`` files in ``csv_dir``.
+
+    Returns seconds per step and row counts per table, plus the peak RSS.
+    """
+    timings: Dict[str, float] = {}
+    with scratch_database(db_path) as conn:
+        for table in TABLE_COLUMNS:
+            start = time.perf_counter()
+            timings[f"{table} rows"] = load_table(
+                conn, table, Path(csv_dir) / f"{table}.csv", chunk_bytes
+            )
+            timings[f"load {table}"] = time.perf_counter() - start
+            logger.info(f"Loaded {timings[f'{table} rows']} rows into {table}")
+        finish_load(conn, timings)
+
+    if gzip_asset:
+        start = time.perf_counter()
+        compress(db_path)
+        timings["gzip"] = time.perf_counter() - start
+    timings["peak RSS MiB"] = peak_rss_mb()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the normalized CSVs into SQLite")
+    parser.add_argument("--csv-dir", default=str(BASE_DIR / "assets"))
+    parser.add_argument("--db", default=str(BASE_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    parser.add_argument("--no-gzip", action="store_true", help="skip the .gz asset")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    start = time.perf_counter()
+    timings = run_etl(
+        Path(args.csv_dir), Path(args.db), args.chunk_mb << 20, not args.no_gzip
+    )
+    for step, value in timings.items():
+        logger.info(f"{step}: {value:.2f}" if isinstance(value, float) else f"{step}: {value}")
+    logger.info(f"Total: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
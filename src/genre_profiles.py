@@ -1,17 +1,33 @@
-from pydantic import BaseModel
-from typing import Dict
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from database import BINARY_FEATURES, PROFILE_FEATURES, Database
+from models import UserPreferences
 
 class GenreProfile(BaseModel):
     name: str
     description: str
     features: Dict[str, float]
     icon: str
+    genre: Optional[str] = None  # track_genres value, for data-driven presets
+    track_count: int = 0
+    spread: Dict[str, float] = Field(default_factory=dict)
+
+    class Config:
+        frozen = True
 
 class GenreProfileManager:
     @staticmethod
-    def get_profiles() -> Dict[str, GenreProfile]:
-        """Initialize preset genre profiles with binary values for acousticness, instrumentalness, and liveness."""
-        return {
+    @lru_cache(maxsize=1)
+    def get_profiles() -> Mapping[str, GenreProfile]:
+        """Built-in preset genre profiles with binary values for acousticness, instrumentalness, and liveness."""
+        return MappingProxyType({
             "Pop": GenreProfile(
                 name="Pop",
                 description="Catchy melodies with high production values and contemporary sound",
@@ -337,4 +353,110 @@ class GenreProfileManager:
                 },
                 icon="💎"
             )
-        }
\ No newline at end of file
+        })
+
+
+def _genre_key(name: str) -> str:
+    """Case- and punctuation-insensitive genre name, e.g. "Hip Hop" -> "hiphop"."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+class GenreRegistry:
+    """Immutable set of genre presets, most common genres first.
+
+    Built once per process from the ``genre_profiles`` table and shared by the
+    genre selector and the recommendation warmup. Genres that match a built-in
+    preset keep its name, icon and description; presets the catalog lacks
+    follow the catalog's genres unchanged.
+    """
+
+    def __init__(self, profiles: Iterable[GenreProfile]):
+        self.profiles: Mapping[str, GenreProfile] = MappingProxyType(
+            {profile.name: profile for profile in profiles}
+        )
+        self.names = tuple(self.profiles)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def __getitem__(self, name: str) -> GenreProfile:
+        return self.profiles[name]
+
+    def top(self, n: int) -> List[GenreProfile]:
+        """The n genres with the most tracks."""
+        return [self.profiles[name] for name in self.names[:n]]
+
+    def preferences(self, name: str) -> UserPreferences:
+        return UserPreferences(**self.profiles[name].features)
+
+    @classmethod
+    def from_frame(
+        cls,
+        genre_profiles: pd.DataFrame,
+        presets: Optional[Mapping[str, GenreProfile]] = None
+    ) -> "GenreRegistry":
+        """Registry from ``Database.get_genre_profiles`` rows.
+
+        Centroids are snapped to what the preferences panel can express:
+        binary features to their mode, the rest to the slider steps. Presets
+        with no matching genre are kept, after the catalog's genres.
+        """
+        presets = GenreProfileManager.get_profiles() if presets is None else presets
+        by_key = {_genre_key(name): preset for name, preset in presets.items()}
+
+        features = {}
+        for feature in PROFILE_FEATURES:
+            values = genre_profiles[feature].to_numpy(dtype=float)
+            if feature in BINARY_FEATURES:
+                features[feature] = (values > 0.5).astype(float)
+            else:
+                features[feature] = np.clip(np.round(values, 2), 0.0, 1.0)
+        features["loudness"] = np.clip(
+            np.round(genre_profiles["loudness"].to_numpy(dtype=float) * 2) / 2,
+            -30.0, 0.0
+        )
+        spread_columns = [c for c in genre_profiles.columns if c.endswith("_std")]
+        spreads = genre_profiles[spread_columns].round(4).to_dict(orient="records")
+
+        profiles = []
+        for i, (genre, track_count) in enumerate(
+            zip(genre_profiles["track_genre"], genre_profiles["track_count"])
+        ):
+            # Only the most common spelling of a preset's genre takes it over
+            preset = by_key.pop(_genre_key(str(genre)), None)
+            profiles.append(GenreProfile(
+                name=preset.name if preset else str(genre),
+                description=(
+                    preset.description if preset
+                    else f"Average of {int(track_count):,} tracks"
+                ),
+                features={
+                    feature: float(values[i]) for feature, values in features.items()
+                    if not np.isnan(values[i])
+                },
+                icon=preset.icon if preset else "🎵",
+                genre=str(genre),
+                track_count=int(track_count),
+                spread={
+                    column[:-len("_std")]: float(value)
+                    for column, value in spreads[i].items()
+                    if pd.notna(value)
+                },
+            ))
+        names = {profile.name for profile in profiles}
+        profiles.extend(
+            preset for preset in by_key.values() if preset.name not in names
+        )
+        return cls(profiles)
+
+    @classmethod
+    def load(cls, database: Database) -> "GenreRegistry":
+        """Registry from the database's genres, or the built-in presets."""
+        genre_profiles = database.get_genre_profiles()
+        if genre_profiles is None:
+            return cls.from_presets()
+        return cls.from_frame(genre_profiles)
+
+    @classmethod
+    def from_presets(cls) -> "GenreRegistry":
+        """Registry of the built-in presets, for databases without genres."""
+        return cls(GenreProfileManager.get_profiles().values())
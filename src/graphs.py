@@ -194,8 +194,7 @@ class GraphDisplay:
         except Exception as e:
             st.error(f"Error displaying visualization: {str(e)}")
 
-def display_saved_graphs():
-    database = Database()
+def display_saved_graphs(database: Database):
     graph_manager = GraphManager(database)
     graph_display = GraphDisplay(graph_manager)
     graph_display.display_graphs()
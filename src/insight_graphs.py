@@ -0,0 +1,618 @@
+"""Incremental, parallel build of the Data Insights graphs.
+
+Replaces ``generate_all_graphs`` of ``notebooks/prepare_data.ipynb``, which
+read every track of the top artists into pandas to draw the HTML files
+``GraphManager`` shows. Each graph is a ``GraphTask``: the named SQL inputs
+it reads and the function that draws it. Per-artist and per-year series and
+the success profile are aggregated by SQL, so only the rows a plot shows
+reach pandas. Inputs and graphs run in a process pool: every input a stale
+graph needs is read once, on a read-only connection, and each graph is
+drawn as soon as its inputs are in.
+
+A manifest next to the graphs records, for each one, the digest of the
+database and of its code: its draw function, the functions and constants
+of this module that uses, its SQL and the plotly version. Graphs whose
+entry still matches, and whose file exists, are not rebuilt.
+
+    python src/insight_graphs.py --db src/assets/music_data.db --workers 4
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from importlib.metadata import version
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from database import Database
+from queries import (
+    GET_ARTIST_CONSISTENCY,
+    GET_EXPLICIT_RATIOS,
+    GET_INSIGHT_TOP_ARTISTS,
+    GET_POPULARITY_TRENDS,
+    GET_RELEASE_TIMELINE,
+    GET_SUCCESS_PROFILE,
+    GET_TOP_ARTIST_TRACKS,
+)
+from snapshot import source_digest
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+GRAPHS_DIR = BASE_DIR / "assets" / "graphs"
+MANIFEST_NAME = "manifest.json"
+
+TOP_ARTISTS = 25
+# Named inputs of the tasks: SQL and its parameters
+INPUTS = {
+    "top_artists": (GET_INSIGHT_TOP_ARTISTS, (TOP_ARTISTS,)),
+    "tracks": (GET_TOP_ARTIST_TRACKS, (TOP_ARTISTS,)),
+    "consistency": (GET_ARTIST_CONSISTENCY, (TOP_ARTISTS,)),
+    "timeline": (GET_RELEASE_TIMELINE, (TOP_ARTISTS,)),
+    "trends": (GET_POPULARITY_TRENDS, (TOP_ARTISTS,)),
+    "explicit": (GET_EXPLICIT_RATIOS, (TOP_ARTISTS,)),
+    "success": (GET_SUCCESS_PROFILE, (TOP_ARTISTS,)),
+}
+
+FEATURE_COLUMNS = [
+    "avg_danceability", "avg_energy", "avg_acousticness",
+    "avg_instrumentalness", "avg_liveness", "avg_valence",
+]
+FEATURE_LABELS = {
+    "avg_danceability": "Danceability",
+    "avg_energy": "Energy",
+    "avg_acousticness": "Acoustic",
+    "avg_instrumentalness": "Instrumental",
+    "avg_liveness": "Live",
+    "avg_valence": "Mood",
+}
+SUCCESS_FEATURES = ["danceability", "energy", "valence", "acousticness", "liveness"]
+# The network layout is random; a fixed seed keeps rebuilds identical
+LAYOUT_SEED = 42
+LAYOUT = dict(
+    template="plotly_dark",
+    plot_bgcolor="rgba(0,0,0,0)",
+    paper_bgcolor="rgba(0,0,0,0)",
+    height=700,
+)
+
+
+def similarity_matrix(top_artists: pd.DataFrame) -> np.ndarray:
+    """Cosine similarities of the standardized artist features.
+
+    Same as sklearn's ``StandardScaler`` then ``cosine_similarity``, without
+    importing sklearn into every worker.
+    """
+    features = top_artists[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    spread = features.std(axis=0)
+    features = (features - features.mean(axis=0)) / np.where(spread == 0, 1, spread)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    features = features / np.where(norms == 0, 1, norms)
+    return features @ features.T
+
+
+def most_similar(similarities: np.ndarray, row: int) -> np.ndarray:
+    """The three most similar other artists, least similar first."""
+    return np.argsort(similarities[row])[-4:-1]
+
+
+def common_features(first: pd.Series, second: pd.Series, threshold: float = 0.1) -> str:
+    common = [
+        label for column, label in FEATURE_LABELS.items()
+        if abs(first[column] - second[column]) < threshold
+    ]
+    return ", ".join(common) if common else "Different styles"
+
+
+def draw_similarity_network(top_artists: pd.DataFrame):
+    import networkx as nx
+    import plotly.graph_objects as go
+
+    similarities = similarity_matrix(top_artists)
+    names = top_artists["artist_name"]
+    graph = nx.Graph()
+    for _, artist in top_artists.iterrows():
+        graph.add_node(
+            artist["artist_name"],
+            popularity=artist["artist_popularity"],
+            followers=artist["artist_followers"],
+        )
+    for i in range(len(similarities)):
+        for j in most_similar(similarities, i):
+            if similarities[i][j] > 0.7:
+                graph.add_edge(names.iloc[i], names.iloc[j], weight=similarities[i][j])
+    pos = nx.spring_layout(
+        graph, k=1 / np.sqrt(len(graph.nodes())), iterations=50, seed=LAYOUT_SEED
+    )
+
+    fig = go.Figure()
+    edge_x, edge_y = [], []
+    for source, target in graph.edges():
+        edge_x.extend([pos[source][0], pos[target][0], None])
+        edge_y.extend([pos[source][1], pos[target][1], None])
+    fig.add_trace(go.Scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=1, color="rgba(150,150,150,0.5)"),
+        hoverinfo="none",
+        mode="lines",
+    ))
+    for node in graph.nodes():
+        x, y = pos[node]
+        artist = top_artists[names == node].iloc[0]
+        fig.add_layout_image(dict(
+            source=artist["artist_image_url"],
+            x=x, y=y, xref="x", yref="y",
+            sizex=0.15, sizey=0.15,
+            sizing="contain", opacity=1, layer="above",
+        ))
+        fig.add_trace(go.Scatter(
+            x=[x], y=[y],
+            mode="markers",
+            marker=dict(size=1, opacity=0),
+            text=artist["artist_name"],
+            hovertext=(
+                f"Artist: {artist['artist_name']}<br>"
+                f"Popularity: {artist['artist_popularity']:.2f}<br>"
+                f"Followers: {artist['artist_followers']:,}<br>"
+                f"Tracks: {artist['track_count']}"
+            ),
+            hoverinfo="text",
+            showlegend=False,
+        ))
+        fig.add_annotation(
+            x=x, y=y - 0.1,
+            text=artist["artist_name"],
+            showarrow=False,
+            font=dict(color="white", size=10),
+            xanchor="center", yanchor="top",
+        )
+    axis = dict(showgrid=False, zeroline=False, showticklabels=False, range=[-1.5, 1.5])
+    fig.update_layout(
+        title="Artist Similarity Network<br>(Images: Artists, Connections: Musical Similarity)",
+        showlegend=False,
+        hovermode="closest",
+        margin=dict(b=20, l=5, r=5, t=40),
+        xaxis=axis,
+        yaxis=dict(axis, scaleanchor="x", scaleratio=1),
+    )
+    return fig
+
+
+def draw_similarity_table(top_artists: pd.DataFrame):
+    import plotly.graph_objects as go
+
+    similarities = similarity_matrix(top_artists)
+    features = top_artists[FEATURE_COLUMNS]
+    pairs = [
+        {
+            "Artist": top_artists["artist_name"].iloc[i],
+            "Similar Artist": top_artists["artist_name"].iloc[j],
+            "Similarity Score": similarities[i][j].round(3),
+            "Features in Common": common_features(features.iloc[i], features.iloc[j]),
+        }
+        for i in range(len(similarities))
+        for j in most_similar(similarities, i)
+    ]
+    table = pd.DataFrame(pairs)
+    fig = go.Figure(data=[go.Table(
+        header=dict(
+            values=list(table.columns), fill_color="darkblue", align="left",
+            font=dict(color="white", size=12),
+        ),
+        cells=dict(
+            values=[table[column] for column in table.columns], fill_color="darkblue",
+            align="left", font=dict(color="white", size=11),
+        ),
+    )])
+    fig.update_layout(title="Top Similar Artists Pairs")
+    return fig
+
+
+def draw_similarity_heatmap(top_artists: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.imshow(
+        similarity_matrix(top_artists),
+        x=top_artists["artist_name"],
+        y=top_artists["artist_name"],
+        title="Artist Similarity Heatmap",
+        color_continuous_scale="Viridis",
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+def draw_feature_space(top_artists: pd.DataFrame):
+    import plotly.express as px
+
+    return px.scatter_3d(
+        top_artists,
+        x="avg_danceability", y="avg_energy", z="avg_valence",
+        color="artist_popularity",
+        text="artist_name",
+        title="Artist Feature Space",
+    )
+
+
+def draw_top_artists(top_artists: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.bar(
+        top_artists,
+        x="artist_name",
+        y=["artist_popularity", "avg_track_popularity"],
+        title="Top 25 Artists: Popularity Metrics",
+        barmode="group",
+        labels={
+            "artist_popularity": "Artist Popularity",
+            "avg_track_popularity": "Average Track Popularity",
+        },
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+def draw_success_metrics(top_artists: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.scatter(
+        top_artists,
+        x="artist_popularity",
+        y="artist_followers",
+        size="track_count",
+        text="artist_name",
+        title="Artist Success Metrics",
+        labels={
+            "artist_followers": "Follower Count",
+            "artist_popularity": "Popularity Score",
+            "track_count": "Number of Tracks",
+        },
+    )
+    fig.update_layout(yaxis_type="log")
+    return fig
+
+
+def draw_top_artists_radar(top_artists: pd.DataFrame):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for _, artist in top_artists.head(5).iterrows():
+        fig.add_trace(go.Scatterpolar(
+            r=[artist[column] for column in FEATURE_COLUMNS],
+            theta=FEATURE_COLUMNS,
+            fill="toself",
+            name=artist["artist_name"],
+        ))
+    fig.update_layout(title="Top 5 Artists Audio Features")
+    return fig
+
+
+def draw_feature_distributions(tracks: pd.DataFrame):
+    import plotly.express as px
+
+    return px.violin(
+        tracks.melt(
+            id_vars=["artist_name"],
+            value_vars=["danceability", "energy", "valence", "acousticness"],
+        ),
+        x="variable",
+        y="value",
+        title="Audio Feature Distributions",
+        box=True,
+    )
+
+
+def draw_energy_valence(tracks: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.scatter(
+        tracks,
+        x="energy",
+        y="valence",
+        color="artist_name",
+        hover_data=["track_name"],
+        title="Energy-Valence Distribution",
+    )
+    fig.add_hline(y=0.5, line_dash="dash")
+    fig.add_vline(x=0.5, line_dash="dash")
+    return fig
+
+
+def draw_consistency(consistency: pd.DataFrame, feature: str):
+    import plotly.express as px
+
+    consistency = consistency.assign(
+        **{f"{feature}_std": np.sqrt(consistency[f"var_{feature}"].clip(lower=0))}
+    )
+    return px.scatter(
+        consistency,
+        x=f"avg_{feature}",
+        y=f"{feature}_std",
+        text="artist_name",
+        title=f"Artist {feature.title()} Consistency",
+        color="artist_popularity",
+    )
+
+
+def draw_release_timeline(timeline: pd.DataFrame):
+    import plotly.express as px
+
+    return px.line(
+        timeline, x="release_year", y="tracks", color="artist_name",
+        title="Artist Release Timeline",
+    )
+
+
+def draw_popularity_trends(trends: pd.DataFrame):
+    import plotly.express as px
+
+    return px.line(
+        trends, x="release_year", y=["popularity", "artist_popularity"],
+        title="Popularity Trends Over Time",
+    )
+
+
+def draw_duration_analysis(tracks: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.violin(
+        tracks, x="artist_name", y="duration_minutes",
+        title="Track Duration Distribution", points="all",
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+def draw_explicit_content(explicit: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.bar(
+        explicit, x="artist_name", y="explicit_ratio",
+        title="Explicit Content Ratio by Artist",
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+def draw_success_formula(success: pd.DataFrame):
+    import plotly.graph_objects as go
+
+    # NULL (NaN) throughout when no track is above the cutoff
+    profile = success.iloc[0].astype(float)
+    means = [round(profile[f"avg_{f}"], 3) for f in SUCCESS_FEATURES]
+    stds = [round(np.sqrt(np.clip(profile[f"var_{f}"], 0, None)), 3) for f in SUCCESS_FEATURES]
+    fig = go.Figure(data=[go.Table(
+        header=dict(
+            values=["Feature", "Mean", "Standard Deviation"], fill_color="darkblue",
+            align="left", font=dict(color="white", size=12),
+        ),
+        cells=dict(
+            values=[SUCCESS_FEATURES, means, stds], fill_color="darkblue",
+            align="left", font=dict(color="white", size=11),
+        ),
+    )])
+    fig.update_layout(title="Success Formula: Characteristics of Top Tracks", height=400)
+    return fig
+
+
+def draw_track_popularity(tracks: pd.DataFrame):
+    import plotly.express as px
+
+    fig = px.box(
+        tracks, x="artist_name", y="popularity",
+        title="Track Popularity Distribution by Artist", points="all",
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+class GraphTask:
+    """One graph file: the inputs it reads and the function drawing it.
+
+    ``draw`` takes the inputs' frames in order and returns a plotly figure.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], draw: Callable):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.draw = draw
+
+    @property
+    def file(self) -> str:
+        return f"{self.name}.html"
+
+    def code_digest(self) -> str:
+        parts = _code_parts(self.draw, set()) + _code_parts(write_graph, set())
+        parts += [f"{INPUTS[name][0]}{INPUTS[name][1]!r}" for name in self.inputs]
+        parts.append(version("plotly"))
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+TASKS = [
+    GraphTask("artist_similarity_network", ["top_artists"], draw_similarity_network),
+    GraphTask("artist_similarity_table", ["top_artists"], draw_similarity_table),
+    GraphTask("similarity_heatmap", ["top_artists"], draw_similarity_heatmap),
+    GraphTask("feature_space_clustering", ["top_artists"], draw_feature_space),
+    GraphTask("top_artists", ["top_artists"], draw_top_artists),
+    GraphTask("artist_success_metrics", ["top_artists"], draw_success_metrics),
+    GraphTask("top_artists_radar", ["top_artists"], draw_top_artists_radar),
+    GraphTask("feature_distributions", ["tracks"], draw_feature_distributions),
+    GraphTask("energy_valence_quadrants", ["tracks"], draw_energy_valence),
+    *(
+        GraphTask(f"artist_consistency_{feature}", ["consistency"],
+                  partial(draw_consistency, feature=feature))
+        for feature in ["danceability", "energy", "valence"]
+    ),
+    GraphTask("release_timeline", ["timeline"], draw_release_timeline),
+    GraphTask("popularity_trends", ["trends"], draw_popularity_trends),
+    GraphTask("duration_analysis", ["tracks"], draw_duration_analysis),
+    GraphTask("explicit_content", ["explicit"], draw_explicit_content),
+    GraphTask("success_formula", ["success"], draw_success_formula),
+    GraphTask("track_popularity_dist", ["tracks"], draw_track_popularity),
+]
+TASKS_BY_NAME = {task.name: task for task in TASKS}
+
+
+def _code_parts(function: Callable, seen: Set[str]) -> List[str]:
+    """Source of ``function`` and of the module functions and constants it uses."""
+    if isinstance(function, partial):
+        return [repr((function.args, sorted(function.keywords.items())))] + _code_parts(
+            function.func, seen
+        )
+    if function.__name__ in seen:
+        return []
+    seen.add(function.__name__)
+    parts = [inspect.getsource(function)]
+    # Names used by nested code (comprehensions, lambdas) count too
+    codes = [function.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(const for const in code.co_consts if inspect.iscode(const))
+        for name in code.co_names:
+            value = globals().get(name)
+            if inspect.isfunction(value) and value.__module__ == __name__:
+                parts += _code_parts(value, seen)
+            elif isinstance(value, (str, int, float, tuple, list, dict)) and name not in seen:
+                seen.add(name)
+                parts.append(f"{name} = {value!r}")
+    return parts
+
+
+def write_graph(fig, path: Path) -> None:
+    """Write ``fig`` in the shared style, replacing ``path`` atomically."""
+    fig.update_layout(**LAYOUT)
+    tmp_path = Path(f"{path}.{os.getpid()}.tmp")
+    fig.write_html(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_input(db_path: str, name: str) -> pd.DataFrame:
+    """Run the SQL of input ``name`` on a read-only connection."""
+    sql, params = INPUTS[name]
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def draw_graph(output_dir: str, name: str, frames: Sequence[pd.DataFrame]) -> float:
+    """Draw and write one graph from its inputs; returns the seconds it took."""
+    start = time.perf_counter()
+    task = TASKS_BY_NAME[name]
+    write_graph(task.draw(*frames), Path(output_dir) / task.file)
+    return time.perf_counter() - start
+
+
+def read_manifest(output_dir: Path) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(output_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(output_dir: Path, manifest: Dict[str, Dict[str, str]]) -> None:
+    tmp_path = output_dir / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
+
+
+def build_insight_graphs(
+    db_path: Path = BASE_DIR / "assets" / "music_data.db",
+    output_dir: Path = GRAPHS_DIR,
+    workers: int = 0,
+    force: bool = False,
+) -> Dict[str, float]:
+    """Rebuild the graphs whose database or code changed since they were written.
+
+    ``workers`` processes read the inputs and draw the graphs (0 does it all
+    in this process); ``force`` rebuilds every graph. Returns the seconds
+    each rebuilt graph took to draw.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    database = Database(db_path)
+    # Yearly series read albums.release_year
+    database.migrate_schema()
+    # The file the graphs are read from, after any migration wrote to it
+    db_digest = source_digest(db_path)
+
+    manifest = read_manifest(output_dir)
+    wanted = {task.name: {"database": db_digest, "code": task.code_digest()} for task in TASKS}
+    stale = [
+        name for name, entry in wanted.items()
+        if force or manifest.get(name) != entry or not (output_dir / f"{name}.html").exists()
+    ]
+    logger.info(f"{len(stale)} of {len(TASKS)} insight graphs to build")
+
+    # Each input is read once, and a graph is drawn as soon as its inputs are in
+    needed = [name for name in INPUTS if any(name in TASKS_BY_NAME[t].inputs for t in stale)]
+    frames: Dict[str, pd.DataFrame] = {}
+    timings: Dict[str, float] = {}
+    try:
+        if not workers:
+            for name in needed:
+                frames[name] = read_input(str(db_path), name)
+            for name in stale:
+                inputs = [frames[i] for i in TASKS_BY_NAME[name].inputs]
+                timings[name] = draw_graph(str(output_dir), name, inputs)
+                manifest[name] = wanted[name]
+            return timings
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {
+                executor.submit(read_input, str(db_path), name): (name, True)
+                for name in needed
+            }
+            waiting = list(stale)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, is_input = pending.pop(future)
+                    if is_input:
+                        frames[name] = future.result()
+                    else:
+                        timings[name] = future.result()
+                        manifest[name] = wanted[name]
+                for name in [t for t in waiting if set(TASKS_BY_NAME[t].inputs) <= frames.keys()]:
+                    waiting.remove(name)
+                    inputs = [frames[i] for i in TASKS_BY_NAME[name].inputs]
+                    future = executor.submit(draw_graph, str(output_dir), name, inputs)
+                    pending[future] = (name, False)
+        return timings
+    finally:
+        if timings:
+            write_manifest(output_dir, manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Data Insights graphs")
+    parser.add_argument("--db", default=str(BASE_DIR / "assets" / "music_data.db"))
+    parser.add_argument("--output-dir", default=str(GRAPHS_DIR))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="rebuild every graph")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    start = time.perf_counter()
+    timings = build_insight_graphs(
+        Path(args.db), Path(args.output_dir), args.workers, args.force
+    )
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        logger.info(f"{name}: {seconds:.2f}s")
+    logger.info(f"Total: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
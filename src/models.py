@@ -1,5 +1,5 @@
 # models.py
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 from pydantic import BaseModel, Field
 import pandas as pd
 
@@ -47,4 +47,26 @@ class UserPreferences(BaseModel):
     liveness: float = Field(default=0.5, ge=0.0, le=1.0)
     valence: float = Field(default=0.5, ge=0.0, le=1.0)
     loudness: float = Field(default=-15.0, ge=-30.0, le=0.0)
-    popularity: int = Field(default=50, ge=0, le=100)
\ No newline at end of file
+    popularity: int = Field(default=50, ge=0, le=100)
+
+class RecommendationFilters(BaseModel):
+    """Constraints applied to candidates before any distance is computed.
+
+    Hashable, so the filters can be part of a cache key; None means the
+    dimension is unconstrained.
+    """
+    genre: Optional[str] = None
+    # Inclusive band on the 0-100 artist popularity scale
+    popularity_range: Optional[Tuple[float, float]] = None
+    # Inclusive track length window in minutes
+    duration_range: Optional[Tuple[float, float]] = None
+
+    class Config:
+        frozen = True
+
+    def is_empty(self) -> bool:
+        return (
+            self.genre is None
+            and self.popularity_range is None
+            and self.duration_range is None
+        )
@@ -7,18 +7,260 @@ JOIN artists ON artists.artist_id = artist_profiles.artist_id
 WHERE artist_profiles.artist_id = ?
 """
 
+# Only the columns the recommenders, graphs and PCA view read
 GET_ALL_ARTIST_PROFILES = """
-SELECT artist_profiles.*, artists.artist_name, artists.artist_popularity, artists.artist_image_url
+SELECT
+    artist_profiles.danceability, artist_profiles.energy, artist_profiles.acousticness,
+    artist_profiles.instrumentalness, artist_profiles.liveness, artist_profiles.valence,
+    artist_profiles.loudness, artists.artist_popularity,
+    artists.artist_id, artists.artist_name, artists.artist_image_url
 FROM artist_profiles
 JOIN artists ON artists.artist_id = artist_profiles.artist_id
 """
 
-GET_SONGS_FOR_ARTIST = """
-SELECT tracks.*, track_features.*, artists.artist_name, albums.album_image_url, albums.album_name
-FROM tracks
-JOIN track_features ON tracks.track_id = track_features.track_id
-JOIN track_artists ON track_artists.track_id = tracks.track_id
-JOIN artists ON artists.artist_id = track_artists.artist_id
-JOIN albums on tracks.album_id = albums.album_id
-WHERE artists.artist_id = ?
+# One row per (artist, track) pair, with the same joins as find_best_song
+GET_TRACK_FEATURE_STORE = """
+SELECT
+    ta.artist_id, t.rowid AS track_rowid, t.track_id, t.duration_ms,
+    tf.danceability, tf.energy, tf.acousticness, tf.instrumentalness,
+    tf.liveness, tf.valence, tf.loudness
+FROM tracks t
+JOIN track_features tf ON t.track_id = tf.track_id
+JOIN track_artists ta ON ta.track_id = t.track_id
+JOIN artists ar ON ar.artist_id = ta.artist_id
+JOIN albums a ON t.album_id = a.album_id
+"""
+
+GET_TRACK_GENRES = """
+SELECT track_genre, track_id FROM track_genres WHERE track_genre IS NOT NULL
+"""
+
+GET_GENRE_ARTIST_IDS = """
+SELECT DISTINCT ta.artist_id
+FROM track_genres tg
+JOIN track_artists ta ON ta.track_id = tg.track_id
+WHERE tg.track_genre = ?
+"""
+
+GET_DURATION_ARTIST_IDS = """
+SELECT DISTINCT ta.artist_id
+FROM tracks t
+JOIN track_artists ta ON ta.track_id = t.track_id
+WHERE t.duration_ms BETWEEN ? AND ?
+"""
+
+# Rows of prepare_data.ipynb's tracks query, which its insights graphs read:
+# one per track, artist and genre, for the ? most popular artists (ties
+# broken by artist_id, so the set does not depend on the query plan)
+_TOP_ARTIST_TRACK_ROWS = """
+FROM tracks t
+JOIN track_artists ta ON t.track_id = ta.track_id
+JOIN artists ar ON ta.artist_id = ar.artist_id
+JOIN albums al ON t.album_id = al.album_id
+JOIN track_features tf ON t.track_id = tf.track_id
+LEFT JOIN track_genres tg ON t.track_id = tg.track_id
+WHERE ar.artist_id IN (
+    SELECT artist_id FROM artists ORDER BY artist_popularity DESC, artist_id LIMIT ?
+)
+"""
+
+# Mean and sample variance (pandas' std, squared) of a column
+_MEAN_AND_VARIANCE = (
+    "AVG({f}) AS avg_{f}, "
+    "(TOTAL({f} * {f}) - TOTAL({f}) * TOTAL({f}) / COUNT({f})) / (COUNT({f}) - 1) AS var_{f}"
+)
+
+GET_RELEASE_TIMELINE = """
+SELECT ar.artist_name, al.release_year, COUNT(*) AS tracks
+{rows}
+AND al.release_year IS NOT NULL
+GROUP BY ar.artist_name, al.release_year
+ORDER BY ar.artist_name, al.release_year
+""".format(rows=_TOP_ARTIST_TRACK_ROWS)
+
+GET_POPULARITY_TRENDS = """
+SELECT
+    al.release_year,
+    AVG(t.popularity / 100.0) AS popularity,
+    AVG(ar.artist_popularity / 100.0) AS artist_popularity
+{rows}
+AND al.release_year IS NOT NULL
+GROUP BY al.release_year
+ORDER BY al.release_year
+""".format(rows=_TOP_ARTIST_TRACK_ROWS)
+
+# The per-track columns of the distribution and scatter graphs
+GET_TOP_ARTIST_TRACKS = """
+SELECT
+    t.track_name, t.popularity / 100.0 AS popularity,
+    t.duration_ms / 60000.0 AS duration_minutes, ar.artist_name,
+    tf.danceability, tf.energy, tf.valence, tf.acousticness
+{rows}
+""".format(rows=_TOP_ARTIST_TRACK_ROWS)
+
+GET_ARTIST_CONSISTENCY = """
+SELECT
+    ar.artist_name, {features},
+    ar.artist_popularity / 100.0 AS artist_popularity
+{rows}
+GROUP BY ar.artist_name
+ORDER BY ar.artist_name
+""".format(
+    features=", ".join(
+        _MEAN_AND_VARIANCE.format(f=f) for f in ["danceability", "energy", "valence"]
+    ),
+    rows=_TOP_ARTIST_TRACK_ROWS,
+)
+
+# AVG skips NULLs, as the notebook's count of explicit and clean tracks does
+GET_EXPLICIT_RATIOS = """
+SELECT ar.artist_name, AVG(t.explicit) AS explicit_ratio
+{rows}
+GROUP BY ar.artist_name
+ORDER BY ar.artist_name
+""".format(rows=_TOP_ARTIST_TRACK_ROWS)
+
+# Features of the tracks above the 75th percentile of popularity, which is
+# interpolated between the ranks around it like pandas' quantile
+GET_SUCCESS_PROFILE = """
+WITH track_rows AS (
+    SELECT
+        t.popularity / 100.0 AS popularity, tf.danceability, tf.energy,
+        tf.valence, tf.acousticness, tf.liveness
+    {rows}
+),
+ranked AS (
+    SELECT
+        popularity,
+        ROW_NUMBER() OVER (ORDER BY popularity) - 1 AS rank,
+        (COUNT(*) OVER () - 1) * 0.75 AS position
+    FROM track_rows
+    WHERE popularity IS NOT NULL
+),
+cutoff AS (
+    SELECT MIN(popularity) + (MAX(popularity) - MIN(popularity))
+        * (MIN(position) - CAST(MIN(position) AS INTEGER)) AS popularity
+    FROM ranked
+    WHERE rank IN (CAST(position AS INTEGER), CAST(position AS INTEGER) + 1)
+)
+SELECT {features}
+FROM track_rows
+WHERE track_rows.popularity > (SELECT popularity FROM cutoff)
+""".format(
+    rows=_TOP_ARTIST_TRACK_ROWS,
+    features=", ".join(
+        _MEAN_AND_VARIANCE.format(f=f)
+        for f in ["danceability", "energy", "valence", "acousticness", "liveness"]
+    ),
+)
+
+# prepare_data.ipynb's top artists query, aggregating the tracks of the ?
+# most popular artists with a profile and tracks only: their features,
+# track count and mean track popularity
+GET_INSIGHT_TOP_ARTISTS = """
+WITH top AS (
+    SELECT
+        ar.artist_id, ar.artist_name, ar.artist_popularity, ar.artist_followers,
+        ar.artist_image_url, ap.danceability, ap.energy, ap.acousticness,
+        ap.instrumentalness, ap.liveness, ap.valence
+    FROM artists ar
+    JOIN artist_profiles ap ON ap.artist_id = ar.artist_id
+    WHERE EXISTS (
+        SELECT 1 FROM track_artists ta JOIN tracks t ON t.track_id = ta.track_id
+        WHERE ta.artist_id = ar.artist_id
+    )
+    ORDER BY ar.artist_popularity DESC, ar.artist_id
+    LIMIT ?
+)
+SELECT
+    top.artist_id,
+    top.artist_name,
+    top.artist_popularity / 100.0 AS artist_popularity,
+    top.artist_followers,
+    top.artist_image_url,
+    top.danceability AS avg_danceability,
+    top.energy AS avg_energy,
+    top.acousticness AS avg_acousticness,
+    top.instrumentalness AS avg_instrumentalness,
+    top.liveness AS avg_liveness,
+    top.valence AS avg_valence,
+    COUNT(DISTINCT ta.track_id) AS track_count,
+    AVG(t.popularity / 100.0) AS avg_track_popularity
+FROM top
+JOIN track_artists ta ON ta.artist_id = top.artist_id
+JOIN tracks t ON t.track_id = ta.track_id
+GROUP BY top.artist_id
+ORDER BY top.artist_popularity DESC, top.artist_id
+"""
+
+# Format with one "?" per artist id
+GET_ARTIST_NAMES = """
+SELECT artist_id, artist_name FROM artists WHERE artist_id IN ({placeholders})
+"""
+
+# Format with one "?" per rowid
+GET_TRACK_DETAILS_BY_ROWIDS = """
+SELECT
+    t.rowid, t.track_id, t.track_name, t.popularity, t.track_external_url, t.uri,
+    a.album_name, a.album_image_url
+FROM tracks t
+JOIN albums a ON t.album_id = a.album_id
+WHERE t.rowid IN ({placeholders})
+"""
+
+# Per-genre centroid, spread (population std) and track count over all tracks
+GENRE_PROFILE_FEATURES = [
+    "danceability", "energy", "loudness", "speechiness", "acousticness",
+    "instrumentalness", "liveness", "valence", "tempo"
+]
+
+BUILD_GENRE_PROFILES = """
+CREATE TABLE genre_profiles AS
+SELECT
+    tg.track_genre,
+    COUNT(*) AS track_count,
+    {centroids},
+    {spreads}
+FROM track_genres tg
+JOIN track_features tf ON tf.track_id = tg.track_id
+WHERE tg.track_genre IS NOT NULL
+GROUP BY tg.track_genre
+""".format(
+    centroids=",\n    ".join(
+        f"AVG(tf.{f}) AS {f}" for f in GENRE_PROFILE_FEATURES
+    ),
+    spreads=",\n    ".join(
+        f"SQRT(MAX(AVG(tf.{f} * tf.{f}) - AVG(tf.{f}) * AVG(tf.{f}), 0)) AS {f}_std"
+        for f in GENRE_PROFILE_FEATURES
+    ),
+)
+
+GET_GENRE_PROFILES = """
+SELECT * FROM genre_profiles ORDER BY track_count DESC, track_genre
+"""
+
+# Each artist's nearest neighbours as weighted, directed edges. Clustered on
+# (source_id, target_id), so every hop of a traversal is a primary key seek
+CREATE_ARTIST_EDGES = """
+CREATE TABLE artist_edges (
+    source_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (source_id, target_id)
+) WITHOUT ROWID
+"""
+
+INSERT_ARTIST_EDGE = """
+INSERT OR REPLACE INTO artist_edges (source_id, target_id, weight) VALUES (?, ?, ?)
+"""
+
+# One hop of find_artists_within_hops: the best weight of a path through the
+# frontier (a JSON object of artist id -> path weight) to each of its
+# neighbours, leaving out the artist ids of a JSON array
+GET_NEXT_HOP = """
+SELECT e.target_id AS artist_id, MAX(f.value * e.weight) AS weight
+FROM json_each(?1) f
+JOIN artist_edges e ON e.source_id = f.key
+WHERE e.target_id NOT IN (SELECT value FROM json_each(?2))
+GROUP BY e.target_id
 """
@@ -0,0 +1,77 @@
+"""Radio mode: a whole playlist from one seed, in a single pass.
+
+Instead of one chat click per song (a best song, a similar-artist search and
+a graph render each), radio walks the similar-artist neighbourhood outward
+from a seed and takes each artist's best song, scoring the artists in
+batches. No graphs are built along the way.
+"""
+from collections import deque
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import numpy as np
+
+from models import RecommendationFilters, Song, UserPreferences
+
+if TYPE_CHECKING:
+    from chatbot import Recommender
+
+# Artists whose best songs are scored and fetched together
+RADIO_BATCH = 16
+
+
+def radio_playlist(
+    recommender: "Recommender",
+    preferences: UserPreferences,
+    length: int,
+    seed_artist_row: Optional[int] = None,
+    filters: Optional[RecommendationFilters] = None,
+    exclude_rows: Sequence[int] = (),
+    batch_size: int = RADIO_BATCH,
+) -> List[Song]:
+    """Up to ``length`` songs, one per artist, nearest the seed first.
+
+    The walk is breadth-first over the neighbour table, starting at the seed
+    artist or, without one, at the top artists for the preferences. Each
+    artist's song is the best match for the preferences. Artists in
+    ``exclude_rows`` (e.g. already in the playlist) or outside the filters
+    are walked through but not picked, and a song is never picked twice.
+    """
+    if length <= 0:
+        return []
+    neighbour_rows, _ = recommender.neighbours()
+    artist_profiles = recommender.artist_profiles
+    pickable = np.ones(len(artist_profiles), dtype=bool)
+    candidate_rows = recommender.candidate_rows(filters)
+    if candidate_rows is not None:
+        pickable[:] = False
+        pickable[candidate_rows] = True
+    pickable[np.asarray(exclude_rows, dtype=np.int64)] = False
+
+    if seed_artist_row is None:
+        top_artists = recommender.top_artists(preferences, batch_size, filters)
+        seeds = artist_profiles.index.get_indexer(top_artists.index)
+    else:
+        seeds = [seed_artist_row]
+    visited = np.zeros(len(artist_profiles), dtype=bool)
+    visited[seeds] = True
+    queue = deque(int(seed) for seed in seeds)
+
+    songs, uris = [], set()
+    while queue and len(songs) < length:
+        batch = []
+        while queue and len(batch) < batch_size:
+            row = queue.popleft()
+            neighbours = np.asarray(neighbour_rows[row])
+            neighbours = neighbours[~visited[neighbours]]
+            visited[neighbours] = True
+            queue.extend(neighbours.tolist())
+            if pickable[row]:
+                batch.append(row)
+        best_songs = recommender.database.find_best_songs_for_artists(
+            artist_profiles["artist_id"].iloc[batch].tolist(), preferences, filters
+        )
+        for song in best_songs:
+            if song is not None and song.uri not in uris and len(songs) < length:
+                uris.add(song.uri)
+                songs.append(song)
+    return songs
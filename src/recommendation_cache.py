@@ -0,0 +1,210 @@
+"""Process-wide cache of recommendation results.
+
+Most sessions start from a genre preset or move sliders in 0.01 steps, so many
+users ask for the same few preference vectors. Preference-dependent results
+are keyed on the relevant features quantized to the slider step, and computed
+from the quantized vector itself so every hit is exactly what a miss would
+return.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from database import PROFILE_FEATURES
+from models import UserPreferences
+
+logger = logging.getLogger(__name__)
+
+# Matches the slider step in the preferences panel
+QUANTIZATION_STEP = 0.01
+
+T = TypeVar("T")
+
+
+def quantize_preferences(
+    preferences: UserPreferences,
+    features: List[str] = PROFILE_FEATURES,
+    step: float = QUANTIZATION_STEP,
+) -> Tuple[Tuple[int, ...], UserPreferences]:
+    """Grid coordinates of ``features`` and the preferences snapped to them.
+
+    Artist similarity only reads ``PROFILE_FEATURES``, so by default loudness
+    and popularity are left out of the key.
+    """
+    values = np.array([getattr(preferences, f) for f in features], dtype=float)
+    grid = tuple(int(v) for v in np.rint(values / step))
+    snapped = preferences.model_copy(update={
+        feature: round(steps * step, 6) for feature, steps in zip(features, grid)
+    })
+    return grid, snapped
+
+
+def _kind(key: Hashable) -> str:
+    return str(key[0]) if isinstance(key, tuple) and key else "other"
+
+
+class RecommendationCache:
+    """Thread-safe LRU cache with a TTL, scoped to one dataset version.
+
+    Keys are tuples whose first item names the kind of result (e.g.
+    ``("top_artists", grid, k)``); hit rates are tracked per kind. Entries are
+    dropped when they expire, when ``max_entries`` is exceeded (least recently
+    used first), and all at once when a lookup names a different dataset than
+    the one the entries were computed from. Pinned entries are exempt from
+    expiry and LRU eviction, and only dropped with their dataset; at most
+    ``max_pinned`` are kept, and results pinned beyond that are cached as
+    ordinary entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_pinned: int = 1024,
+        ttl_seconds: float = 600,
+        log_every: int = 100,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_pinned = max_pinned
+        self.ttl_seconds = ttl_seconds
+        self.log_every = log_every
+        self.clock = clock
+        # key -> (expires at, result), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._pinned: Dict[Hashable, object] = {}
+        self._dataset: Optional[str] = None
+        self._lock = threading.Lock()
+        self._lookups: Dict[str, List[int]] = {}  # kind -> [hits, misses]
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(
+        self,
+        dataset: str,
+        key: Hashable,
+        compute: Callable[[], T],
+        pinned: bool = False,
+        record: bool = True,
+    ) -> T:
+        """Cached ``compute()`` for the given dataset version.
+
+        DataFrames are returned as copies, so callers may modify them freely;
+        other results are shared and must be treated as immutable. ``pinned``
+        results are never evicted (up to ``max_pinned`` of them), and lookups
+        with ``record=False`` (e.g. warmup) are left out of the hit-rate
+        statistics.
+        """
+        with self._lock:
+            self._switch_dataset(dataset)
+            result = self._lookup(key)
+            if result is not None:
+                if pinned:
+                    self._pin(key, result)
+                if record:
+                    self._record(key, hit=True)
+                return self._copy(result)
+
+        # Computed outside the lock; concurrent misses on one key just race
+        result = compute()
+        with self._lock:
+            if self._dataset == dataset and result is not None:
+                if pinned:
+                    self._pin(key, result)
+                else:
+                    self._store(key, result)
+            if record:
+                self._record(key, hit=False)
+        return self._copy(result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = sum(counts[0] for counts in self._lookups.values())
+            lookups = hits + sum(counts[1] for counts in self._lookups.values())
+            return {
+                "entries": len(self._entries) + len(self._pinned),
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def hit_rates(self) -> Dict[str, float]:
+        """Hit rate per kind of result."""
+        with self._lock:
+            return {
+                kind: hits / (hits + misses)
+                for kind, (hits, misses) in self._lookups.items()
+                if hits + misses
+            }
+
+    @staticmethod
+    def _copy(result):
+        return result.copy() if isinstance(result, pd.DataFrame) else result
+
+    def _switch_dataset(self, dataset: str) -> None:
+        if dataset == self._dataset:
+            return
+        if self._dataset is not None:
+            self.invalidations += 1
+            logger.info(
+                "Dataset changed (%s -> %s); dropping %d cached recommendations",
+                self._dataset, dataset, len(self._entries) + len(self._pinned),
+            )
+        self._entries.clear()
+        self._pinned.clear()
+        self._dataset = dataset
+
+    def _lookup(self, key: Hashable):
+        if key in self._pinned:
+            return self._pinned[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if self.clock() > expires_at:
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _pin(self, key: Hashable, result) -> None:
+        if key not in self._pinned and len(self._pinned) >= self.max_pinned:
+            self._store(key, result)
+            return
+        self._entries.pop(key, None)
+        self._pinned[key] = result
+
+    def _store(self, key: Hashable, result) -> None:
+        self._entries[key] = (self.clock() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _record(self, key: Hashable, hit: bool) -> None:
+        counts = self._lookups.setdefault(_kind(key), [0, 0])
+        counts[0 if hit else 1] += 1
+        lookups = sum(sum(counts) for counts in self._lookups.values())
+        if self.log_every and lookups % self.log_every == 0:
+            rates = ", ".join(
+                f"{kind} {100 * hits / (hits + misses):.1f}%"
+                for kind, (hits, misses) in sorted(self._lookups.items())
+            )
+            logger.info(
+                "Recommendation cache: %d lookups, hit rates %s; "
+                "%d entries (%d pinned), %d evictions",
+                lookups, rates, len(self._entries) + len(self._pinned),
+                len(self._pinned), self.evictions,
+            )
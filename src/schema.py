@@ -0,0 +1,321 @@
+"""DDL of the normalized music database.
+
+The tables ``prepare_data.ipynb`` creates, with the same columns, so
+everything that writes the database agrees on one layout. Albums also get
+their release year and its precision, parsed from ``release_date`` by SQL
+as rows are inserted. Tables and
+indexes are separate: bulk loads create the tables, insert, then build the
+indexes; incremental writers create both up front, since their upserts
+rely on the unique indexes.
+
+``artist_profiles`` is a view over ``artist_feature_sums``, each artist's
+track count and feature sums, which triggers on ``track_features`` and
+``track_artists`` keep current, so ingesting tracks updates the profiles of
+their artists only.
+"""
+import re
+import sqlite3
+from typing import Dict
+
+CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS albums (
+    album_id INTEGER,
+    album_name TEXT,
+    release_date TEXT,
+    album_image_url TEXT,
+    release_year INTEGER,
+    release_precision TEXT
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    track_id TEXT,
+    track_name TEXT,
+    popularity REAL,
+    duration_ms INTEGER,
+    explicit INTEGER,
+    track_external_url TEXT,
+    uri TEXT,
+    album_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS artists (
+    artist_id TEXT,
+    artist_name TEXT,
+    artist_popularity REAL,
+    artist_followers INTEGER,
+    artist_image_url TEXT,
+    artist_external_url TEXT
+);
+CREATE TABLE IF NOT EXISTS track_artists (
+    track_id TEXT,
+    artist_id TEXT
+);
+CREATE TABLE IF NOT EXISTS track_genres (
+    track_id TEXT,
+    track_genre TEXT
+);
+CREATE TABLE IF NOT EXISTS track_features (
+    track_id TEXT,
+    danceability REAL,
+    energy REAL,
+    key INTEGER,
+    loudness REAL,
+    mode INTEGER,
+    speechiness REAL,
+    acousticness INTEGER,
+    instrumentalness INTEGER,
+    liveness INTEGER,
+    valence REAL,
+    tempo REAL,
+    duration_minutes REAL
+);
+"""
+
+CREATE_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_albums_id ON albums (album_id);
+CREATE INDEX IF NOT EXISTS idx_albums_name ON albums (album_name);
+CREATE INDEX IF NOT EXISTS idx_albums_release_year ON albums (release_year);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tracks_id ON tracks (track_id);
+CREATE INDEX IF NOT EXISTS idx_tracks_album ON tracks (album_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_artists_id ON artists (artist_id);
+CREATE INDEX IF NOT EXISTS idx_artists_popularity ON artists (artist_popularity DESC, artist_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_track_artists ON track_artists (track_id, artist_id);
+CREATE INDEX IF NOT EXISTS idx_track_artists_artist ON track_artists (artist_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_track_genres ON track_genres (track_id, track_genre);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_track_features_id ON track_features (track_id);
+"""
+
+# Columns of each table's unique index, read off CREATE_INDEXES
+UNIQUE_KEYS = {
+    table: [column.strip() for column in columns.split(",")]
+    for table, columns in re.findall(
+        r"CREATE UNIQUE INDEX IF NOT EXISTS \w+ ON (\w+) \(([^)]*)\)", CREATE_INDEXES
+    )
+}
+
+# Columns of each table that writers supply, in DDL order
+TABLE_COLUMNS = {
+    "albums": ["album_id", "album_name", "release_date", "album_image_url"],
+    "tracks": [
+        "track_id", "track_name", "popularity", "duration_ms", "explicit",
+        "track_external_url", "uri", "album_id",
+    ],
+    "artists": [
+        "artist_id", "artist_name", "artist_popularity", "artist_followers",
+        "artist_image_url", "artist_external_url",
+    ],
+    "track_artists": ["track_id", "artist_id"],
+    "track_genres": ["track_id", "track_genre"],
+    "track_features": [
+        "track_id", "danceability", "energy", "key", "loudness", "mode",
+        "speechiness", "acousticness", "instrumentalness", "liveness",
+        "valence", "tempo", "duration_minutes",
+    ],
+}
+
+# Spotify release dates are YYYY, YYYY-MM or YYYY-MM-DD; "0000" is unknown.
+# Other layouts ending in a year (e.g. 03/15/2001) keep the year, with no
+# precision. Written over a {release_date} placeholder
+RELEASE_YEAR = """CASE
+    WHEN {release_date} GLOB '[0-9][0-9][0-9][0-9]'
+        OR {release_date} GLOB '[0-9][0-9][0-9][0-9]-*'
+        THEN NULLIF(CAST(substr({release_date}, 1, 4) AS INTEGER), 0)
+    WHEN {release_date} GLOB '*[0-9][0-9][0-9][0-9]'
+        THEN NULLIF(CAST(substr({release_date}, -4) AS INTEGER), 0)
+END"""
+
+RELEASE_PRECISION = """CASE
+    WHEN {release_date} IN ('0000', '0000-00', '0000-00-00') THEN NULL
+    WHEN {release_date} GLOB '[0-9][0-9][0-9][0-9]' THEN 'year'
+    WHEN {release_date} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]' THEN 'month'
+    WHEN {release_date} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' THEN 'day'
+END"""
+
+# Columns computed from the supplied ones as rows are inserted: (type, SQL
+# over {column} placeholders)
+DERIVED_COLUMNS = {
+    "albums": {
+        "release_year": ("INTEGER", RELEASE_YEAR),
+        "release_precision": ("TEXT", RELEASE_PRECISION),
+    },
+}
+
+
+def declared_types(table: str) -> Dict[str, str]:
+    """The type ``CREATE_TABLES`` declares for each of ``TABLE_COLUMNS[table]``."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.executescript(CREATE_TABLES)
+        declared = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+    finally:
+        conn.close()
+    return {column: declared[column] for column in TABLE_COLUMNS[table]}
+
+
+def insert_statement(table: str, verb: str = "INSERT") -> str:
+    """An INSERT of ``TABLE_COLUMNS[table]`` that also fills the derived columns."""
+    columns = TABLE_COLUMNS[table]
+    derived = DERIVED_COLUMNS.get(table, {})
+    parameters = {column: f"?{number}" for number, column in enumerate(columns, 1)}
+    return "{} INTO {} ({}) VALUES ({})".format(
+        verb,
+        table,
+        ", ".join([*columns, *derived]),
+        ", ".join([
+            *parameters.values(),
+            *(expression.format(**parameters) for _, expression in derived.values()),
+        ]),
+    )
+
+
+def add_derived_columns(conn: sqlite3.Connection) -> None:
+    """Add and fill derived columns missing from tables written before them."""
+    for table, derived in DERIVED_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        missing = {c: spec for c, spec in derived.items() if c not in existing}
+        if not existing or not missing:
+            continue
+        with conn:
+            for column, (column_type, _) in missing.items():
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            conn.execute("UPDATE {} SET {}".format(table, ", ".join(
+                f"{column} = " + expression.format(**{c: c for c in TABLE_COLUMNS[table]})
+                for column, (_, expression) in missing.items()
+            )))
+
+
+# prepare_data.ipynb keeps these as 0/1 flags, set at or above the threshold
+BINARY_FEATURE_THRESHOLDS = {
+    "acousticness": 0.5,
+    "instrumentalness": 0.5,
+    "liveness": 0.8,
+}
+
+# Columns of the artist_profiles view, in order after artist_id
+ARTIST_PROFILE_FEATURES = [
+    "danceability", "energy", "loudness", "speechiness", "acousticness",
+    "instrumentalness", "liveness", "valence", "tempo",
+]
+
+_SUM_COLUMNS = ", ".join(f"sum_{f}" for f in ARTIST_PROFILE_FEATURES)
+_ADD_SUMS = ", ".join(f"sum_{f} = sum_{f} + excluded.sum_{f}" for f in ARTIST_PROFILE_FEATURES)
+
+
+def _values(row: str) -> str:
+    return ", ".join(f"COALESCE({row}.{f}, 0)" for f in ARTIST_PROFILE_FEATURES)
+
+
+def _subtract(row: str) -> str:
+    return ", ".join(
+        f"sum_{f} = sum_{f} - COALESCE({row}.{f}, 0)" for f in ARTIST_PROFILE_FEATURES
+    )
+
+
+def _add_features(row: str) -> str:
+    """Count a track_features row once for every artist of its track."""
+    return f"""
+    INSERT INTO artist_feature_sums (artist_id, track_count, {_SUM_COLUMNS})
+    SELECT ta.artist_id, 1, {_values(row)}
+    FROM track_artists ta WHERE ta.track_id = {row}.track_id
+    ON CONFLICT (artist_id) DO UPDATE SET track_count = track_count + 1, {_ADD_SUMS};"""
+
+
+def _remove_features(row: str) -> str:
+    return f"""
+    UPDATE artist_feature_sums SET track_count = track_count - 1, {_subtract(row)}
+    WHERE artist_id IN (SELECT artist_id FROM track_artists WHERE track_id = {row}.track_id);"""
+
+
+def _add_link(row: str) -> str:
+    """Count a track for a newly linked artist, if its features are in."""
+    return f"""
+    INSERT INTO artist_feature_sums (artist_id, track_count, {_SUM_COLUMNS})
+    SELECT {row}.artist_id, 1, {_values("tf")}
+    FROM track_features tf WHERE tf.track_id = {row}.track_id
+    ON CONFLICT (artist_id) DO UPDATE SET track_count = track_count + 1, {_ADD_SUMS};"""
+
+
+def _remove_link(row: str) -> str:
+    return f"""
+    UPDATE artist_feature_sums SET track_count = track_count - 1, {_subtract("tf")}
+    FROM track_features tf
+    WHERE tf.track_id = {row}.track_id AND artist_feature_sums.artist_id = {row}.artist_id;"""
+
+
+# Whichever of a track's features and artist link arrives second counts it.
+# Sums treat a NULL feature as 0, and track_count counts every track
+_TRIGGERS = {
+    "artist_sums_features_insert": ("AFTER INSERT ON track_features", _add_features("NEW")),
+    "artist_sums_features_delete": ("AFTER DELETE ON track_features", _remove_features("OLD")),
+    "artist_sums_features_update": (
+        "AFTER UPDATE OF track_id, {} ON track_features".format(", ".join(ARTIST_PROFILE_FEATURES)),
+        _remove_features("OLD") + _add_features("NEW"),
+    ),
+    "artist_sums_links_insert": ("AFTER INSERT ON track_artists", _add_link("NEW")),
+    "artist_sums_links_delete": ("AFTER DELETE ON track_artists", _remove_link("OLD")),
+    "artist_sums_links_update": (
+        "AFTER UPDATE ON track_artists", _remove_link("OLD") + _add_link("NEW")
+    ),
+}
+
+DROP_ARTIST_PROFILES = "".join(
+    f"DROP TRIGGER IF EXISTS {name};\n" for name in _TRIGGERS
+) + """
+DROP VIEW IF EXISTS artist_profiles;
+DROP TABLE IF EXISTS artist_feature_sums;
+"""
+
+# One aggregation over the loaded tracks, then the view and triggers on top
+BUILD_ARTIST_PROFILES = """
+CREATE TABLE artist_feature_sums (
+    artist_id TEXT PRIMARY KEY,
+    track_count INTEGER NOT NULL,
+    {sum_columns}
+) WITHOUT ROWID;
+INSERT INTO artist_feature_sums
+SELECT ta.artist_id, COUNT(*), {totals}
+FROM track_artists ta
+JOIN track_features tf ON tf.track_id = ta.track_id
+GROUP BY ta.artist_id;
+CREATE VIEW artist_profiles AS
+SELECT
+    artist_id,
+    {profile}
+FROM artist_feature_sums
+WHERE track_count > 0;
+{triggers}
+""".format(
+    sum_columns=",\n    ".join(f"sum_{f} REAL NOT NULL" for f in ARTIST_PROFILE_FEATURES),
+    totals=", ".join(f"TOTAL(tf.{f})" for f in ARTIST_PROFILE_FEATURES),
+    profile=",\n    ".join(
+        f"CAST(2 * sum_{f} > track_count AS INTEGER) AS {f}"
+        if f in BINARY_FEATURE_THRESHOLDS else f"sum_{f} / track_count AS {f}"
+        for f in ARTIST_PROFILE_FEATURES
+    ),
+    triggers="\n".join(
+        f"CREATE TRIGGER {name} {event} BEGIN{body}\nEND;"
+        for name, (event, body) in _TRIGGERS.items()
+    ),
+)
+
+
+def has_artist_feature_sums(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artist_feature_sums'"
+    ).fetchone() is not None
+
+
+def create_artist_profiles(conn: sqlite3.Connection) -> None:
+    """(Re)build the artist sums from the stored tracks, in one transaction.
+
+    Replaces a plain ``artist_profiles`` table as the notebooks write it.
+    The triggers look tracks up by id, so the unique indexes should exist.
+    """
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artist_profiles'"
+    ).fetchone()
+    conn.executescript(
+        "BEGIN;\n"
+        + ("DROP TABLE artist_profiles;\n" if legacy else "")
+        + DROP_ARTIST_PROFILES
+        + BUILD_ARTIST_PROFILES
+        + "COMMIT;"
+    )
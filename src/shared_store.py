@@ -0,0 +1,179 @@
+"""Read-only arrays shared by every session and worker process on a host.
+
+Arrays are published once as ``.npy`` files into a versioned directory and
+every process memory-maps them, so the OS page cache holds a single copy of
+the catalog however many sessions or Streamlit workers attach to it.
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from database import PROFILE_FEATURES, artist_feature_matrix, build_artist_profiles
+
+MANIFEST_FILE = "manifest.json"
+
+
+def encode_strings(values) -> Dict[str, np.ndarray]:
+    """Split strings into Arrow ``large_string`` buffers that can be memory-mapped."""
+    import pyarrow as pa
+
+    array = pa.array(
+        pd.Series(values, dtype=object), type=pa.large_string(), from_pandas=True
+    )
+    validity, offsets, data = array.buffers()
+    encoded = {
+        "offsets": np.frombuffer(offsets, dtype=np.int64),
+        "data": np.frombuffer(data, dtype=np.uint8) if data else np.empty(0, np.uint8),
+    }
+    if validity is not None:
+        encoded["validity"] = np.frombuffer(validity, dtype=np.uint8)
+    return encoded
+
+
+def decode_strings(encoded: Dict[str, np.ndarray]) -> pd.Series:
+    """Wrap mapped buffers as an Arrow-backed string Series without copying them."""
+    import pyarrow as pa
+
+    validity = encoded.get("validity")
+    array = pa.LargeStringArray.from_buffers(
+        len(encoded["offsets"]) - 1,
+        pa.py_buffer(encoded["offsets"]),
+        pa.py_buffer(encoded["data"]),
+        pa.py_buffer(validity) if validity is not None else None,
+    )
+    return pd.Series(pd.arrays.ArrowExtensionArray(array))
+
+
+class StoredRows:
+    """Rows of a memory-mapped ``.npy`` matrix, read from its file on demand.
+
+    Indexing the mapping faults in, and keeps resident, the pages around
+    every row touched, so scattered lookups end up mapping all of it.
+    ``pread`` copies just the rows asked for and leaves the rest on disk.
+    """
+
+    def __init__(self, array: np.memmap):
+        self.dtype = array.dtype
+        self.row_shape = array.shape[1:]
+        self.row_bytes = array.dtype.itemsize * int(np.prod(self.row_shape))
+        self.offset = array.offset
+        self._file = open(array.filename, "rb")
+
+    def __getitem__(self, rows) -> np.ndarray:
+        fd = self._file.fileno()
+        data = b"".join(
+            os.pread(fd, self.row_bytes, self.offset + int(row) * self.row_bytes)
+            for row in np.asarray(rows, dtype=np.int64)
+        )
+        return np.frombuffer(data, dtype=self.dtype).reshape(-1, *self.row_shape)
+
+
+def stored_rows(array: np.ndarray) -> Union[StoredRows, np.ndarray]:
+    """``StoredRows`` over a mapped array; the array itself where it is in
+    memory or the platform has no ``pread``."""
+    if isinstance(array, np.memmap) and array.filename and hasattr(os, "pread"):
+        return StoredRows(array)
+    return array
+
+
+class ArrayStore:
+    """A directory of named ``.npy`` arrays plus a JSON manifest, keyed by version.
+
+    Publishing writes into a temporary directory and renames it into place, so
+    concurrent writers never expose a half-written store; readers only ever see
+    complete versions.
+    """
+
+    def __init__(self, root: Path, name: str, version: str):
+        self.root = Path(root)
+        self.name = name
+        self.version = version
+
+    @property
+    def path(self) -> Path:
+        return self.root / f"{self.name}-{self.version}"
+
+    def exists(self) -> bool:
+        return (self.path / MANIFEST_FILE).exists()
+
+    def publish(self, arrays: Dict[str, np.ndarray], manifest: Dict) -> None:
+        """Write all arrays atomically and drop stale versions of this store."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{self.name}-", dir=self.root))
+        try:
+            for key, array in arrays.items():
+                np.save(tmp_dir / f"{key}.npy", np.ascontiguousarray(array))
+            with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump({**manifest, "arrays": sorted(arrays)}, f)
+            os.rename(tmp_dir, self.path)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not self.exists():
+                raise
+        self._remove_stale_versions()
+
+    def attach(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Memory-map every array read-only and return them with the manifest."""
+        with open(self.path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        arrays = {
+            key: np.load(self.path / f"{key}.npy", mmap_mode="r")
+            for key in manifest["arrays"]
+        }
+        return arrays, manifest
+
+    def _remove_stale_versions(self) -> None:
+        # Processes still mapping an old version keep their pages until they exit
+        for path in self.root.glob(f"{self.name}-*"):
+            if path != self.path and path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def artist_profile_arrays(
+    artist_profiles: pd.DataFrame,
+) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Split a compact profile frame into storable arrays plus manifest entries.
+
+    The feature matrix, numeric columns and Arrow string buffers are kept
+    separate so each can be memory-mapped on its own.
+    """
+    arrays = {"features": artist_feature_matrix(artist_profiles)}
+    numeric_columns, string_columns = [], []
+    for column in artist_profiles.columns.drop(PROFILE_FEATURES):
+        if pd.api.types.is_numeric_dtype(artist_profiles[column]):
+            numeric_columns.append(column)
+            arrays[column] = artist_profiles[column].to_numpy()
+        else:
+            string_columns.append(column)
+            for part, array in encode_strings(artist_profiles[column]).items():
+                arrays[f"{column}.{part}"] = array
+    manifest = {"numeric_columns": numeric_columns, "string_columns": string_columns}
+    return arrays, manifest
+
+
+def string_parts(
+    arrays: Dict[str, np.ndarray], column: str
+) -> Dict[str, np.ndarray]:
+    """The Arrow buffers stored for one string column."""
+    return {
+        key.split(".", 1)[1]: array
+        for key, array in arrays.items()
+        if key.startswith(f"{column}.")
+    }
+
+
+def artist_profiles_from_arrays(
+    arrays: Dict[str, np.ndarray], manifest: Dict
+) -> pd.DataFrame:
+    """Build a read-only profile frame whose columns wrap the mapped arrays."""
+    columns = {column: arrays[column] for column in manifest["numeric_columns"]}
+    for column in manifest["string_columns"]:
+        columns[column] = decode_strings(string_parts(arrays, column)).array
+    return build_artist_profiles(arrays["features"], columns)
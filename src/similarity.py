@@ -0,0 +1,514 @@
+"""Nearest-neighbour search and candidate pruning over feature matrices."""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Distance block budget of batch_top_k, per worker
+BLOCK_BYTES = 32 << 20
+# Extra candidates per query re-ranked exactly after the BLAS pass
+RERANK_MARGIN = 8
+# Bound on the error of squared distances from the BLAS expansion
+RERANK_TOLERANCE = 1e-4
+
+
+def neighbour_table(features: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The k nearest other rows of every row, nearest first.
+
+    Uses a KD-tree, which is exact and far cheaper than an all-pairs scan for
+    the handful of profile features. scipy is already required by
+    scikit-learn. Returns (rows int32, distances float32), shaped (n, k).
+    """
+    from scipy.spatial import cKDTree
+
+    n = len(features)
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), np.int32), np.empty((n, 0), np.float32)
+
+    points = np.asarray(features, dtype=np.float64)
+    distances, rows = cKDTree(points).query(points, k=k + 1, workers=-1)
+
+    # Drop each row's own entry; it is usually first, but exact duplicates can
+    # precede it, and with more than k duplicates it may be missing entirely
+    is_self = rows == np.arange(n)[:, np.newaxis]
+    is_self[~is_self.any(axis=1), -1] = True
+    keep = ~is_self
+    return (
+        rows[keep].reshape(n, k).astype(np.int32),
+        distances[keep].reshape(n, k).astype(np.float32),
+    )
+
+
+def _exact_top_k(
+    query: np.ndarray,
+    features: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    epsilon: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rank ``candidates`` by the direct formula used by find_top_k_artists."""
+    differences = features[candidates] - query
+    similarities = 1 / (epsilon + np.sqrt(np.sum(differences ** 2, axis=-1)))
+    # Ties break by row, as in top_k_positions
+    order = np.lexsort((candidates, -similarities), axis=-1)[..., :k]
+    return (
+        np.take_along_axis(candidates, order, axis=-1),
+        np.take_along_axis(similarities, order, axis=-1),
+    )
+
+
+def _block_top_k(
+    queries: np.ndarray,
+    features: np.ndarray,
+    squared_norms: np.ndarray,
+    k: int,
+    epsilon: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k rows of one query block, best first, as (rows, similarities)."""
+    # ||q - f||^2 = ||q||^2 - 2 q.f + ||f||^2, the middle term one BLAS call
+    distances = queries @ features.T
+    distances *= -2
+    distances += squared_norms
+    distances += np.einsum("ij,ij->i", queries, queries)[:, np.newaxis]
+
+    # The expansion loses precision to cancellation, so shortlist a few extra
+    # rows per query and rank those exactly
+    n = features.shape[0]
+    shortlist = min(k + RERANK_MARGIN, n)
+    if shortlist == n:
+        candidates = np.broadcast_to(np.arange(n), (len(queries), n))
+        return tuple(
+            array.astype(dtype) for array, dtype in zip(
+                _exact_top_k(queries[:, np.newaxis, :], features, candidates,
+                             k, epsilon),
+                (np.int32, np.float32),
+            )
+        )
+
+    candidates = np.argpartition(distances, shortlist - 1, axis=1)[:, :shortlist]
+    shortlisted = np.take_along_axis(distances, candidates, axis=1)
+    rows, similarities = _exact_top_k(
+        queries[:, np.newaxis, :], features, candidates, k, epsilon
+    )
+    rows, similarities = rows.astype(np.int32), similarities.astype(np.float32)
+
+    # Where (near-)ties run past the shortlist, the partition picked an
+    # arbitrary subset of them; rank every row that could make the top k
+    kth = np.partition(shortlisted, k - 1, axis=1)[:, k - 1]
+    for i in np.flatnonzero(shortlisted.max(axis=1) <= kth + RERANK_TOLERANCE):
+        tied = np.flatnonzero(distances[i] <= kth[i] + RERANK_TOLERANCE)
+        rows[i], similarities[i] = _exact_top_k(
+            queries[i], features, tied, k, epsilon
+        )
+    return rows, similarities
+
+
+# Catalog of the batch_top_k worker processes, set by _init_worker
+_WORKER_STATE: dict = {}
+
+
+def _init_worker(features: np.ndarray, squared_norms: np.ndarray) -> None:
+    _WORKER_STATE.update(features=features, squared_norms=squared_norms)
+
+
+def _worker_top_k(
+    queries: np.ndarray, k: int, epsilon: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    return _block_top_k(
+        queries, _WORKER_STATE["features"], _WORKER_STATE["squared_norms"],
+        k, epsilon,
+    )
+
+
+def batch_top_k(
+    queries: np.ndarray,
+    features: np.ndarray,
+    k: int,
+    epsilon: float = 1,
+    workers: int = 0,
+    block_bytes: int = BLOCK_BYTES,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The k most similar ``features`` rows of every query row, best first.
+
+    Similarity is ``1 / (epsilon + distance)``, as in
+    ``Database.find_top_k_artists``. Queries are scored in blocks whose
+    (block, catalog) distance and partition arrays stay within
+    ``block_bytes``; with
+    ``workers`` > 0 the blocks are spread over that many processes, each
+    holding one copy of the catalog. Returns (rows int32, similarities
+    float32), shaped (n_queries, min(k, n_features)).
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    k = min(k, features.shape[0])
+    if k <= 0 or len(queries) == 0:
+        return (
+            np.empty((len(queries), max(k, 0)), np.int32),
+            np.empty((len(queries), max(k, 0)), np.float32),
+        )
+
+    squared_norms = np.einsum("ij,ij->i", features, features)
+    # float32 distances plus the int64 partition indexes, per catalog row
+    block_rows = max(1, block_bytes // (12 * features.shape[0]))
+    blocks = [
+        queries[start:start + block_rows]
+        for start in range(0, len(queries), block_rows)
+    ]
+    if workers and len(blocks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(features, squared_norms),
+        ) as executor:
+            results = list(executor.map(
+                _worker_top_k, blocks,
+                [k] * len(blocks), [epsilon] * len(blocks),
+            ))
+    else:
+        results = [
+            _block_top_k(block, features, squared_norms, k, epsilon)
+            for block in blocks
+        ]
+    rows, similarities = zip(*results)
+    return np.concatenate(rows), np.concatenate(similarities)
+
+
+def group_centroids(
+    features: np.ndarray, offsets: np.ndarray, member_rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and radius (largest member distance) of CSR groups of rows.
+
+    Groups without members get a radius of -inf, so their distance lower
+    bound in ``two_stage_top_k`` is infinite.
+    """
+    counts = np.diff(offsets)
+    group_of_member = np.repeat(np.arange(len(counts)), counts)
+    member_features = features[member_rows]
+    sums = np.column_stack([
+        np.bincount(group_of_member, weights=column, minlength=len(counts))
+        for column in member_features.T
+    ])
+    centroids = (sums / np.maximum(counts, 1)[:, np.newaxis]).astype(np.float32)
+
+    distances = np.linalg.norm(member_features - centroids[group_of_member], axis=1)
+    radii = np.full(len(counts), -np.inf, dtype=np.float32)
+    np.maximum.at(radii, group_of_member, distances.astype(np.float32))
+    return centroids, radii
+
+
+def split_groups(
+    offsets: np.ndarray, member_rows: np.ndarray, member_keys: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split CSR groups by an integer key of their members.
+
+    Returns the (offsets, member rows) of the non-empty subgroups, ordered by
+    group then key, and the group of each subgroup.
+    """
+    parents = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    keys = member_keys[member_rows]
+    order = np.lexsort((keys, parents))
+    parents, keys, rows = parents[order], keys[order], member_rows[order]
+    starts = np.flatnonzero(np.concatenate((
+        [True], (parents[1:] != parents[:-1]) | (keys[1:] != keys[:-1])
+    ))) if len(rows) else np.empty(0, dtype=np.int64)
+    return (
+        np.append(starts, len(rows)).astype(np.int64),
+        rows.astype(np.int32),
+        parents[starts].astype(np.int32),
+    )
+
+
+def gather_members(
+    groups: np.ndarray, offsets: np.ndarray, member_rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Member rows of ``groups`` from a CSR map, with the group of each."""
+    starts = offsets[groups]
+    counts = offsets[groups + 1] - starts
+    total = int(counts.sum())
+    # Position i of group g maps to starts[g] + (i - first position of g)
+    shifts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    positions = np.arange(total, dtype=np.int64) + shifts
+    return member_rows[positions], np.repeat(groups, counts)
+
+
+def _merge_top_k(
+    rows: np.ndarray, groups: np.ndarray, distances: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The k nearest distinct rows, ties broken by row, first occurrence kept."""
+    if len(rows) > 4 * k:
+        # Only entries within the 4k-th distance can matter, ties included
+        cutoff = np.partition(distances, 4 * k - 1)[4 * k - 1]
+        within = np.flatnonzero(distances <= cutoff)
+        if len(np.unique(rows[within])) >= k:
+            rows, groups, distances = rows[within], groups[within], distances[within]
+    order = np.lexsort((rows, distances))
+    rows, groups, distances = rows[order], groups[order], distances[order]
+    _, first = np.unique(rows, return_index=True)
+    first = np.sort(first)[:k]
+    return rows[first], groups[first], distances[first]
+
+
+def two_stage_top_k(
+    query: np.ndarray,
+    centroids: np.ndarray,
+    radii: np.ndarray,
+    offsets: np.ndarray,
+    member_rows: np.ndarray,
+    features: np.ndarray,
+    k: int,
+    candidate_groups: Optional[np.ndarray] = None,
+    member_mask: Optional[np.ndarray] = None,
+    max_groups: Optional[int] = None,
+    initial_groups: int = 64,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The k rows of ``features`` nearest the query, searched group by group.
+
+    Stage one ranks groups (e.g. artists) by a lower bound on their members'
+    distance, ``|query - centroid| - radius``; stage two scores the members
+    of the most promising groups until k are found. Every group whose bound
+    is within the k-th best distance is then scored too, so the result is
+    exact; ``max_groups`` instead scores just that many groups, an
+    approximate answer in bounded time. ``candidate_groups`` (sorted) and
+    ``member_mask`` (over feature rows) restrict both stages. Members listed
+    by several groups are returned once. Returns (rows, the group each was
+    found through, distances), nearest first, ties broken by row.
+    """
+    if candidate_groups is not None:
+        centroids, radii = centroids[candidate_groups], radii[candidate_groups]
+    groups = (
+        np.arange(len(centroids)) if candidate_groups is None else candidate_groups
+    )
+    # |q - c|^2 through one matrix-vector product, as in batch_top_k
+    squared = centroids @ (-2 * query)
+    squared += np.einsum("ij,ij->i", centroids, centroids)
+    squared += query @ query
+    lower_bounds = np.sqrt(np.maximum(squared, 0)) - radii
+    reachable = np.isfinite(lower_bounds)
+    groups, lower_bounds = groups[reachable], lower_bounds[reachable]
+
+    best_rows = np.empty(0, dtype=member_rows.dtype)
+    best_groups = np.empty(0, dtype=groups.dtype)
+    best_distances = np.empty(0, dtype=np.float32)
+    scored = np.zeros(len(groups), dtype=bool)
+
+    def score(positions: np.ndarray) -> None:
+        nonlocal best_rows, best_groups, best_distances
+        scored[positions] = True
+        rows, found_in = gather_members(groups[positions], offsets, member_rows)
+        if member_mask is not None:
+            keep = member_mask[rows]
+            rows, found_in = rows[keep], found_in[keep]
+        best_rows, best_groups, best_distances = _merge_top_k(
+            np.concatenate((best_rows, rows)),
+            np.concatenate((best_groups, found_in)),
+            np.concatenate((
+                best_distances, np.linalg.norm(features[rows] - query, axis=1)
+            )),
+            k,
+        )
+
+    # Stage one: the groups with the lowest bounds, until k members are found
+    n_groups = min(initial_groups if max_groups is None else max_groups, len(groups))
+    while True:
+        nearest = (
+            np.argpartition(lower_bounds, n_groups - 1)[:n_groups]
+            if 0 < n_groups < len(groups) else np.arange(n_groups)
+        )
+        score(nearest[~scored[nearest]])
+        if max_groups is not None or len(best_rows) == k or n_groups == len(groups):
+            break
+        n_groups = min(2 * n_groups, len(groups))
+    if max_groups is not None or len(best_rows) < k:
+        return best_rows, best_groups, best_distances
+
+    # The k-th distance only shrinks from here, so every group that can still
+    # hold a closer member is known; float32 rounding gets some slack
+    score(np.flatnonzero(~scored & (lower_bounds <= best_distances[-1] + 1e-4)))
+    return best_rows, best_groups, best_distances
+
+
+def sorted_membership(members: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Boolean mask of ``rows`` found in the sorted array ``members``."""
+    if len(members) == 0:
+        return np.zeros(len(rows), dtype=bool)
+    positions = np.searchsorted(members, rows).clip(max=len(members) - 1)
+    return members[positions] == rows
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted row arrays.
+
+    A small side is binary-searched in the large one; two large sides are
+    intersected through a bitmap, which is linear.
+    """
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    if len(small) == 0 or len(small) * 16 < len(large):
+        return small[sorted_membership(large, small)]
+    present = np.zeros(int(max(small[-1], large[-1])) + 1, dtype=bool)
+    present[large] = True
+    return small[present[small]]
+
+
+class SortedRangeIndex:
+    """Rows ordered by one column, so a range filter is two binary searches.
+
+    ``order`` holds the rows sorted by value and ``sorted_values`` the values
+    in that order; all arrays can be memory-mapped. Selective ranges sort just
+    the matching slice of ``order``; wide ones fall back to one masked pass
+    over ``values``, which is cheaper than sorting most of the catalog. An
+    index without ``values`` may repeat rows (e.g. artists ordered by the
+    length of each of their tracks) and only answers ``distinct_rows``.
+    """
+
+    # Above this fraction of rows, a masked pass beats sorting the slice
+    MASK_FRACTION = 0.125
+
+    def __init__(
+        self,
+        order: np.ndarray,
+        sorted_values: np.ndarray,
+        values: Optional[np.ndarray] = None
+    ):
+        self.order = order
+        self.sorted_values = sorted_values
+        self.values = values
+
+    @staticmethod
+    def build(
+        values: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(order, sorted values) of ``values``, which belong to ``rows``.
+
+        ``rows`` defaults to each value's position. NaNs sort last and never
+        fall inside a range.
+        """
+        positions = np.argsort(values, kind="stable")
+        order = positions if rows is None else rows[positions]
+        return order.astype(np.int32), np.ascontiguousarray(values[positions])
+
+    def bounds(self, low: float, high: float) -> Tuple[int, int]:
+        start = int(np.searchsorted(self.sorted_values, low, side="left"))
+        stop = int(np.searchsorted(self.sorted_values, high, side="right"))
+        return start, max(start, stop)
+
+    def count(self, low: float, high: float) -> int:
+        start, stop = self.bounds(low, high)
+        return stop - start
+
+    def rows(self, low: float, high: float) -> np.ndarray:
+        """Sorted rows whose value lies in [low, high]."""
+        start, stop = self.bounds(low, high)
+        if self.values is not None and stop - start > self.MASK_FRACTION * len(self.order):
+            return np.flatnonzero(
+                (self.values >= low) & (self.values <= high)
+            ).astype(np.int32)
+        return np.sort(self.order[start:stop])
+
+    def distinct_rows(self, low: float, high: float, n_rows: int) -> np.ndarray:
+        """Sorted distinct rows with at least one value in [low, high]."""
+        start, stop = self.bounds(low, high)
+        present = np.zeros(n_rows, dtype=bool)
+        present[self.order[start:stop]] = True
+        return np.flatnonzero(present).astype(np.int32)
+
+
+class QuantizedMatrix:
+    """A feature matrix stored as uint8 codes, a quarter of its float32 size.
+
+    Column j decodes as ``codes[:, j] * scale[j] + offset[j]``, with offset
+    and scale spanning the column's observed range, so 0/1 features decode
+    exactly. ``error`` holds each column's largest decoding error, which
+    bounds how far a distance over the codes can stray from the float one.
+    """
+
+    # Rows decoded at a time by top_k, bounding its float32 scratch memory
+    BLOCK_ROWS = 1 << 16
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        scale: np.ndarray,
+        offset: np.ndarray,
+        error: np.ndarray
+    ):
+        self.codes = codes
+        self.scale = scale
+        self.offset = offset
+        self.error = error
+        self.max_error = float(np.sqrt(np.sum(np.square(error, dtype=np.float64))))
+
+    @staticmethod
+    def build(
+        features: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(codes, scale, offset, error) of a float matrix."""
+        features = np.asarray(features, dtype=np.float32)
+        if len(features) == 0:
+            zeros = np.zeros(features.shape[1], dtype=np.float32)
+            return np.empty(features.shape, np.uint8), zeros + 1, zeros, zeros
+        offset = features.min(axis=0)
+        span = features.max(axis=0) - offset
+        scale = np.where(span > 0, span / 255, 1).astype(np.float32)
+        codes = np.rint((features - offset) / scale).clip(0, 255).astype(np.uint8)
+        error = np.abs(codes * scale + offset - features).max(axis=0)
+        return codes, scale, offset, error.astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes + self.offset.nbytes
+
+    def decode(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        codes = self.codes if rows is None else self.codes[rows]
+        return codes * self.scale + self.offset
+
+    def distances(
+        self, query: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Approximate distances from the query, within ``max_error``."""
+        codes = self.codes if rows is None else self.codes[rows]
+        # (code * scale + offset) - query == (code - shift) * scale
+        shift = (np.asarray(query, dtype=np.float32) - self.offset) / self.scale
+        distances = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            block = codes[start:start + self.BLOCK_ROWS] - shift
+            block *= self.scale
+            distances[start:start + self.BLOCK_ROWS] = np.sqrt(
+                np.einsum("ij,ij->i", block, block)
+            )
+        return distances
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        features: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The k rows nearest the query, nearest first, ties broken by row.
+
+        Every row is scored over the codes. With the float ``features`` (an
+        array, or anything that gathers rows by index like ``StoredRows``),
+        the rows that could still be among the k nearest, those within twice
+        ``max_error`` of the k-th approximate distance, are re-ranked exactly,
+        so the result matches a float scan; without them the ranking is the
+        approximate one. ``rows`` (sorted) restricts the scan.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        candidates = (
+            np.arange(len(self.codes)) if rows is None else np.asarray(rows)
+        )
+        approximate = self.distances(query, rows)
+        k = min(k, len(candidates))
+        if k == 0:
+            return candidates[:0], approximate[:0]
+        kth = np.partition(approximate, k - 1)[k - 1]
+        if features is None:
+            within = np.flatnonzero(approximate <= kth)
+            distances = approximate[within]
+        else:
+            # float32 rounding gets the same slack as two_stage_top_k
+            within = np.flatnonzero(approximate <= kth + 2 * self.max_error + 1e-4)
+            distances = np.linalg.norm(features[candidates[within]] - query, axis=1)
+        order = np.lexsort((candidates[within], distances))[:k]
+        return candidates[within[order]], distances[order]
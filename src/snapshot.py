@@ -0,0 +1,627 @@
+"""Binary snapshot of the recommendation state for fast cold starts.
+
+Everything the recommenders derive from the database (artist feature matrix,
+name and id indexes, nearest-neighbour table and the artist graph built from
+it, the per-artist track feature store, its uint8 quantized copy and its
+per-artist centroids, the genre membership index and the range indexes behind
+the popularity and track length filters) is written once into a versioned
+directory of ``.npy`` files next to ``music_data.db``. New processes
+memory-map it instead of querying SQLite and rebuilding those structures; it
+is rebuilt automatically whenever the hash of the database file changes.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from artist_graph import ArtistGraph, build_artist_graph
+from database import (
+    BINARY_FEATURES,
+    SONG_FEATURE_RANGES,
+    SONG_FEATURES,
+    Database,
+    artist_feature_matrix,
+    normalize_song_features,
+    popularity_percent,
+)
+from models import RecommendationFilters
+from queries import GET_TRACK_FEATURE_STORE, GET_TRACK_GENRES
+from shared_store import (
+    ArrayStore,
+    artist_profile_arrays,
+    artist_profiles_from_arrays,
+    decode_strings,
+    encode_strings,
+    string_parts,
+    stored_rows,
+)
+from similarity import (
+    QuantizedMatrix,
+    SortedRangeIndex,
+    gather_members,
+    group_centroids,
+    intersect_sorted,
+    neighbour_table,
+    sorted_membership,
+    split_groups,
+    two_stage_top_k,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the set or layout of stored arrays changes
+SNAPSHOT_VERSION = 6
+
+# Neighbours kept per artist; more than the UI shows so exclusions still leave k
+NEIGHBOUR_K = 32
+
+
+def source_digest(path) -> str:
+    """SHA-256 of ``path``, cached in a sidecar file keyed by size and mtime."""
+    stat = os.stat(path)
+    sidecar = Path(f"{path}.sha256")
+    signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if {key: cached.get(key) for key in signature} == signature:
+            return cached["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    try:
+        with open(sidecar, "w", encoding="utf-8") as f:
+            json.dump({**signature, "sha256": digest.hexdigest()}, f)
+    except OSError:
+        pass  # read-only asset directories just rehash next time
+    return digest.hexdigest()
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class HashIndex:
+    """Exact string lookup over sorted 64-bit key hashes, safe to memory-map.
+
+    Lookups binary-search the hashes and confirm candidates against the
+    stored keys, so collisions cannot return a wrong row. Among equal keys the
+    lowest row wins, like taking ``iloc[0]`` of a boolean match.
+    """
+
+    def __init__(self, hashes: np.ndarray, rows: np.ndarray, keys: pd.Series,
+                 lowercase: bool = False):
+        self.hashes = hashes
+        self.rows = rows
+        self.keys = keys
+        self.lowercase = lowercase
+
+    @staticmethod
+    def build(
+        keys: pd.Series, lowercase: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted hashes and their rows for ``keys`` (row order = key position)."""
+        normalized = keys.str.lower() if lowercase else keys
+        hashes = np.fromiter(
+            (key_hash(key) for key in normalized.fillna("")),
+            dtype=np.uint64,
+            count=len(keys),
+        )
+        rows = np.arange(len(keys), dtype=np.int32)
+        order = np.lexsort((rows, hashes))
+        return hashes[order], rows[order]
+
+    def lookup(self, key: str) -> Optional[int]:
+        if self.lowercase:
+            key = key.lower()
+        target = np.uint64(key_hash(key))
+        start = np.searchsorted(self.hashes, target, side="left")
+        stop = np.searchsorted(self.hashes, target, side="right")
+        for row in self.rows[start:stop]:
+            candidate = self.keys.iloc[row]
+            if not isinstance(candidate, str):
+                continue
+            if (candidate.lower() if self.lowercase else candidate) == key:
+                return int(row)
+        return None
+
+
+def build_track_store(
+    database: Database, artist_ids: pd.Series
+) -> Dict[str, np.ndarray]:
+    """Normalized track features and lengths (minutes), plus a CSR map from
+    artist row to track rows."""
+    with database.get_connection() as conn:
+        pairs = pd.read_sql_query(
+            GET_TRACK_FEATURE_STORE,
+            conn,
+            dtype={
+                feature: "float32" for feature in SONG_FEATURES + ["duration_ms"]
+            },
+        )
+
+    artist_rows = pd.Index(artist_ids.astype(object)).get_indexer(pairs["artist_id"])
+    pairs = pairs[artist_rows >= 0]
+    artist_rows = artist_rows[artist_rows >= 0]
+
+    track_rows, unique_rowids = pd.factorize(pairs["track_rowid"])
+    tracks = pairs.drop_duplicates("track_rowid")  # same order as factorize
+    order = np.argsort(artist_rows, kind="stable")
+    counts = np.bincount(artist_rows, minlength=len(artist_ids))
+
+    arrays = {
+        "track_features": normalize_song_features(tracks[SONG_FEATURES].to_numpy()),
+        "track_durations": tracks["duration_ms"].to_numpy(dtype=np.float32) / 60000,
+        "track_rowids": np.asarray(unique_rowids, dtype=np.int64),
+        "artist_track_offsets": np.concatenate(([0], np.cumsum(counts))).astype(
+            np.int64
+        ),
+        "artist_track_rows": track_rows[order].astype(np.int32),
+    }
+    for part, array in encode_strings(tracks["track_id"]).items():
+        arrays[f"track_ids.{part}"] = array
+    return arrays
+
+
+def build_song_groups(
+    track_features: np.ndarray,
+    artist_track_offsets: np.ndarray,
+    artist_track_rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Each artist's tracks grouped by their binary features, with centroids.
+
+    Catalog-wide song search ranks these groups before scoring tracks. A 0/1
+    mismatch costs a whole unit of distance, so one centroid per artist would
+    sit between its acoustic and electric tracks and bound neither; within a
+    group only the continuous features spread.
+    """
+    columns = [SONG_FEATURES.index(feature) for feature in BINARY_FEATURES]
+    codes = np.rint(track_features[:, columns]).astype(np.int64) @ (
+        1 << np.arange(len(columns))
+    )
+    offsets, rows, artists = split_groups(
+        artist_track_offsets, artist_track_rows, codes
+    )
+    centroids, radii = group_centroids(track_features, offsets, rows)
+    return {
+        "song_group_offsets": offsets,
+        "song_group_rows": rows,
+        "song_group_artists": artists,
+        "song_group_centroids": centroids,
+        "song_group_radii": radii,
+    }
+
+
+def build_quantized_tracks(
+    track_features: np.ndarray,
+    artist_track_offsets: np.ndarray,
+    artist_track_rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """uint8 codes of the track features, and the first artist of each track."""
+    codes, scale, offset, error = QuantizedMatrix.build(track_features)
+    pair_artist_rows = np.repeat(
+        np.arange(len(artist_track_offsets) - 1, dtype=np.int32),
+        np.diff(artist_track_offsets),
+    )
+    track_artist_rows = np.full(len(track_features), -1, dtype=np.int32)
+    # Reversed, so the lowest artist row of a shared track is written last
+    track_artist_rows[artist_track_rows[::-1]] = pair_artist_rows[::-1]
+    return {
+        "track_codes": codes,
+        "track_code_scale": scale,
+        "track_code_offset": offset,
+        "track_code_error": error,
+        "track_artist_rows": track_artist_rows,
+    }
+
+
+def build_genre_index(
+    database: Database,
+    track_ids: pd.Series,
+    artist_track_offsets: np.ndarray,
+    artist_track_rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Sorted artist and track rows per genre, as CSR offsets and rows.
+
+    An artist belongs to every genre of any of its tracks. Tracks outside the
+    track store (no listed artist) are left out.
+    """
+    with database.get_connection() as conn:
+        track_genres = pd.read_sql_query(GET_TRACK_GENRES, conn)
+    track_genres = track_genres.merge(
+        pd.DataFrame({
+            "track_id": track_ids.astype(object),
+            "track_row": np.arange(len(track_ids), dtype=np.int32),
+        }),
+        on="track_id",
+    )
+    genre_codes, genre_names = pd.factorize(track_genres["track_genre"], sort=True)
+    track_pairs = pd.DataFrame({
+        "genre": genre_codes, "track_row": track_genres["track_row"].to_numpy()
+    }).drop_duplicates()
+    artist_pairs = pd.DataFrame({
+        "artist_row": np.repeat(
+            np.arange(len(artist_track_offsets) - 1, dtype=np.int32),
+            np.diff(artist_track_offsets),
+        ),
+        "track_row": artist_track_rows,
+    }).merge(track_pairs, on="track_row")[["genre", "artist_row"]].drop_duplicates()
+
+    arrays = {}
+    for prefix, pairs, row_column in (
+        ("genre_artist", artist_pairs, "artist_row"),
+        ("genre_track", track_pairs, "track_row"),
+    ):
+        pairs = pairs.sort_values(["genre", row_column])
+        counts = np.bincount(pairs["genre"], minlength=len(genre_names))
+        arrays[f"{prefix}_offsets"] = np.concatenate(([0], np.cumsum(counts))).astype(
+            np.int64
+        )
+        arrays[f"{prefix}_rows"] = pairs[row_column].to_numpy(dtype=np.int32)
+    for part, array in encode_strings(pd.Series(genre_names, dtype=object)).items():
+        arrays[f"genre_names.{part}"] = array
+    return arrays
+
+
+def build_range_indexes(
+    artist_profiles: pd.DataFrame,
+    track_durations: np.ndarray,
+    artist_track_offsets: np.ndarray,
+    artist_track_rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Artists sorted by popularity (0-100) and by the length of each track."""
+    popularity = popularity_percent(artist_profiles["artist_popularity"])
+    popularity_order, popularity_sorted = SortedRangeIndex.build(popularity)
+    # One entry per (artist, track) pair, so an artist matches a length window
+    # when any of its tracks does
+    pair_artist_rows = np.repeat(
+        np.arange(len(artist_track_offsets) - 1, dtype=np.int32),
+        np.diff(artist_track_offsets),
+    )
+    duration_order, duration_sorted = SortedRangeIndex.build(
+        track_durations[artist_track_rows], rows=pair_artist_rows
+    )
+    return {
+        "artist_popularity_percent": popularity,
+        "popularity_order": popularity_order,
+        "popularity_sorted": popularity_sorted,
+        "duration_artist_order": duration_order,
+        "duration_artist_sorted": duration_sorted,
+    }
+
+
+def build_snapshot_arrays(
+    database: Database,
+) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Derive every stored structure from the SQLite database."""
+    artist_profiles = database.get_artist_profiles()
+    if artist_profiles is None:
+        raise ValueError("No artist profiles to snapshot")
+
+    arrays, manifest = artist_profile_arrays(artist_profiles)
+    features = artist_feature_matrix(artist_profiles)
+    neighbour_rows, neighbour_distances = neighbour_table(features, NEIGHBOUR_K)
+    name_hashes, name_rows = HashIndex.build(
+        artist_profiles["artist_name"], lowercase=True
+    )
+    id_hashes, id_rows = HashIndex.build(artist_profiles["artist_id"])
+    track_store = build_track_store(database, artist_profiles["artist_id"])
+    arrays.update({
+        "neighbour_rows": neighbour_rows,
+        "neighbour_distances": neighbour_distances,
+        **build_artist_graph(neighbour_rows, neighbour_distances),
+        "name_hashes": name_hashes,
+        "name_rows": name_rows,
+        "id_hashes": id_hashes,
+        "id_rows": id_rows,
+        **track_store,
+        **build_genre_index(
+            database,
+            decode_strings(string_parts(track_store, "track_ids")),
+            track_store["artist_track_offsets"],
+            track_store["artist_track_rows"],
+        ),
+        **build_quantized_tracks(
+            track_store["track_features"],
+            track_store["artist_track_offsets"],
+            track_store["artist_track_rows"],
+        ),
+        **build_song_groups(
+            track_store["track_features"],
+            track_store["artist_track_offsets"],
+            track_store["artist_track_rows"],
+        ),
+        **build_range_indexes(
+            artist_profiles,
+            track_store["track_durations"],
+            track_store["artist_track_offsets"],
+            track_store["artist_track_rows"],
+        ),
+    })
+    manifest.update({
+        "snapshot_version": SNAPSHOT_VERSION,
+        "song_features": SONG_FEATURES,
+        # track_features columns are rescaled to 0-1 over these ranges
+        "song_feature_ranges": SONG_FEATURE_RANGES,
+        "neighbour_k": int(neighbour_rows.shape[1]),
+    })
+    return arrays, manifest
+
+
+class RecommendationSnapshot:
+    """Read-only, memory-mapped view of the derived recommendation state."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Dict):
+        self.manifest = manifest
+        self.artist_profiles = artist_profiles_from_arrays(arrays, manifest)
+        self.features = artist_feature_matrix(self.artist_profiles)
+        self.name_index = HashIndex(
+            arrays["name_hashes"], arrays["name_rows"],
+            self.artist_profiles["artist_name"], lowercase=True
+        )
+        self.id_index = HashIndex(
+            arrays["id_hashes"], arrays["id_rows"], self.artist_profiles["artist_id"]
+        )
+        self.neighbour_rows = arrays["neighbour_rows"]
+        self.neighbour_distances = arrays["neighbour_distances"]
+        self.artist_graph = ArtistGraph(
+            arrays["artist_graph_indptr"],
+            arrays["artist_graph_indices"],
+            arrays["artist_graph_weights"],
+        )
+        self.track_features = arrays["track_features"]
+        self.track_durations = arrays["track_durations"]
+        self.track_rowids = arrays["track_rowids"]
+        self.track_ids = decode_strings(string_parts(arrays, "track_ids"))
+        self.artist_track_offsets = arrays["artist_track_offsets"]
+        self.artist_track_rows = arrays["artist_track_rows"]
+        self.track_artist_rows = arrays["track_artist_rows"]
+        # The quantized scan re-ranks a few dozen rows; reading them through
+        # the file keeps the float matrix from being mapped in behind it
+        self.track_feature_rows = stored_rows(self.track_features)
+        self.quantized_tracks = QuantizedMatrix(
+            arrays["track_codes"],
+            arrays["track_code_scale"],
+            arrays["track_code_offset"],
+            arrays["track_code_error"],
+        )
+        self.song_group_offsets = arrays["song_group_offsets"]
+        self.song_group_rows = arrays["song_group_rows"]
+        self.song_group_artists = arrays["song_group_artists"]
+        self.song_group_centroids = arrays["song_group_centroids"]
+        self.song_group_radii = arrays["song_group_radii"]
+        self.genre_names = decode_strings(string_parts(arrays, "genre_names"))
+        self.genre_codes = {name: code for code, name in enumerate(self.genre_names)}
+        self.genre_artist_offsets = arrays["genre_artist_offsets"]
+        self._genre_artist_rows = arrays["genre_artist_rows"]
+        self.genre_track_offsets = arrays["genre_track_offsets"]
+        self._genre_track_rows = arrays["genre_track_rows"]
+        self.popularity_index = SortedRangeIndex(
+            arrays["popularity_order"],
+            arrays["popularity_sorted"],
+            arrays["artist_popularity_percent"],
+        )
+        self.duration_artist_index = SortedRangeIndex(
+            arrays["duration_artist_order"], arrays["duration_artist_sorted"]
+        )
+
+    def artist_row(self, artist_name: str) -> Optional[int]:
+        """Row of the first artist whose name matches case-insensitively."""
+        return self.name_index.lookup(artist_name)
+
+    def artist_row_by_id(self, artist_id: str) -> Optional[int]:
+        return self.id_index.lookup(str(artist_id))
+
+    def artist_tracks(self, artist_row: int) -> np.ndarray:
+        """Rows of the track feature store that belong to an artist."""
+        start, stop = self.artist_track_offsets[artist_row:artist_row + 2]
+        return self.artist_track_rows[start:stop]
+
+    def genre_artist_rows(self, genre: str) -> Optional[np.ndarray]:
+        """Sorted rows of the artists with a track in the genre."""
+        code = self.genre_codes.get(genre)
+        if code is None:
+            return None
+        start, stop = self.genre_artist_offsets[code:code + 2]
+        return self._genre_artist_rows[start:stop]
+
+    def genre_track_rows(self, genre: str) -> Optional[np.ndarray]:
+        """Sorted rows of the track feature store tagged with the genre."""
+        code = self.genre_codes.get(genre)
+        if code is None:
+            return None
+        start, stop = self.genre_track_offsets[code:code + 2]
+        return self._genre_track_rows[start:stop]
+
+    def filtered_artist_rows(
+        self, filters: RecommendationFilters
+    ) -> Optional[np.ndarray]:
+        """Sorted rows of the artists passing the filters; None if unfiltered.
+
+        Each filter is resolved from its index and the results intersected,
+        so an artist matches the genre and the length window through possibly
+        different tracks.
+        """
+        rows = None
+        if filters.genre is not None:
+            rows = self.genre_artist_rows(filters.genre)
+            if rows is None:
+                return np.empty(0, dtype=np.int32)
+        if filters.popularity_range is not None:
+            in_band = self.popularity_index.rows(*filters.popularity_range)
+            rows = in_band if rows is None else intersect_sorted(rows, in_band)
+        if filters.duration_range is not None:
+            in_window = self.duration_artist_index.distinct_rows(
+                *filters.duration_range, n_rows=len(self.artist_profiles)
+            )
+            rows = in_window if rows is None else intersect_sorted(rows, in_window)
+        return rows
+
+    def filter_track_rows(
+        self, track_rows: np.ndarray, filters: RecommendationFilters
+    ) -> np.ndarray:
+        """The track rows in the filters' genre and length window."""
+        if filters.genre is not None:
+            genre_tracks = self.genre_track_rows(filters.genre)
+            if genre_tracks is None:
+                return track_rows[:0]
+            track_rows = track_rows[sorted_membership(genre_tracks, track_rows)]
+        if filters.duration_range is not None:
+            low, high = filters.duration_range
+            durations = self.track_durations[track_rows]
+            track_rows = track_rows[(durations >= low) & (durations <= high)]
+        return track_rows
+
+    def track_mask(self, filters: RecommendationFilters) -> Optional[np.ndarray]:
+        """Tracks in the filters' genre and length window; None if unfiltered."""
+        if filters.genre is None and filters.duration_range is None:
+            return None
+        mask = np.zeros(len(self.track_rowids), dtype=bool)
+        if filters.genre is not None:
+            genre_tracks = self.genre_track_rows(filters.genre)
+            if genre_tracks is not None:
+                mask[genre_tracks] = True
+        else:
+            mask[:] = True
+        if filters.duration_range is not None:
+            low, high = filters.duration_range
+            mask &= (self.track_durations >= low) & (self.track_durations <= high)
+        return mask
+
+    def best_tracks(
+        self,
+        query: np.ndarray,
+        k: int,
+        filters: Optional[RecommendationFilters] = None,
+        max_artists: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The k tracks nearest a normalized song feature vector, catalog-wide.
+
+        Artists' song groups are ranked by their centroids first and only the
+        tracks of the most promising ones are scored; exact unless
+        ``max_artists`` caps the first stage (at that many groups). Returns
+        (track rows, artist rows, distances).
+        """
+        filters = filters or RecommendationFilters()
+        candidate_artists = self.filtered_artist_rows(filters)
+        candidate_groups = (
+            None if candidate_artists is None
+            else np.flatnonzero(
+                sorted_membership(candidate_artists, self.song_group_artists)
+            )
+        )
+        track_rows, groups, distances = two_stage_top_k(
+            np.asarray(query, dtype=np.float32),
+            self.song_group_centroids,
+            self.song_group_radii,
+            self.song_group_offsets,
+            self.song_group_rows,
+            self.track_features,
+            k,
+            candidate_groups=candidate_groups,
+            member_mask=self.track_mask(filters),
+            max_groups=max_artists,
+        )
+        return track_rows, self.song_group_artists[groups], distances
+
+    def scan_tracks(
+        self,
+        query: np.ndarray,
+        k: int,
+        filters: Optional[RecommendationFilters] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``best_tracks`` by a scan of the quantized track matrix.
+
+        Every track passing the filters is scored over its uint8 codes, and
+        only those that could still be among the k nearest are re-ranked on
+        the float features, so the tracks and distances match ``best_tracks``
+        while the scan reads a quarter of the bytes. The re-ranked rows are
+        read from the file, so only the codes stay resident.
+        """
+        filters = filters or RecommendationFilters()
+        mask = self.track_mask(filters)
+        artist_rows = self.track_artist_rows
+        candidate_artists = self.filtered_artist_rows(filters)
+        if candidate_artists is not None:
+            rows, found_in = gather_members(
+                candidate_artists, self.artist_track_offsets, self.artist_track_rows
+            )
+            artist_rows = np.full(len(self.track_rowids), -1, dtype=np.int32)
+            artist_rows[rows[::-1]] = found_in[::-1]
+            mask = artist_rows >= 0 if mask is None else mask & (artist_rows >= 0)
+        track_rows, distances = self.quantized_tracks.top_k(
+            query,
+            k,
+            features=self.track_feature_rows,
+            rows=None if mask is None else np.flatnonzero(mask),
+        )
+        return track_rows, artist_rows[track_rows], distances
+
+    def similar_artists(
+        self,
+        artist_row: int,
+        k: int,
+        epsilon: float = 1,
+        candidate_rows: Optional[np.ndarray] = None
+    ) -> Optional[pd.DataFrame]:
+        """Top-k neighbours of an artist from the precomputed table.
+
+        Artists sharing the selected artist's name are skipped, as in
+        ``Database.find_top_k_artists``, and so are neighbours outside the
+        sorted ``candidate_rows`` if given. Returns None if the table does not
+        hold enough neighbours, so callers can fall back to a full scan.
+        """
+        names = self.artist_profiles["artist_name"]
+        candidates = self.neighbour_rows[artist_row]
+        keep = (names.iloc[candidates] != names.iloc[artist_row]).to_numpy()
+        if candidate_rows is not None:
+            keep &= sorted_membership(candidate_rows, candidates)
+        if keep.sum() < k and len(candidates) < len(names) - 1:
+            return None
+
+        rows = candidates[keep][:k]
+        similar = self.artist_profiles.iloc[rows].copy()
+        distances = self.neighbour_distances[artist_row][keep][:k]
+        similar["similarity"] = 1 / (epsilon + distances)
+        return similar
+
+
+def load_snapshot(database: Database) -> RecommendationSnapshot:
+    """Attach to the snapshot for the current database, building it if needed."""
+    db_path = Path(database.db_path)
+    # The file actually read: collection, profile triggers and migrations write to it
+    digest = source_digest(db_path)
+    store = ArrayStore(
+        db_path.with_suffix(".snapshot"),
+        "snapshot",
+        f"v{SNAPSHOT_VERSION}-{digest[:16]}",
+    )
+
+    if not store.exists():
+        start = time.perf_counter()
+        arrays, manifest = build_snapshot_arrays(database)
+        store.publish(arrays, {**manifest, "source_sha256": digest})
+        logger.info(
+            "Built recommendation snapshot %s in %.2fs",
+            store.path.name, time.perf_counter() - start,
+        )
+
+    start = time.perf_counter()
+    snapshot = RecommendationSnapshot(*store.attach())
+    logger.info(
+        "Attached recommendation snapshot %s in %.3fs",
+        store.path.name, time.perf_counter() - start,
+    )
+    return snapshot
@@ -0,0 +1,672 @@
+"""Concurrent Spotify track collector.
+
+The ``SongcollectionUpdated`` script paces itself with ``asyncio.sleep(1)``
+after every fetch and only backs off once a request has already failed with
+429. Here every credential gets its own token bucket, so requests are spent
+at the rate each key is allowed; a 429's ``Retry-After`` pauses that key's
+bucket, and the other keys keep going. Server errors, dropped connections,
+timeouts, unreadable bodies and failed token fetches back that key off too
+and are retried, so one bad response never ends a run. A bounded semaphore
+caps the requests in flight, all of which share one ``aiohttp.ClientSession``
+connection pool.
+
+Collection is a pipeline: search pages feed a queue of tracks, which is
+drained in batches to the bulk endpoints (100 tracks per audio-features
+request, 50 artists per artists request), and the results are joined into
+rows. That takes a few requests per hundred tracks, where fetching each
+track's features and artist separately took more than two per track. With
+a ``CollectorCache``, tracks collected on earlier runs are dropped before
+enrichment and artists fetched within the TTL come from disk.
+
+Credentials come from ``SPOTIFY_CLIENT_ID`` and ``SPOTIFY_CLIENT_SECRET``
+(comma-separated for several keys), e.g. from ``config/dev.env``:
+
+    python src/spotify_collector.py --tracks 1000 --output tracks.csv
+"""
+import argparse
+import asyncio
+import base64
+import email.utils
+import itertools
+import logging
+import os
+import random
+import string
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from collector_cache import CollectorCache
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+# Requests per second and burst allowed per credential
+REQUEST_RATE = 5.0
+REQUEST_BURST = 10
+# Requests in flight across all credentials
+MAX_CONCURRENCY = 16
+MAX_ATTEMPTS = 5
+# Assumed when a 429 comes without a usable Retry-After, and the first
+# backoff after an error, doubled on each further attempt
+DEFAULT_RETRY_AFTER = 1.0
+# Seconds a request, token fetches included, may take before it is retried
+REQUEST_TIMEOUT = 30.0
+# Results per search page; the API allows up to 50
+SEARCH_LIMIT = 50
+# Ids per request to the bulk endpoints, the API's maximums
+FEATURES_BATCH = 100
+ARTISTS_BATCH = 50
+# How long a batch waits for more tracks before going out part-full
+BATCH_WAIT = 0.2
+# Search pages taken per query; the API stops paging at offset 1000
+PAGES_PER_QUERY = 4
+# Search totals remembered, to skip pages past the end of a query
+QUERY_TOTALS = 1024
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts up to ``capacity``.
+
+    ``pause`` empties the bucket and stops it refilling for a while, which
+    is how a 429's Retry-After is honoured. Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def _delay(self, now: float) -> float:
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now + max(0.0, 1 - self.tokens) / self.rate
+        return max(0.0, 1 - self.tokens) / self.rate
+
+    def expected_wait(self) -> float:
+        """Seconds until a new acquisition would go through, queue included."""
+        return self._delay(time.monotonic()) + self.waiting / self.rate
+
+    async def acquire(self) -> None:
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    delay = self._delay(time.monotonic())
+                    if delay <= 0:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds: float) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class Credential:
+    """One client id/secret pair, its access token and its request budget."""
+
+    def __init__(self, client_id: str, client_secret: str, rate: float, burst: float):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.bucket = TokenBucket(rate, burst)
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+
+class CollectorStats:
+    """Request and throughput counters of a collection run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.tracks = 0
+        self.duplicate_tracks = 0
+        self.cached_artists = 0
+        self.saved_artist_requests = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def tracks_per_second(self) -> float:
+        return self.tracks / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def saved_requests(self) -> int:
+        """Bulk requests not made thanks to the seen-set and artist cache."""
+        return self.saved_artist_requests + self.duplicate_tracks // FEATURES_BATCH
+
+    def summary(self) -> str:
+        return (
+            f"{self.tracks} tracks in {self.elapsed:.1f}s "
+            f"({self.tracks_per_second:.1f} tracks/s), {self.requests} requests, "
+            f"{self.rate_limited} rate limited, {self.failed} failed; "
+            f"{self.duplicate_tracks} duplicate tracks skipped, "
+            f"{self.cached_artists} artists from cache, "
+            f"{self.saved_requests} requests saved"
+        )
+
+
+def retry_after(value: Optional[str]) -> float:
+    """Seconds to wait from a Retry-After header: delta-seconds or an HTTP-date."""
+    if value is None:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class AccessTokenError(RuntimeError):
+    """The token endpoint refused or failed a client-credentials request."""
+
+
+def credentials_from_env() -> List[Tuple[str, str]]:
+    """(client id, secret) pairs from SPOTIFY_CLIENT_ID/SPOTIFY_CLIENT_SECRET."""
+    ids = [v for v in os.environ.get("SPOTIFY_CLIENT_ID", "").split(",") if v]
+    secrets = [v for v in os.environ.get("SPOTIFY_CLIENT_SECRET", "").split(",") if v]
+    if len(ids) != len(secrets):
+        raise ValueError("Client IDs and secrets must have the same length.")
+    return list(zip(ids, secrets))
+
+
+class SpotifyClient:
+    """Rate-limited JSON requests to the Web API over one connection pool.
+
+    Use as an async context manager. Each request goes out on the credential
+    whose bucket frees up soonest.
+    """
+
+    def __init__(
+        self,
+        credentials: Sequence[Tuple[str, str]],
+        api_url: str = SPOTIFY_API_URL,
+        token_url: str = SPOTIFY_TOKEN_URL,
+        rate: float = REQUEST_RATE,
+        burst: float = REQUEST_BURST,
+        concurrency: int = MAX_CONCURRENCY,
+    ):
+        if not credentials:
+            raise ValueError("At least one Spotify credential is required")
+        self.credentials = [
+            Credential(client_id, secret, rate, burst)
+            for client_id, secret in credentials
+        ]
+        self.api_url = api_url.rstrip("/")
+        self.token_url = token_url
+        self.concurrency = concurrency
+        self.semaphore = asyncio.BoundedSemaphore(concurrency)
+        self.stats = CollectorStats()
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "SpotifyClient":
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+
+    async def _access_token(self, credential: Credential) -> str:
+        async with credential._refresh_lock:
+            # Refresh a minute early so no request goes out on an expiring token
+            if credential.access_token is None or time.time() > credential.expires_at - 60:
+                client_creds = f"{credential.client_id}:{credential.client_secret}"
+                headers = {
+                    "Authorization": "Basic "
+                    + base64.b64encode(client_creds.encode()).decode()
+                }
+                async with self.session.post(
+                    self.token_url,
+                    headers=headers,
+                    data={"grant_type": "client_credentials"},
+                ) as response:
+                    if response.status != 200:
+                        raise AccessTokenError(
+                            f"Failed to get access token: {response.status} "
+                            f"{await response.text()}"
+                        )
+                    token = await response.json()
+                if "access_token" not in token:
+                    raise AccessTokenError(f"No access token in response: {sorted(token)}")
+                credential.access_token = token["access_token"]
+                credential.expires_at = time.time() + token.get("expires_in", 3600)
+            return credential.access_token
+
+    def _next_credential(self) -> Credential:
+        return min(self.credentials, key=lambda c: c.bucket.expected_wait())
+
+    async def get_json(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """GET ``path`` under the API URL; None once it fails for good."""
+        for attempt in range(MAX_ATTEMPTS):
+            credential = self._next_credential()
+            await credential.bucket.acquire()
+            backoff = DEFAULT_RETRY_AFTER * 2 ** attempt
+            try:
+                token = await self._access_token(credential)
+                async with self.semaphore:
+                    self.stats.requests += 1
+                    async with self.session.get(
+                        f"{self.api_url}/{path.lstrip('/')}",
+                        headers={"Authorization": f"Bearer {token}"},
+                        params=params,
+                    ) as response:
+                        if response.status == 200:
+                            return await response.json()
+                        if response.status == 429:
+                            self.stats.rate_limited += 1
+                            credential.bucket.pause(
+                                retry_after(response.headers.get("Retry-After"))
+                            )
+                            continue
+                        if response.status == 401:
+                            credential.access_token = None
+                            continue
+                        if response.status >= 500:
+                            credential.bucket.pause(backoff)
+                            continue
+                        break
+            # Dropped connections, timeouts, bodies that are not JSON, token failures
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, AccessTokenError) as e:
+                logger.warning(
+                    "GET %s failed (attempt %d/%d): %r", path, attempt + 1, MAX_ATTEMPTS, e
+                )
+                credential.bucket.pause(backoff)
+        self.stats.failed += 1
+        return None
+
+
+def random_queries() -> Iterator[Tuple[str, int]]:
+    """Endless (query, offset) pairs of random 3-5 letter first pages."""
+    while True:
+        query = "".join(
+            random.choice(string.ascii_lowercase) for _ in range(random.randint(3, 5))
+        )
+        yield query, 0
+
+
+def search_pages(seed: int = 0, start: int = 0) -> Iterator[Tuple[str, int]]:
+    """The (query, offset) pages of a fixed random sequence, from ``start``.
+
+    Page ``i`` is always the same for a seed, so a run can resume at the
+    position it got to. Each query is paged PAGES_PER_QUERY times.
+    """
+    for position in itertools.count(start):
+        number, page = divmod(position, PAGES_PER_QUERY)
+        rng = random.Random(f"{seed}:{number}")
+        query = "".join(
+            rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 5))
+        )
+        yield query, page * SEARCH_LIMIT
+
+
+def artist_metadata(artist: Optional[Dict]) -> Dict:
+    """The artist columns of a collected row, empty if the fetch failed."""
+    if not artist:
+        return {
+            "genres": [],
+            "artist_popularity": None,
+            "artist_followers": None,
+            "artist_external_url": None,
+            "artist_image_url": None,
+        }
+    return {
+        "genres": artist.get("genres", []),
+        "artist_popularity": artist.get("popularity"),
+        "artist_followers": artist["followers"]["total"],
+        "artist_external_url": artist["external_urls"]["spotify"],
+        "artist_image_url": artist["images"][0]["url"] if artist["images"] else None,
+    }
+
+
+def track_row(track: Dict, audio_features: Dict, artist: Dict) -> Dict:
+    """One collected row, in the columns of the SongcollectionUpdated export."""
+    album_images = track["album"]["images"]
+    track_info = {
+        "track_id": track["id"],
+        "artists": ", ".join(a["name"] for a in track["artists"]),
+        "album_name": track["album"]["name"],
+        "release_date": track["album"]["release_date"],
+        "album_image_url": album_images[0]["url"] if album_images else None,
+        "track_name": track["name"],
+        "popularity": track["popularity"],
+        "duration_ms": track["duration_ms"],
+        "explicit": track["explicit"],
+        "available_markets": ", ".join(track.get("available_markets", [])),
+        "track_external_url": track["external_urls"]["spotify"],
+        "track_genre": ", ".join(artist["genres"]),
+        "artist_popularity": artist["artist_popularity"],
+        "artist_followers": artist["artist_followers"],
+        "artist_image_url": artist["artist_image_url"],
+        "artist_external_url": artist["artist_external_url"],
+    }
+    return {**track_info, **audio_features}
+
+
+async def _take_batch(queue: asyncio.Queue, size: int, wait: float) -> List:
+    """Up to ``size`` items, waiting at most ``wait`` seconds after the first.
+
+    A None item (end of input) ends the batch and is returned as its last item.
+    """
+    batch = [await queue.get()]
+    deadline = time.monotonic() + wait
+    while batch[-1] is not None and len(batch) < size:
+        try:
+            batch.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+    return batch
+
+
+class TrackCollector:
+    """Random-query track collection on top of a SpotifyClient.
+
+    With a ``cache``, tracks it has seen collected are skipped and artist
+    metadata is reused across runs. Yielded rows are held in the cache until
+    the consumer marks them seen once stored, so a crash before that loses
+    nothing. Without a cache, the ids of this run's tracks are kept in memory.
+
+    ``pages_done`` counts the search pages, from the start of ``collect``'s
+    queries, whose tracks have all been yielded or dropped, so a consumer
+    that has stored everything it was given can resume from there.
+    """
+
+    def __init__(
+        self,
+        client: SpotifyClient,
+        search_limit: int = SEARCH_LIMIT,
+        cache: Optional[CollectorCache] = None,
+    ):
+        self.client = client
+        self.search_limit = search_limit
+        self.cache = cache
+        self.seen_track_ids = set()
+        self.query_totals: Dict[str, int] = {}
+        # Page of each track between search and consumer, tracks left per page
+        self._in_flight: Dict[str, int] = {}
+        self._pending: Dict[int, int] = {}
+        self._pages_started = 0
+
+    @property
+    def pages_done(self) -> int:
+        return min(self._pending, default=self._pages_started)
+
+    async def search_tracks(self, query: str, offset: int = 0) -> List[Dict]:
+        """A page of search results; empty past the query's known total."""
+        if offset >= self.query_totals.get(query, offset + 1):
+            return []
+        result = await self.client.get_json(
+            "search",
+            {"q": query, "type": "track", "limit": self.search_limit, "offset": offset},
+        )
+        tracks = (result or {}).get("tracks", {})
+        if "total" in tracks:
+            self.query_totals[query] = tracks["total"]
+            if len(self.query_totals) > QUERY_TOTALS:
+                del self.query_totals[next(iter(self.query_totals))]
+        return [track for track in tracks.get("items", []) if track]
+
+    async def audio_features(self, track_ids: Sequence[str]) -> Dict[str, Dict]:
+        """Audio features by track id, FEATURES_BATCH ids per request."""
+        results = await asyncio.gather(*(
+            self.client.get_json(
+                "audio-features",
+                {"ids": ",".join(track_ids[start:start + FEATURES_BATCH])},
+            )
+            for start in range(0, len(track_ids), FEATURES_BATCH)
+        ))
+        return {
+            features["id"]: features
+            for result in results
+            for features in (result or {}).get("audio_features", [])
+            if features
+        }
+
+    async def artists(self, artist_ids: Sequence[str]) -> Dict[str, Dict]:
+        """Artist objects by id, ARTISTS_BATCH ids per request."""
+        results = await asyncio.gather(*(
+            self.client.get_json(
+                "artists", {"ids": ",".join(artist_ids[start:start + ARTISTS_BATCH])}
+            )
+            for start in range(0, len(artist_ids), ARTISTS_BATCH)
+        ))
+        return {
+            artist["id"]: artist
+            for result in results
+            for artist in (result or {}).get("artists", [])
+            if artist
+        }
+
+    async def cached_artists(self, artist_ids: Sequence[str]) -> Dict[str, Dict]:
+        """Artists by id, from the cache where fresh and the API otherwise."""
+        if self.cache is None:
+            return await self.artists(artist_ids)
+        artists = self.cache.artists(artist_ids)
+        missing = [artist_id for artist_id in artist_ids if artist_id not in artists]
+        fetched = await self.artists(missing)
+        self.cache.put_artists(fetched.values())
+        stats = self.client.stats
+        stats.cached_artists += len(artists)
+        stats.saved_artist_requests += (
+            -(-len(artist_ids) // ARTISTS_BATCH) - -(-len(missing) // ARTISTS_BATCH)
+        )
+        return {**artists, **fetched}
+
+    async def track_rows(self, tracks: List[Dict]) -> List[Dict]:
+        """Rows for tracks, each with its audio features and first artist.
+
+        One bulk audio-features pass, then one bulk artists pass over the
+        distinct first artists of the tracks that have features.
+        """
+        features = await self.audio_features([track["id"] for track in tracks])
+        tracks = [track for track in tracks if track["id"] in features]
+        artist_ids = list(dict.fromkeys(track["artists"][0]["id"] for track in tracks))
+        artists = await self.cached_artists(artist_ids)
+        return [
+            track_row(
+                track,
+                features[track["id"]],
+                artist_metadata(artists.get(track["artists"][0]["id"])),
+            )
+            for track in tracks
+        ]
+
+    def _release(self, page_number: int) -> None:
+        self._pending[page_number] -= 1
+        if not self._pending[page_number]:
+            del self._pending[page_number]
+
+    async def _searcher(
+        self, pages: Iterator[Tuple[int, Tuple[str, int]]], tracks: asyncio.Queue
+    ) -> None:
+        for page_number, (query, offset) in pages:
+            self._pages_started = max(self._pages_started, page_number + 1)
+            # The page stays pending while its search is out
+            self._pending[page_number] = 1
+            page = await self.search_tracks(query, offset)
+            new_ids = list(dict.fromkeys(
+                track["id"] for track in page
+                if track["id"] not in self._in_flight
+                and track["id"] not in self.seen_track_ids
+            ))
+            if self.cache is None:
+                self.seen_track_ids.update(new_ids)
+            else:
+                new_ids = self.cache.unseen(new_ids)
+            self.client.stats.duplicate_tracks += len(page) - len(new_ids)
+            for track_id in new_ids:
+                self._in_flight[track_id] = page_number
+            self._pending[page_number] += len(new_ids)
+            new_ids = set(new_ids)
+            for track in page:
+                if track["id"] in new_ids:
+                    new_ids.discard(track["id"])
+                    await tracks.put(track)
+            self._release(page_number)
+
+    async def _search(
+        self, queries: Iterator[Tuple[str, int]], tracks: asyncio.Queue,
+        searchers: int, enrichers: int,
+    ) -> None:
+        pages = enumerate(queries)
+        await asyncio.gather(*(self._searcher(pages, tracks) for _ in range(searchers)))
+        for _ in range(enrichers):
+            await tracks.put(None)
+
+    async def _enricher(self, tracks: asyncio.Queue, rows: asyncio.Queue) -> None:
+        while True:
+            batch = await _take_batch(tracks, FEATURES_BATCH, BATCH_WAIT)
+            finished = batch[-1] is None
+            if finished:
+                batch.pop()
+            if batch:
+                batch_rows = await self.track_rows(batch)
+                enriched = {row["track_id"] for row in batch_rows}
+                for track in batch:
+                    if track["id"] not in enriched:
+                        self._release(self._in_flight.pop(track["id"]))
+                for row in batch_rows:
+                    await rows.put(row)
+            if finished:
+                return
+
+    async def collect(
+        self,
+        num_tracks: int,
+        queries: Optional[Iterator[Tuple[str, int]]] = None,
+        workers: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield up to ``num_tracks`` new rows as they complete.
+
+        ``queries`` yields the (query, offset) search pages to go through,
+        random ones by default. ``workers`` pages are searched at a time and
+        as many batches enriched, one per credential by default.
+        """
+        queries = random_queries() if queries is None else iter(queries)
+        workers = workers or len(self.client.credentials)
+        tracks: asyncio.Queue = asyncio.Queue(maxsize=2 * FEATURES_BATCH)
+        rows: asyncio.Queue = asyncio.Queue(maxsize=2 * FEATURES_BATCH)
+        tasks = {
+            asyncio.create_task(self._search(queries, tracks, workers, workers)),
+            *(asyncio.create_task(self._enricher(tracks, rows)) for _ in range(workers)),
+        }
+        last_report = time.monotonic()
+        try:
+            while self.client.stats.tracks < num_tracks:
+                getter = asyncio.create_task(rows.get())
+                done, _ = await asyncio.wait(
+                    {getter, *tasks}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter not in done:
+                    getter.cancel()
+                    for task in done:
+                        # Raises if a stage failed; else its input ran out
+                        task.result()
+                    tasks -= done
+                    if not tasks and rows.empty():
+                        break
+                    continue
+                self.client.stats.tracks += 1
+                row = getter.result()
+                if self.cache is not None:
+                    self.cache.hold(row["track_id"])
+                yield row
+                self._release(self._in_flight.pop(row["track_id"]))
+                if time.monotonic() - last_report >= 10:
+                    last_report = time.monotonic()
+                    logger.info(self.client.stats.summary())
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def collect_to_csv(
+    credentials: Sequence[Tuple[str, str]],
+    num_tracks: int,
+    output: str,
+    cache_path: Optional[str] = None,
+) -> CollectorStats:
+    """Collect tracks with random queries, appending them to a CSV file.
+
+    With ``cache_path``, tracks already collected by earlier runs sharing
+    the cache are skipped.
+    """
+    import pandas as pd
+
+    cache = CollectorCache(cache_path) if cache_path else None
+    async with SpotifyClient(credentials) as client:
+        batch = []
+        collector = TrackCollector(client, cache=cache)
+
+        def flush() -> None:
+            pd.DataFrame(batch).to_csv(
+                output, mode="a", index=False, header=not os.path.exists(output)
+            )
+            if cache is not None:
+                cache.mark_seen(row["track_id"] for row in batch)
+            batch.clear()
+
+        async for row in collector.collect(num_tracks):
+            batch.append(row)
+            if len(batch) >= 500:
+                flush()
+        if batch:
+            flush()
+    if cache is not None:
+        cache.close()
+    return client.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect random Spotify tracks")
+    parser.add_argument("--tracks", type=int, default=900000)
+    parser.add_argument("--output", default="spotify_tracks.csv")
+    parser.add_argument(
+        "--cache",
+        default="spotify_collector_cache.db",
+        help="SQLite file of seen tracks and artist metadata ('' to disable)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    stats = asyncio.run(collect_to_csv(
+        credentials_from_env(), args.tracks, args.output, args.cache or None
+    ))
+    logger.info(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
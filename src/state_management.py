@@ -1,9 +1,41 @@
 from typing import Dict, List, Optional
+import pandas as pd
 import streamlit as st
 from pydantic import BaseModel
 
-from models import Song, UserPreferences
+from models import RecommendationFilters, Song, UserPreferences
 from database import Database
+from genre_profiles import GenreRegistry
+from recommendation_cache import RecommendationCache
+
+@st.cache_resource
+def get_database() -> Database:
+    """Process-wide database handle shared by every session and rerun."""
+    return Database()
+
+def get_artist_profiles() -> Optional[pd.DataFrame]:
+    """Read-only artist profiles shared by every session in this process.
+
+    The columns are memory-mapped from the recommendation snapshot, so other
+    worker processes attach to the same pages instead of loading their own copy.
+    The database memoizes them until its file changes, so this is cheap to call
+    on every rerun.
+    """
+    database = get_database()
+    snapshot = database.get_snapshot()
+    if snapshot is not None:
+        return snapshot.artist_profiles
+    return database.get_artist_profiles()
+
+@st.cache_resource
+def get_genre_registry() -> GenreRegistry:
+    """Genre presets derived from the catalog, shared by every session."""
+    return GenreRegistry.load(get_database())
+
+@st.cache_resource
+def get_recommendation_cache() -> RecommendationCache:
+    """Top-k recommendations shared by every session in this process."""
+    return RecommendationCache()
 
 class SessionState:
     """Centralized session state management"""
@@ -28,6 +60,9 @@ class SessionState:
             st.session_state.need_recommendations = True
         if "last_selected_artist" not in st.session_state:
             st.session_state.last_selected_artist = None
+        # Sidebar filters: genre, popularity band and track length
+        if "recommendation_filters" not in st.session_state:
+            st.session_state.recommendation_filters = RecommendationFilters()
         # UI state
         if "playlist_filter" not in st.session_state:
             st.session_state.playlist_filter = ""
@@ -38,10 +73,9 @@ class SessionState:
         if "show_help" not in st.session_state:
             st.session_state.show_help = False
 
-        # Data state
-        if "artist_profiles" not in st.session_state:
-            database = Database()
-            st.session_state.artist_profiles = database.get_artist_profiles()
+        # Data state: a reference to the shared frame, never a per-session copy,
+        # taken again on each rerun so a changed database is picked up
+        st.session_state.artist_profiles = get_artist_profiles()
             
         if "graphs" not in st.session_state:
             st.session_state.graphs = {}
@@ -1,76 +1,359 @@
-import sqlite3
+"""Synthetic music catalogs in the normalized schema, at any scale.
+
+Writes the tables ``Database`` queries (see ``schema.py``) through the bulk
+load of ``etl.py``: tracks are generated and inserted ``CHUNK_TRACKS`` at a
+time, so memory grows with the number of artists, not of tracks, and the
+indexes, artist sums and genre profiles are built once the rows are in.
+
+Catalogs are skewed like real ones. Tracks per artist follow a Zipf law
+over the artists' rank, artist popularity a Beta distribution, with the
+bigger artists the more popular, and tracks scatter around their artist's
+popularity. Each genre has a center in feature space, each artist a center
+near their genre's and each track lies near its artist's, so profiles and
+similarities have structure to find. Every value derives from ``seed``: the
+same arguments always produce the same database.
+
+    python src/synthetic_data.py --tracks 1000000 --db /tmp/music_1m.db
+"""
+import argparse
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-import pandas as pd
-
-
-# Generate synthetic data
-def generate_synthetic_data(num_songs=100, num_artists=25):
-    np.random.seed(42)
-
-    # Generate artist IDs and names
-    artist_ids = [f"artist_{i}" for i in range(num_artists)]
-    artist_names = [f"Artist {chr(65 + i)}" for i in range(num_artists)]
-
-    # Define some genre options for variety
-    genres = ["Pop", "Rock", "Jazz", "Hip-Hop", "Classical", "Electronic", "Country"]
-
-    # Assign each song to a random artist and genre
-    song_artist_ids = np.random.choice(artist_ids, size=num_songs)
-    song_genres = np.random.choice(genres, size=num_songs)
-
-    # Generate synthetic song features
-    song_features = {
-        "song_id": [f"song_{i}" for i in range(num_songs)],
-        "song_name": [f"Song {i}" for i in range(num_songs)],
-        "artist_id": song_artist_ids,
-        "danceability": np.random.rand(num_songs),
-        "energy": np.random.rand(num_songs),
-        "acousticness": np.random.rand(num_songs),
-        "instrumentalness": np.random.rand(num_songs),
-        "liveness": np.random.rand(num_songs),
-        "valence": np.random.rand(num_songs),
-        "speechiness": np.random.rand(num_songs),
-        "popularity": np.random.randint(0, 100, num_songs),  # Popularity scale of 0-100
-        "genre": song_genres,
-        "duration_ms": np.random.randint(
-            180000, 300000, num_songs
-        ),  # Duration between 3-5 minutes in ms
-    }
-    songs_df = pd.DataFrame(song_features)
-
-    # Create artist DataFrame and merge to add artist_name to songs_df
-    artists_df = pd.DataFrame({"artist_id": artist_ids, "artist_name": artist_names})
-    songs_df = songs_df.merge(artists_df, on="artist_id")
-    conn = sqlite3.connect("music_data.db")
-    songs_df.to_sql("songs", conn, if_exists="replace", index=False)
-    artists_df.to_sql("artists", conn, if_exists="replace", index=False)
-    artist_profiles = aggregate_artist_profiles(songs_df, artists_df)
-    artist_profiles.to_sql("artist_profiles", conn, if_exists="replace", index=False)
-    conn.close()
-
-
-def aggregate_artist_profiles(songs_df, artists_df):
-    # Select features to aggregate
-    features = [
-        "danceability",
-        "energy",
-        "acousticness",
-        "instrumentalness",
-        "liveness",
-        "valence",
-        "speechiness",
-        "popularity",
-        "duration_ms",  # Include duration in artist profile
-    ]
-
-    # Aggregate by artist
-    artist_profiles = songs_df.groupby("artist_id")[features].mean().reset_index()
-
-    # Merge artist names into the aggregated profile
-    artist_profiles = artist_profiles.merge(artists_df, on="artist_id")
-
-    # Reorder columns to have artist name first for easier readability
-    artist_profiles = artist_profiles[["artist_id", "artist_name"] + features]
-
-    return artist_profiles
+
+from etl import finish_load, peak_rss_mb, scratch_database
+from schema import BINARY_FEATURE_THRESHOLDS, insert_statement
+
+logger = logging.getLogger(__name__)
+
+# Tracks generated and inserted per transaction; also the unit of the
+# random streams, so it must stay fixed for catalogs to be reproducible
+CHUNK_TRACKS = 50_000
+
+GENRES = [
+    "pop", "rock", "hip hop", "edm", "indie", "r&b", "country", "latin",
+    "metal", "jazz", "folk", "classical", "soul", "punk", "reggae", "blues",
+]
+FIRST_NAMES = [
+    "Ada", "Bo", "Cleo", "Dax", "Eli", "Faye", "Gus", "Ivy", "Jude", "Kai",
+    "Lola", "Milo", "Nia", "Otis", "Pia", "Rex", "Sol", "Tess", "Uma", "Zed",
+]
+# Two letters each, so any sequence spells a different surname
+SYLLABLES = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+TITLE_WORDS = [
+    "Midnight", "Golden", "Echo", "River", "Neon", "Paper", "Silver", "Ghost",
+    "Summer", "Velvet", "Electric", "Wild", "Hollow", "Northern", "Glass",
+    "Fire", "Heart", "Road", "Sky", "Dream", "Stone", "Rain", "Light", "City",
+]
+BASE62 = np.frombuffer(
+    b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", dtype=np.uint8
+)
+# Features in [0, 1] drawn around artist centers; the binary ones are
+# thresholded as the collector does
+UNIT_FEATURES = [
+    "danceability", "energy", "speechiness", "acousticness",
+    "instrumentalness", "liveness", "valence",
+]
+ALBUM_SIZES = ([1, 4, 8, 12], [0.3, 0.15, 0.3, 0.25])
+# Shares of albums dated to the day, month and year, and undated ("0000")
+RELEASE_PRECISIONS = [0.75, 0.05, 0.19, 0.01]
+FIRST_YEAR, LAST_YEAR = 1950, 2024
+
+
+def artist_name(index: int) -> str:
+    """A pronounceable name that no other index gets.
+
+    A first name, then a surname spelling the rest of the index in base
+    ``len(SYLLABLES)``, with at least two syllables.
+    """
+    index, first = divmod(index, len(FIRST_NAMES))
+    syllables = []
+    while index or len(syllables) < 2:
+        index, digit = divmod(index, len(SYLLABLES))
+        syllables.append(SYLLABLES[digit])
+    return f"{FIRST_NAMES[first]} {''.join(syllables).capitalize()}"
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """SplitMix64's finalizer: a permutation of the 64-bit integers."""
+    with np.errstate(over="ignore"):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def spotify_ids(indices: np.ndarray, seed: int) -> List[str]:
+    """Distinct 22-character base62 ids, like Spotify's, for track indices."""
+    ids = np.empty((len(indices), 22), dtype=np.uint8)
+    # 11 base62 digits hold 64 bits, so the first half alone keeps the ids
+    # distinct; the second only pads them to Spotify's length
+    with np.errstate(over="ignore"):
+        offset = np.uint64(seed + 1) * np.uint64(0x9E3779B97F4A7C15)
+        value = _mix(indices.astype(np.uint64) + offset)
+    for half in range(2):
+        digits = value.copy()
+        for digit in range(11):
+            ids[:, half * 11 + digit] = BASE62[digits % np.uint64(62)]
+            digits //= np.uint64(62)
+        value = _mix(value)
+    return ids.view("S22").ravel().astype(str).tolist()
+
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    """Probabilities proportional to rank ** -exponent, largest first."""
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -exponent
+    return weights / weights.sum()
+
+
+def titles(rng: np.random.Generator, count: int) -> List[str]:
+    words = np.array(TITLE_WORDS, dtype=object)
+    return (words[rng.integers(len(words), size=count)] + " "
+            + words[rng.integers(len(words), size=count)]).tolist()
+
+
+class Catalog:
+    """Per-artist draws the tracks are generated from.
+
+    Artists are indexed by size rank. Each gets an exact track count, so
+    track ``t`` of the catalog belongs to the artist whose range of
+    ``starts`` holds it and albums can be numbered without any state.
+    """
+
+    def __init__(
+        self,
+        num_tracks: int,
+        num_artists: int,
+        seed: int,
+        artist_size_exponent: float,
+        popularity_shape: Tuple[float, float],
+    ):
+        rng = np.random.default_rng([seed, 0])
+        self.seed = seed
+        self.num_tracks = num_tracks
+        self.weights = zipf_weights(num_artists, artist_size_exponent)
+        self.cumulative = np.cumsum(self.weights)
+        # Every artist has at least one track
+        self.track_counts = 1 + rng.multinomial(num_tracks - num_artists, self.weights)
+        self.starts = np.cumsum(self.track_counts) - self.track_counts
+
+        sizes, shares = ALBUM_SIZES
+        self.album_sizes = rng.choice(sizes, size=num_artists, p=shares)
+        album_counts = -(-self.track_counts // self.album_sizes)
+        self.album_counts = album_counts
+        self.album_offsets = np.cumsum(album_counts) - album_counts
+        # Albums are spread evenly from the debut to LAST_YEAR
+        self.debut_years = np.maximum(
+            FIRST_YEAR, LAST_YEAR - rng.exponential(20, num_artists).astype(np.int64)
+        )
+
+        # The biggest artists draw the highest popularities, give or take
+        popularity = np.sort(rng.beta(*popularity_shape, num_artists))[::-1]
+        self.popularity = np.clip(popularity + rng.normal(0, 0.05, num_artists), 0, 1)
+        self.followers = (10 ** (2 + 5 * self.popularity + rng.normal(0, 0.3, num_artists))
+                          ).astype(np.int64)
+
+        genre_weights = zipf_weights(len(GENRES), 1.0)
+        self.genres = rng.choice(len(GENRES), size=num_artists, p=genre_weights)
+        # -1 when the artist has a single genre
+        self.second_genres = np.where(
+            rng.random(num_artists) < 0.3,
+            rng.choice(len(GENRES), size=num_artists, p=genre_weights),
+            -1,
+        )
+        self.second_genres[self.second_genres == self.genres] = -1
+        genre_centers = rng.beta(2, 2, (len(GENRES), len(UNIT_FEATURES)))
+        # Speech and live audience are rare in any genre
+        for feature in ("speechiness", "liveness"):
+            genre_centers[:, UNIT_FEATURES.index(feature)] *= 0.4
+        self.centers = np.clip(
+            genre_centers[self.genres] + rng.normal(0, 0.12, (num_artists, len(UNIT_FEATURES))),
+            0, 1,
+        )
+        self.ids = np.array(
+            [hashlib.md5(artist_name(i).encode()).hexdigest() for i in range(num_artists)],
+            dtype=object,
+        )
+
+    def artist_rows(self, start: int, stop: int) -> List[tuple]:
+        return [
+            (artist_id, artist_name(i), round(float(self.popularity[i]), 2),
+             int(self.followers[i]), f"https://i.scdn.co/image/{artist_id}",
+             f"https://open.spotify.com/artist/{artist_id}")
+            for i, artist_id in zip(range(start, stop), self.ids[start:stop])
+        ]
+
+    def chunk_rows(
+        self, chunk: int, featured_rate: float
+    ) -> Dict[str, List[tuple]]:
+        """Rows of every table for tracks ``chunk * CHUNK_TRACKS`` onwards."""
+        rng = np.random.default_rng([self.seed, 1, chunk])
+        indices = np.arange(
+            chunk * CHUNK_TRACKS, min((chunk + 1) * CHUNK_TRACKS, self.num_tracks)
+        )
+        count = len(indices)
+        artists = np.searchsorted(self.starts, indices, side="right") - 1
+        positions = indices - self.starts[artists]
+        album_numbers = positions // self.album_sizes[artists]
+        album_ids = 1 + self.album_offsets[artists] + album_numbers
+        track_ids = spotify_ids(indices, self.seed)
+
+        # An album is written with its first track
+        first = np.flatnonzero(positions % self.album_sizes[artists] == 0)
+        debuts = self.debut_years[artists[first]]
+        years = debuts + album_numbers[first] * (LAST_YEAR - debuts + 1) // self.album_counts[artists[first]]
+        precisions = rng.choice(4, size=len(first), p=RELEASE_PRECISIONS)
+        months, days = rng.integers(1, 13, len(first)), rng.integers(1, 29, len(first))
+        release_dates = [
+            (f"{year}-{month:02d}-{day:02d}", f"{year}-{month:02d}", str(year), "0000")[p]
+            for year, month, day, p in zip(years.tolist(), months.tolist(), days.tolist(),
+                                           precisions.tolist())
+        ]
+        albums = list(zip(
+            album_ids[first].tolist(),
+            titles(rng, len(first)),
+            release_dates,
+            [f"https://i.scdn.co/image/album{album_id:032d}" for album_id in album_ids[first].tolist()],
+        ))
+
+        features = np.clip(
+            self.centers[artists] + rng.normal(0, 0.1, (count, len(UNIT_FEATURES))), 0, 1
+        )
+        unit = dict(zip(UNIT_FEATURES, features.T))
+        for name, threshold in BINARY_FEATURE_THRESHOLDS.items():
+            unit[name] = (unit[name] >= threshold).astype(np.int64)
+        loudness = np.clip(-25 + 20 * unit["energy"] + rng.normal(0, 2, count), -60, 0)
+        tempo = np.clip(rng.normal(95 + 50 * unit["energy"], 15), 50, 220)
+        durations = rng.lognormal(np.log(210_000), 0.3, count).astype(np.int64)
+        popularity = np.clip(self.popularity[artists] + rng.normal(0, 0.12, count), 0, 1)
+        explicit = rng.random(count) < 0.05 + unit["speechiness"]
+
+        tracks = list(zip(
+            track_ids,
+            titles(rng, count),
+            popularity.round(2).tolist(),
+            durations.tolist(),
+            explicit.astype(np.int64).tolist(),
+            [f"https://open.spotify.com/track/{track_id}" for track_id in track_ids],
+            [f"spotify:track:{track_id}" for track_id in track_ids],
+            album_ids.tolist(),
+        ))
+        track_features = list(zip(
+            track_ids,
+            unit["danceability"].tolist(),
+            unit["energy"].tolist(),
+            rng.integers(12, size=count).tolist(),
+            loudness.tolist(),
+            (rng.random(count) < 0.6).astype(np.int64).tolist(),
+            unit["speechiness"].tolist(),
+            unit["acousticness"].tolist(),
+            unit["instrumentalness"].tolist(),
+            unit["liveness"].tolist(),
+            unit["valence"].tolist(),
+            tempo.tolist(),
+            (durations / 60000).round(2).tolist(),
+        ))
+
+        # Featured artists are drawn by size too; one drawing the track's
+        # own artist is dropped
+        featured = np.flatnonzero(rng.random(count) < featured_rate)
+        guests = np.minimum(
+            np.searchsorted(self.cumulative, rng.random(len(featured))), len(self.ids) - 1
+        )
+        featured, guests = featured[guests != artists[featured]], guests[guests != artists[featured]]
+        track_artists = list(zip(track_ids, self.ids[artists].tolist()))
+        track_artists += zip((track_ids[i] for i in featured.tolist()), self.ids[guests].tolist())
+
+        genre_names = np.array(GENRES, dtype=object)
+        track_genres = list(zip(track_ids, genre_names[self.genres[artists]].tolist()))
+        second = self.second_genres[artists]
+        tagged = np.flatnonzero((second >= 0) & (rng.random(count) < 0.5))
+        track_genres += zip((track_ids[i] for i in tagged.tolist()),
+                            genre_names[second[tagged]].tolist())
+        return {
+            "albums": albums,
+            "tracks": tracks,
+            "track_features": track_features,
+            "track_artists": track_artists,
+            "track_genres": track_genres,
+        }
+
+
+def generate_synthetic_data(
+    db_path: Path,
+    num_tracks: int = 100_000,
+    num_artists: Optional[int] = None,
+    seed: int = 42,
+    artist_size_exponent: float = 0.8,
+    popularity_shape: Tuple[float, float] = (2.0, 5.0),
+    featured_rate: float = 0.1,
+) -> Dict[str, float]:
+    """Write a synthetic catalog of ``num_tracks`` tracks to ``db_path``.
+
+    ``num_artists`` defaults to one per ten tracks. Artist sizes are Zipf
+    with ``artist_size_exponent`` (0 makes them uniform), artist
+    popularities Beta with ``popularity_shape``, and ``featured_rate`` of
+    the tracks credit a second artist. Returns the rows per table, seconds
+    per step and the peak RSS, like ``etl.run_etl``.
+    """
+    num_artists = num_artists or max(1, num_tracks // 10)
+    if not 1 <= num_artists <= num_tracks:
+        raise ValueError(f"Need between 1 and {num_tracks} artists, got {num_artists}")
+
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    catalog = Catalog(num_tracks, num_artists, seed, artist_size_exponent, popularity_shape)
+    timings["artists drawn"] = time.perf_counter() - start
+
+    rows = dict.fromkeys(
+        ["artists", "albums", "tracks", "track_features", "track_artists", "track_genres"], 0
+    )
+    inserts = {table: insert_statement(table) for table in rows}
+    with scratch_database(db_path) as conn:
+        start = time.perf_counter()
+        for first in range(0, num_artists, CHUNK_TRACKS):
+            with conn:
+                batch = catalog.artist_rows(first, min(first + CHUNK_TRACKS, num_artists))
+                conn.executemany(inserts["artists"], batch)
+            rows["artists"] += len(batch)
+        for chunk in range(-(-num_tracks // CHUNK_TRACKS)):
+            with conn:
+                for table, batch in catalog.chunk_rows(chunk, featured_rate).items():
+                    conn.executemany(inserts[table], batch)
+                    rows[table] += len(batch)
+            logger.info(f"Wrote {rows['tracks']} of {num_tracks} tracks")
+        timings["load"] = time.perf_counter() - start
+        finish_load(conn, timings)
+
+    for table, count in rows.items():
+        timings[f"{table} rows"] = count
+    timings["peak RSS MiB"] = peak_rss_mb()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic music database")
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--artists", type=int, help="default: one per ten tracks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--artist-size-exponent", type=float, default=0.8)
+    parser.add_argument("--popularity-shape", type=float, nargs=2, default=[2.0, 5.0])
+    parser.add_argument("--featured-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    start = time.perf_counter()
+    timings = generate_synthetic_data(
+        Path(args.db), args.tracks, args.artists, args.seed,
+        args.artist_size_exponent, tuple(args.popularity_shape), args.featured_rate,
+    )
+    for step, value in timings.items():
+        logger.info(f"{step}: {value:.2f}" if isinstance(value, float) else f"{step}: {value}")
+    logger.info(f"Total: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Background warmup of the shared recommendation cache.
+
+Without it, the first user to apply a genre preset or pick a popular artist
+pays for the top-k scan, best-song lookups and graph rendering. At process
+start a daemon thread precomputes those results for the most common genres
+in the ``GenreRegistry`` (and the default preferences) and for the most
+popular artists, pinning them in the ``RecommendationCache``. Set
+``RECOMMENDATION_WARMUP=0`` to disable it.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import streamlit as st
+
+from chatbot import Recommender
+from genre_profiles import GenreRegistry
+from models import UserPreferences
+from state_management import (
+    get_artist_profiles,
+    get_database,
+    get_genre_registry,
+    get_recommendation_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("RECOMMENDATION_WARMUP", "1") != "0"
+WARMUP_GENRES = int(os.environ.get("RECOMMENDATION_WARMUP_GENRES", "25"))
+WARMUP_TOP_ARTISTS = int(os.environ.get("RECOMMENDATION_WARMUP_ARTISTS", "50"))
+
+# Number of artists the chatbot shows per recommendation
+RECOMMENDATION_K = 15
+
+
+def warmup_preferences(
+    registry: GenreRegistry, genres: int = WARMUP_GENRES
+) -> Dict[str, UserPreferences]:
+    """Preferences a new session likely starts from: defaults and top genres."""
+    preferences = {"Default": UserPreferences()}
+    for profile in registry.top(genres):
+        preferences[profile.name] = registry.preferences(profile.name)
+    return preferences
+
+
+def warm_artist(
+    recommender: Recommender,
+    artist_name: str,
+    preferences: UserPreferences,
+    k: int = RECOMMENDATION_K
+) -> bool:
+    """Precompute what picking an artist in the chat needs."""
+    artist_row = recommender.find_artist_row(artist_name)
+    if artist_row is None:
+        return False
+    artist_id = recommender.artist_profiles["artist_id"].iloc[artist_row]
+    recommender.best_song(artist_id, preferences)
+    recommender.artist_graph_html(artist_row, k, set())
+    return True
+
+
+def warm_recommendations(
+    recommender: Recommender,
+    registry: GenreRegistry,
+    genres: int = WARMUP_GENRES,
+    top_artists: int = WARMUP_TOP_ARTISTS,
+    k: int = RECOMMENDATION_K
+) -> Dict[str, float]:
+    """Fill the cache for genre presets and popular artists; returns a summary."""
+    start = time.perf_counter()
+    warmed_artists = 0
+    presets = warmup_preferences(registry, genres)
+    for preferences in presets.values():
+        matches = recommender.top_artists(preferences, k)
+        recommender.recommendation_graph_html(preferences, k)
+        for artist_name in matches["artist_name"]:
+            warmed_artists += warm_artist(recommender, artist_name, preferences, k)
+
+    profiles = recommender.artist_profiles
+    popularity = profiles["artist_popularity"].to_numpy()
+    default_preferences = presets["Default"]
+    for row in np.argsort(-popularity, kind="stable")[:top_artists]:
+        artist_name = profiles["artist_name"].iloc[row]
+        if isinstance(artist_name, str):
+            warmed_artists += warm_artist(
+                recommender, artist_name, default_preferences, k
+            )
+
+    return {
+        "seconds": time.perf_counter() - start,
+        "presets": len(presets),
+        "artists": warmed_artists,
+        "entries": recommender.cache.stats()["entries"],
+    }
+
+
+def _run_warmup(recommender: Recommender, registry: GenreRegistry) -> None:
+    try:
+        summary = warm_recommendations(recommender, registry)
+    except Exception:
+        logger.exception("Recommendation warmup failed")
+        return
+    logger.info(
+        "Warmed %d presets and %d artist picks in %.2fs (%d cache entries)",
+        summary["presets"], summary["artists"], summary["seconds"],
+        summary["entries"],
+    )
+
+
+@st.cache_resource
+def start_warmup() -> Optional[threading.Thread]:
+    """Start the warmup thread once per process, without blocking the page."""
+    artist_profiles = get_artist_profiles()
+    if not WARMUP_ENABLED or artist_profiles is None:
+        return None
+    recommender = Recommender(
+        get_database(),
+        artist_profiles,
+        get_recommendation_cache(),
+        warming=True
+    )
+    thread = threading.Thread(
+        target=_run_warmup,
+        args=(recommender, get_genre_registry()),
+        name="recommendation-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread